@@ -26,8 +26,15 @@ There is also a convenience macro, `emboss_cc_library()`, which creates an
 
 load("@bazel_tools//tools/cpp:toolchain_utils.bzl", "find_cpp_toolchain")
 
-def emboss_cc_library(name, srcs, deps = [], import_dirs = [], enable_enum_traits = True, **kwargs):
-    """Constructs a C++ library from an .emb file."""
+def emboss_cc_library(name, srcs, deps = [], import_dirs = [], enable_enum_traits = True, cache_field_locations = False, **kwargs):
+    """Constructs a C++ library from an .emb file.
+
+    If cache_field_locations is True, the generated header also has a
+    `Cached${name}View` for each struct whose layout depends on its contents.
+    Those Views cache field locations, so they are not thread-safe; see
+    `Config.cache_field_locations` in compiler/back_end/cpp/header_generator.py.
+    The usual Views and Writers are unaffected.
+    """
     if len(srcs) != 1:
         fail(
             "Must specify exactly one Emboss source file for emboss_cc_library.",
@@ -46,6 +53,7 @@ def emboss_cc_library(name, srcs, deps = [], import_dirs = [], enable_enum_trait
         name = name,
         deps = [":" + name + "_ir"],
         enable_enum_traits = enable_enum_traits,
+        cache_field_locations = cache_field_locations,
         **kwargs
     )
 
@@ -178,6 +186,8 @@ def _cc_emboss_aspect_impl(target, ctx):
     args.add_all(headers)
     if not ctx.attr.enable_enum_traits:
       args.add("--no-cc-enum-traits")
+    if ctx.attr.cache_field_locations:
+      args.add("--cc-cache-field-locations")
     ctx.actions.run(
         executable = emboss_cc_compiler,
         arguments = [args],
@@ -229,6 +239,9 @@ _cc_emboss_aspect = aspect(
         "enable_enum_traits": attr.bool(
             default = True,
         ),
+        "cache_field_locations": attr.bool(
+            default = False,
+        ),
     },
     toolchains = ["@bazel_tools//tools/cpp:toolchain_type"],
 )
@@ -254,6 +267,9 @@ cc_emboss_library = rule(
         "enable_enum_traits": attr.bool(
             default = True,
         ),
+        "cache_field_locations": attr.bool(
+            default = False,
+        ),
     },
     provides = [CcInfo, EmbossInfo],
 )
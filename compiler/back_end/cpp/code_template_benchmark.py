@@ -0,0 +1,146 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks compiled code templates against string.Template.
+
+Usage:
+
+    python3 -m compiler.back_end.cpp.code_template_benchmark [--repeat N] [file.emb...]
+
+If no files are given, every .emb file under testdata/ is used.  A C++ header
+is generated for each file, and every template rendering done by the C++ back
+end is recorded.  The recorded renderings are then replayed with
+string.Template.substitute and with code_template.CompiledTemplate, the results
+are checked for equality, and the total time taken by each is printed.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import string
+import sys
+import timeit
+
+from compiler.back_end.cpp import header_generator
+from compiler.back_end.util import code_template
+from compiler.front_end import emboss_front_end
+from compiler.front_end import glue
+
+
+def _find_default_inputs():
+    """Returns the paths of all .emb files under testdata/."""
+    testdata = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "testdata"
+    )
+    result = []
+    for root, _, files in os.walk(testdata):
+        for name in sorted(files):
+            if name.endswith(".emb"):
+                result.append(os.path.normpath(os.path.join(root, name)))
+    return sorted(result)
+
+
+def _record_renderings(inputs):
+    """Returns (template, kwargs) for each rendering done to compile inputs."""
+    renderings = []
+    format_template = code_template.format_template
+
+    def recording_format_template(template, **kwargs):
+        renderings.append((template, kwargs))
+        return format_template(template, **kwargs)
+
+    file_reader = emboss_front_end._find_in_dirs_and_read(["."])
+    code_template.format_template = recording_format_template
+    try:
+        for file_name in inputs:
+            ir, _, errors = glue.parse_emboss_file(file_name, file_reader)
+            # Some test inputs are intentionally invalid.
+            if not errors:
+                header_generator.generate_header(ir)
+    finally:
+        code_template.format_template = format_template
+    return renderings
+
+
+def _parse_command_line(argv):
+    """Parses the given command-line arguments."""
+    argparser = argparse.ArgumentParser(
+        description="Emboss code template benchmark.", prog=argv[0]
+    )
+    argparser.add_argument(
+        "input_file", type=str, nargs="*", help=".emb files to compile."
+    )
+    argparser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of times to replay the renderings with each implementation.",
+    )
+    return argparser.parse_args(argv[1:])
+
+
+def main(argv):
+    flags = _parse_command_line(argv)
+    inputs = flags.input_file or _find_default_inputs()
+    compiled_renderings = [
+        (template, kwargs)
+        for template, kwargs in _record_renderings(inputs)
+        if isinstance(template, code_template.CompiledTemplate)
+    ]
+    reference_renderings = [
+        (string.Template(template.template), kwargs)
+        for template, kwargs in compiled_renderings
+    ]
+    for (compiled, kwargs), (reference, _) in zip(
+        compiled_renderings, reference_renderings
+    ):
+        if reference.substitute(**kwargs) != code_template.format_template(
+            compiled, **kwargs
+        ):
+            print("Rendering mismatch in {!r}".format(compiled.template))
+            return 1
+
+    timings = {}
+    for name, renderings in (
+        ("reference", reference_renderings),
+        ("compiled", compiled_renderings),
+    ):
+        timings[name] = timeit.timeit(
+            lambda: [
+                code_template.format_template(template, **kwargs)
+                for template, kwargs in renderings
+            ],
+            number=flags.repeat,
+        )
+
+    print(
+        "Replayed {} renderings of {} templates, {} times each.".format(
+            len(compiled_renderings),
+            len({id(template) for template, _ in compiled_renderings}),
+            flags.repeat,
+        )
+    )
+    for name, seconds in timings.items():
+        print(
+            "{:10} {:8.3f}s  {:10.0f} renderings/s".format(
+                name, seconds, len(compiled_renderings) * flags.repeat / seconds
+            )
+        )
+    print("speedup    {:8.2f}x".format(timings["reference"] / timings["compiled"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
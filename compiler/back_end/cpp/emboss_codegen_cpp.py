@@ -26,8 +26,10 @@ import sys
 
 from compiler.back_end.cpp import header_generator
 from compiler.util import error
+from compiler.util import ir_binary
 from compiler.util import ir_data
 from compiler.util import ir_data_utils
+from compiler.util import ir_debug_info
 
 
 def _parse_command_line(argv):
@@ -35,12 +37,31 @@ def _parse_command_line(argv):
     parser = argparse.ArgumentParser(
         description="Emboss compiler C++ back end.", prog=argv[0]
     )
-    parser.add_argument("--input-file", type=str, help=".emb.ir file to compile.")
+    parser.add_argument(
+        "--input-file",
+        type=str,
+        help=".emb.ir file to compile, in either JSON or binary IR format.",
+    )
     parser.add_argument(
         "--output-file",
         type=str,
         help="Write header to file.  If not specified, write " + "header to stdout.",
     )
+    parser.add_argument(
+        "--debug-info-file",
+        type=str,
+        help="The debug info file written alongside a stripped IR by the front "
+        "end's --debug-info-file flag.  It is used to show source code and "
+        "locations in error messages.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="The number of processes to use to generate code for the types "
+        "of the module, or 0 to use one per CPU.",
+    )
     parser.add_argument(
         "--color-output",
         default="if_tty",
@@ -54,6 +75,13 @@ def _parse_command_line(argv):
         help="""Controls generation of EnumTraits by the C++
                               backend""",
     )
+    parser.add_argument(
+        "--cc-cache-field-locations",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="""Also generate Cached*View types, which cache the
+                              locations of dynamically placed fields""",
+    )
     return parser.parse_args(argv[1:])
 
 
@@ -61,47 +89,77 @@ def _show_errors(errors, ir, color_output):
     """Prints errors with source code snippets."""
     source_codes = {}
     for module in ir.module:
-        source_codes[module.source_file_name] = module.source_text
+        # source_text may have been left out of the IR by the front end.
+        if module.source_text:
+            source_codes[module.source_file_name] = module.source_text
     use_color = color_output == "always" or (
         color_output in ("auto", "if_tty") and os.isatty(sys.stderr.fileno())
     )
     print(error.format_errors(errors, source_codes, use_color), file=sys.stderr)
 
 
-def generate_headers_and_log_errors(ir, color_output, config: header_generator.Config):
+def generate_headers_and_log_errors(
+    ir, color_output, config: header_generator.Config, debug_info_file=None, jobs=1
+):
     """Generates a C++ header and logs any errors.
 
     Arguments:
       ir: EmbossIr of the module.
       color_output: "always", "never", "if_tty", "auto"
       config: Header generation configuration.
+      debug_info_file: The name of the debug info file for ir, if ir was
+        written without debug info.
+      jobs: The number of processes to use; see header_generator.generate_header.
 
     Returns:
-      A tuple of (header, errors)
+      A tuple of (header, errors), where header is a code_template.Rendering
+      (see header_generator.generate_header_chunks) or None.
     """
-    header, errors = header_generator.generate_header(ir, config)
+    header, errors = header_generator.generate_header_chunks(ir, config, jobs)
+    if errors and debug_info_file:
+        # Debug info is only needed for error messages, so it is only read when
+        # there are errors; the header is then generated again, so that the
+        # errors have source locations.
+        with open(debug_info_file) as f:
+            ir_debug_info.restore(ir, ir_debug_info.read(f))
+        header, errors = header_generator.generate_header_chunks(ir, config)
     if errors:
         _show_errors(errors, ir, color_output)
     return (header, errors)
 
 
+def read_ir(data):
+    """Deserializes an EmbossIr from JSON or binary IR bytes."""
+    if ir_binary.is_binary_ir(data):
+        return ir_binary.deserialize(ir_data.EmbossIr, data)
+    return ir_data_utils.IrDataSerializer.from_json(
+        ir_data.EmbossIr, data.decode("utf-8")
+    )
+
+
 def main(flags):
     if flags.input_file:
-        with open(flags.input_file) as f:
-            ir = ir_data_utils.IrDataSerializer.from_json(ir_data.EmbossIr, f.read())
+        with open(flags.input_file, "rb") as f:
+            ir = read_ir(f.read())
     else:
-        ir = ir_data_utils.IrDataSerializer.from_json(
-            ir_data.EmbossIr, sys.stdin.read()
-        )
-    config = header_generator.Config(include_enum_traits=flags.cc_enum_traits)
-    header, errors = generate_headers_and_log_errors(ir, flags.color_output, config)
+        ir = read_ir(sys.stdin.buffer.read())
+    config = header_generator.Config(
+        include_enum_traits=flags.cc_enum_traits,
+        cache_field_locations=flags.cc_cache_field_locations,
+    )
+    header, errors = generate_headers_and_log_errors(
+        ir, flags.color_output, config, flags.debug_info_file, flags.jobs
+    )
     if errors:
         return 1
+    # The header is written in pieces, so that it is never held in memory as
+    # one string.
     if flags.output_file:
         with open(flags.output_file, "w") as f:
-            f.write(header)
+            header.write_to(f.write)
     else:
-        print(header)
+        header.write_to(sys.stdout.write)
+        print()
     return 0
 
 
@@ -0,0 +1,91 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for emboss_codegen_cpp."""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from compiler.back_end.cpp import emboss_codegen_cpp
+from compiler.back_end.cpp import header_generator
+from compiler.front_end import glue
+from compiler.util import ir_binary
+from compiler.util import ir_debug_info
+from compiler.util import test_util
+
+
+def _make_ir_from_emb(emb_text, name="m.emb"):
+    ir, unused_debug_info, errors = glue.parse_emboss_file(
+        name, test_util.dict_file_reader({name: emb_text})
+    )
+    assert not errors
+    return ir
+
+
+class EmbossCodegenCppTest(unittest.TestCase):
+    """Tests for emboss_codegen_cpp with stripped IR."""
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.debug_info_file = os.path.join(self._directory.name, "m.emb.debug")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _strip(self, ir):
+        with open(self.debug_info_file, "w") as f:
+            ir_debug_info.write(ir_debug_info.extract(ir), f)
+        return emboss_codegen_cpp.read_ir(
+            ir_binary.serialize(ir, omit_fields=ir_debug_info.FIELDS)
+        )
+
+    def _generate(self, ir, debug_info_file):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            header, errors = emboss_codegen_cpp.generate_headers_and_log_errors(
+                ir, "never", header_generator.Config(), debug_info_file
+            )
+        return header and str(header), errors, stderr.getvalue()
+
+    def test_stripped_ir_generates_same_header(self):
+        emb = "struct Foo:\n  0 [+1]  UInt  x\n"
+        header, errors, _ = self._generate(_make_ir_from_emb(emb), None)
+        self.assertEqual([], errors)
+        stripped = self._strip(_make_ir_from_emb(emb))
+        self.assertEqual(
+            (header, [], ""), self._generate(stripped, self.debug_info_file)
+        )
+
+    def test_errors_use_debug_info(self):
+        emb = "[(cpp) namespace: 9]\n"
+        _, _, expected_stderr = self._generate(_make_ir_from_emb(emb), None)
+        self.assertIn("m.emb:1:19: error:", expected_stderr)
+        self.assertIn("[(cpp) namespace: 9]", expected_stderr)
+        stripped = self._strip(_make_ir_from_emb(emb))
+        _, errors, stderr = self._generate(stripped, self.debug_info_file)
+        self.assertTrue(errors)
+        self.assertEqual(expected_stderr, stderr)
+
+    def test_errors_without_debug_info(self):
+        stripped = self._strip(_make_ir_from_emb("[(cpp) namespace: 9]\n"))
+        _, errors, stderr = self._generate(stripped, None)
+        self.assertTrue(errors)
+        self.assertIn("must have a string value", stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,6 +19,8 @@ classes for the ir.
 """
 
 import collections
+import concurrent.futures
+import os
 import re
 from typing import NamedTuple
 
@@ -26,11 +28,13 @@ from compiler.back_end.cpp import attributes
 from compiler.back_end.util import code_template
 from compiler.util import attribute_util
 from compiler.util import error
+from compiler.util import fact_cache
 from compiler.util import ir_data
 from compiler.util import ir_data_utils
 from compiler.util import ir_util
 from compiler.util import name_conversion
 from compiler.util import resources
+from compiler.util import simple_memoizer
 from compiler.util import traverse_ir
 
 _TEMPLATES = code_template.parse_templates(
@@ -185,6 +189,25 @@ class Config(NamedTuple):
     include_enum_traits: bool = True
     """Whether or not to include EnumTraits in the generated header."""
 
+    cache_field_locations: bool = False
+    """Whether to generate location-caching Views of dynamically laid out structs.
+
+    When set, each `struct` where the location or existence of some field
+    depends on the contents of the `struct` gets a `GenericCached${name}View`
+    class template (with `Cached${name}View`, `Cached${name}Writer`, and
+    `MakeCached${name}View`) alongside its usual View, which is unchanged.  A
+    caching View computes the offset and size of each such field the first
+    time the field is used, and reuses them after that.
+
+    The cached locations are cleared when the caching View is assigned from
+    another View, copied into, or updated from text, but not when a field is
+    written through its own view: after writing a field which determines the
+    layout of the structure, make a new caching View to see the new layout.
+    The caches are updated from `const` methods, so unlike the usual Views, a
+    caching View must not be used from more than one thread at a time without
+    synchronization.
+    """
+
 
 def _get_namespace_components(namespace):
     """Gets the components of a C++ namespace.
@@ -312,6 +335,7 @@ def _maybe_type(wrapped_type):
     return "::emboss::support::Maybe</**/{}>".format(wrapped_type)
 
 
+@simple_memoizer.memoize(scope=simple_memoizer.COMPILATION)
 def _render_integer_for_expression(value):
     integer_type = _cpp_integer_type_for_range(value, value)
     return "{0}({1})".format(_maybe_type(integer_type), _render_integer(value))
@@ -319,16 +343,24 @@ def _render_integer_for_expression(value):
 
 def _wrap_in_namespace(body, namespace):
     """Returns the given body wrapped in the given namespace."""
+    return str(_wrap_chunks_in_namespace(body, namespace))
+
+
+def _wrap_chunks_in_namespace(body, namespace):
+    """Returns code_template.Chunks of body wrapped in the given namespace."""
     for component in reversed(namespace):
-        body = (
-            code_template.format_template(
-                _TEMPLATES.namespace_wrap, component=component, body=body
-            )
-            + "\n"
+        body = code_template.Chunks(
+            [
+                code_template.Rendering(
+                    _TEMPLATES.namespace_wrap, component=component, body=body
+                ),
+                "\n",
+            ]
         )
     return body
 
 
+@fact_cache.memoize
 def _get_type_size(type_ir, ir):
     size = ir_util.fixed_size_of_type_in_bits(type_ir, ir)
     assert (
@@ -551,6 +583,7 @@ def _get_cpp_view_type_for_physical_type(
         return reader, parameter_types, list(type_ir.atomic_type.runtime_parameter)
 
 
+@simple_memoizer.memoize(scope=simple_memoizer.COMPILATION)
 def _render_variable(variable, prefix=""):
     """Renders a variable reference (e.g., `foo` or `foo.bar.baz`) in C++ code."""
     # A "variable" could be an immediate field or a subcomponent of an immediate
@@ -570,24 +603,26 @@ def _render_enum_value(enum_type, ir):
     )
 
 
+_BUILTIN_FUNCTION_NAMES = {
+    ir_data.FunctionMapping.ADDITION: "Sum",
+    ir_data.FunctionMapping.SUBTRACTION: "Difference",
+    ir_data.FunctionMapping.MULTIPLICATION: "Product",
+    ir_data.FunctionMapping.EQUALITY: "Equal",
+    ir_data.FunctionMapping.INEQUALITY: "NotEqual",
+    ir_data.FunctionMapping.AND: "And",
+    ir_data.FunctionMapping.OR: "Or",
+    ir_data.FunctionMapping.LESS: "LessThan",
+    ir_data.FunctionMapping.LESS_OR_EQUAL: "LessThanOrEqual",
+    ir_data.FunctionMapping.GREATER: "GreaterThan",
+    ir_data.FunctionMapping.GREATER_OR_EQUAL: "GreaterThanOrEqual",
+    ir_data.FunctionMapping.CHOICE: "Choice",
+    ir_data.FunctionMapping.MAXIMUM: "Maximum",
+}
+
+
 def _builtin_function_name(function):
     """Returns the C++ operator name corresponding to an Emboss operator."""
-    functions = {
-        ir_data.FunctionMapping.ADDITION: "Sum",
-        ir_data.FunctionMapping.SUBTRACTION: "Difference",
-        ir_data.FunctionMapping.MULTIPLICATION: "Product",
-        ir_data.FunctionMapping.EQUALITY: "Equal",
-        ir_data.FunctionMapping.INEQUALITY: "NotEqual",
-        ir_data.FunctionMapping.AND: "And",
-        ir_data.FunctionMapping.OR: "Or",
-        ir_data.FunctionMapping.LESS: "LessThan",
-        ir_data.FunctionMapping.LESS_OR_EQUAL: "LessThanOrEqual",
-        ir_data.FunctionMapping.GREATER: "GreaterThan",
-        ir_data.FunctionMapping.GREATER_OR_EQUAL: "GreaterThanOrEqual",
-        ir_data.FunctionMapping.CHOICE: "Choice",
-        ir_data.FunctionMapping.MAXIMUM: "Maximum",
-    }
-    return functions[function]
+    return _BUILTIN_FUNCTION_NAMES[function]
 
 
 def _cpp_basic_type_for_expression_type(expression_type, ir):
@@ -612,6 +647,7 @@ def _cpp_basic_type_for_expression(expression, ir):
     return _cpp_basic_type_for_expression_type(expression.type, ir)
 
 
+@simple_memoizer.memoize(scope=simple_memoizer.COMPILATION)
 def _cpp_integer_type_for_range(min_val, max_val):
     """Returns the appropriate C++ integer type to hold min_val up to max_val."""
     # The choice of int32_t, uint32_t, int64_t, then uint64_t is somewhat
@@ -914,8 +950,26 @@ def _get_cpp_type_reader_of_field(
     )
 
 
+def _field_location_is_dynamic(field_ir):
+    """Returns True if field_ir is a physical field placed at run time.
+
+    A field is placed at run time if its offset, size, or existence depends on
+    the contents of its structure.
+    """
+    if ir_util.field_is_virtual(field_ir):
+        return False
+    return not all(
+        ir_util.is_constant_type(expression.type)
+        for expression in (
+            field_ir.location.start,
+            field_ir.location.size,
+            field_ir.existence_condition,
+        )
+    )
+
+
 def _generate_structure_field_methods(
-    enclosing_type_name, field_ir, ir, parent_addressable_unit
+    enclosing_type_name, field_ir, ir, parent_addressable_unit, cache_location=False
 ):
     if ir_util.field_is_virtual(field_ir):
         return _generate_structure_virtual_field_methods(
@@ -923,7 +977,11 @@ def _generate_structure_field_methods(
         )
     else:
         return _generate_structure_physical_field_methods(
-            enclosing_type_name, field_ir, ir, parent_addressable_unit
+            enclosing_type_name,
+            field_ir,
+            ir,
+            parent_addressable_unit,
+            cache_location,
         )
 
 
@@ -1108,7 +1166,7 @@ def _generate_validator_type_for(enclosing_type_name, field_ir, ir):
 
 
 def _generate_structure_physical_field_methods(
-    enclosing_type_name, field_ir, ir, parent_addressable_unit
+    enclosing_type_name, field_ir, ir, parent_addressable_unit, cache_location=False
 ):
     """Generates C++ code for methods for a single physical field.
 
@@ -1118,6 +1176,8 @@ def _generate_structure_physical_field_methods(
       ir: The full IR for the module.
       parent_addressable_unit: The addressable unit (BIT or BYTE) of the enclosing
           structure.
+      cache_location: If True, the View caches the offset and size of the field
+          the first time they are computed; see `Config.cache_field_locations`.
 
     Returns:
       A tuple of (declarations, definitions).  The declarations can be inserted
@@ -1155,6 +1215,14 @@ def _generate_structure_physical_field_methods(
         ]
     )
 
+    if cache_location:
+        # The location is computed in its own block, before the parameters.
+        subexpressions = _SubexpressionStore("emboss_reserved_local_subexpr_")
+        subexpression_indent = "      "
+        definition_template = _TEMPLATES.structure_cached_field_method_definitions
+    else:
+        subexpression_indent = "    "
+        definition_template = _TEMPLATES.structure_single_field_method_definitions
     first_size_and_offset_subexpr = len(subexpressions.subexprs())
     offset = _render_expression(
         field_ir.location.start, ir, subexpressions=subexpressions
@@ -1164,7 +1232,7 @@ def _generate_structure_physical_field_methods(
     ).rendered
     size_and_offset_subexpressions = "".join(
         [
-            "    const auto {} = {};\n".format(name, subexpr)
+            "{}const auto {} = {};\n".format(subexpression_indent, name, subexpr)
             for name, subexpr in subexpressions.subexprs()[
                 first_size_and_offset_subexpr:
             ]
@@ -1178,8 +1246,12 @@ def _generate_structure_physical_field_methods(
         visibility=_visibility_for_field(field_ir),
         name=field_name,
     )
+    if cache_location:
+        declaration += code_template.format_template(
+            _TEMPLATES.structure_cached_field_method_declarations, name=field_name
+        )
     definition = code_template.format_template(
-        _TEMPLATES.structure_single_field_method_definitions,
+        definition_template,
         parent_type=enclosing_type_name,
         name=field_name,
         type_reader=type_reader,
@@ -1217,10 +1289,12 @@ def _render_size_method(fields, ir):
     for field in fields:
         if field.name.name.text in ("$size_in_bits", "$size_in_bytes"):
             # If the read_transform and existence_condition are constant, then the
-            # size is constexpr.
-            if (
-                _render_expression(field.read_transform, ir).is_constant
-                and _render_expression(field.existence_condition, ir).is_constant
+            # size is constexpr.  The read_transform is rendered with the virtual
+            # field's methods; it is not rendered again just to find out whether
+            # it is constant.
+            if all(
+                ir_util.is_constant_type(expression.type)
+                for expression in (field.read_transform, field.existence_condition)
             ):
                 template = _TEMPLATES.constant_structure_size_method
             else:
@@ -1347,6 +1421,46 @@ def _generate_structure_definition(type_ir, ir, config: Config):
         _generate_subtype_definitions(type_ir, ir, config)
     )
     type_name = type_ir.name.name.text
+    forward_declarations, helper_types, class_bodies, method_definitions = (
+        _generate_structure_view(type_ir, ir, config, type_name)
+    )
+    forward_declarations = subtype_forward_declarations + forward_declarations
+    class_bodies = helper_types + subtype_bodies + class_bodies
+    method_definitions = subtype_method_definitions + method_definitions
+    if (
+        config.cache_field_locations
+        and type_ir.addressable_unit == ir_data.AddressableUnit.BYTE
+        and any(_field_location_is_dynamic(field) for field in type_ir.structure.field)
+    ):
+        # The caching View is a separate class template, so that plain Views
+        # and Writers behave exactly as they do without the option.
+        cached_view = _generate_structure_view(
+            type_ir, ir, config, "Cached" + type_name, cache_field_locations=True
+        )
+        forward_declarations += cached_view[0]
+        class_bodies += cached_view[1] + cached_view[2]
+        method_definitions += cached_view[3]
+    return forward_declarations, class_bodies, method_definitions
+
+
+def _generate_structure_view(
+    type_ir, ir, config: Config, type_name, cache_field_locations=False
+):
+    """Generates C++ for one View class template of an Emboss structure.
+
+    Arguments:
+      type_ir: The IR for the struct definition.
+      ir: The full IR; used for type lookups.
+      config: The code generation configuration to use.
+      type_name: The name of the View, without the "Generic" prefix or "View"
+        suffix.
+      cache_field_locations: If True, the View caches the locations of fields
+        which are placed at run time; see `Config.cache_field_locations`.
+
+    Returns:
+      A tuple of: (forward declarations, helper type definitions, class body,
+      method bodies).
+    """
     field_helper_type_definitions = []
     field_method_declarations = []
     field_method_definitions = []
@@ -1421,10 +1535,18 @@ def _generate_structure_definition(type_ir, ir, config: Config):
         initialize_parameters_initialized_true = ""
         parameter_checks = [""]
 
+    cached_location_flags = []
     for field_index in type_ir.structure.fields_in_dependency_order:
         field = type_ir.structure.field[field_index]
+        cache_location = cache_field_locations and _field_location_is_dynamic(field)
+        if cache_location:
+            cached_location_flags.append(
+                "    emboss_reserved_{}_is_cached_ = false;".format(
+                    field.name.canonical_name.object_path[-1]
+                )
+            )
         helper_types, declaration, definition = _generate_structure_field_methods(
-            type_name, field, ir, type_ir.addressable_unit
+            type_name, field, ir, type_ir.addressable_unit, cache_location
         )
         field_helper_type_definitions.append(helper_types)
         field_method_definitions.append(definition)
@@ -1481,11 +1603,24 @@ def _generate_structure_definition(type_ir, ir, config: Config):
     else:
         requires_check = ""
 
+    if cached_location_flags:
+        field_method_declarations.append(
+            code_template.format_template(
+                _TEMPLATES.structure_clear_cached_locations_method,
+                clear_flags="\n".join(cached_location_flags),
+            )
+        )
+        clear_cached_locations = "\n    EmbossReservedClearCachedLocations();"
+    else:
+        clear_cached_locations = ""
+
     if config.include_enum_traits:
         text_stream_methods = code_template.format_template(
             _TEMPLATES.struct_text_stream,
             decode_fields="\n".join(decode_field_clauses),
             write_fields="\n".join(write_field_clauses),
+            # Decoding a field may move the fields after it.
+            clear_cached_locations=clear_cached_locations.replace("\n", "\n  "),
         )
     else:
         text_stream_methods = ""
@@ -1495,7 +1630,7 @@ def _generate_structure_definition(type_ir, ir, config: Config):
     )
     class_bodies = code_template.format_template(
         _TEMPLATES.structure_view_class,
-        name=type_ir.name.canonical_name.object_path[-1],
+        name=type_name,
         size_method=_render_size_method(type_ir.structure.field, ir),
         field_method_declarations="".join(field_method_declarations),
         field_ok_checks="\n".join(ok_method_clauses),
@@ -1512,17 +1647,17 @@ def _generate_structure_definition(type_ir, ir, config: Config):
         parameter_copy_initializers="\n".join(parameter_copy_initializers),
         parameters_initialized_flag=parameters_initialized_flag,
         initialize_parameters_initialized_true=(initialize_parameters_initialized_true),
+        clear_cached_locations=clear_cached_locations,
         units=units,
     )
     method_definitions = "\n".join(field_method_definitions)
     early_virtual_field_types = "\n".join(virtual_field_type_definitions)
     all_field_helper_type_definitions = "\n".join(field_helper_type_definitions)
     return (
-        early_virtual_field_types
-        + subtype_forward_declarations
-        + class_forward_declarations,
-        all_field_helper_type_definitions + subtype_bodies + class_bodies,
-        subtype_method_definitions + method_definitions,
+        early_virtual_field_types + class_forward_declarations,
+        all_field_helper_type_definitions,
+        class_bodies,
+        method_definitions,
     )
 
 
@@ -1921,11 +2056,65 @@ def _propagate_defaults_and_verify_attributes(ir):
     return []
 
 
-def generate_header(ir, config=Config()):
+# The IR and Config of a worker process started by generate_header.
+_worker_ir = None
+_worker_config = None
+
+
+def _init_worker(ir, config):
+    global _worker_ir, _worker_config
+    _worker_ir = ir
+    _worker_config = config
+
+
+def _generate_type_definitions(ir, config, type_indexes):
+    """Returns _generate_type_definition(...) for some top-level types of ir."""
+    types = ir.module[0].type
+    # Code generation does not modify the IR, so derived facts (such as type
+    # sizes) can be memoized.
+    with fact_cache.scope(ir):
+        return [_generate_type_definition(types[i], ir, config) for i in type_indexes]
+
+
+def _generate_type_definitions_in_worker(type_indexes):
+    return _generate_type_definitions(_worker_ir, _worker_config, type_indexes)
+
+
+def _generate_type_definitions_in_parallel(ir, config, jobs):
+    """Returns _generate_type_definition(...) for each top-level type of ir.
+
+    The types are split into contiguous chunks, which are generated by a pool
+    of jobs worker processes.  The IR is sent to each worker once.
+    """
+    type_count = len(ir.module[0].type)
+    # Several chunks per worker balance the load when some types are much
+    # larger than others.
+    chunk_size = -(-type_count // (jobs * 4))
+    chunks = [
+        range(start, min(start + chunk_size, type_count))
+        for start in range(0, type_count, chunk_size)
+    ]
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(ir, config)
+    ) as executor:
+        return [
+            result
+            for chunk_results in executor.map(
+                _generate_type_definitions_in_worker, chunks
+            )
+            for result in chunk_results
+        ]
+
+
+def generate_header(ir, config=Config(), jobs=1):
     """Generates a C++ header from an Emboss module.
 
     Arguments:
       ir: An EmbossIr of the module.
+      config: Header generation configuration.
+      jobs: The number of processes to use to generate the code for the
+        module's top-level types, or 0 to use one per CPU.  The header is the
+        same for any number of jobs.
 
     Returns:
       A tuple of (header, errors), where `header` is either a string containing
@@ -1933,29 +2122,60 @@ def generate_header(ir, config=Config()):
       module, or None, and `errors` is a possibly-empty list of error messages to
       display to the user.
     """
+    header, errors = generate_header_chunks(ir, config, jobs)
+    if errors:
+        return None, errors
+    return str(header), []
+
+
+def generate_header_chunks(ir, config=Config(), jobs=1):
+    """Generates a C++ header from an Emboss module, as unjoined chunks.
+
+    generate_header_chunks is like generate_header, except that the header is
+    returned as a code_template.Rendering, whose pieces (the code for each
+    type, and the text around them) have not yet been joined together.  It can
+    be written to a stream with `header.write_to(stream.write)`, without
+    building the whole header as one string; `str(header)` is the same as the
+    header returned by generate_header.
+
+    Arguments:
+      ir: An EmbossIr of the module.
+      config: Header generation configuration.
+      jobs: The number of processes to use; see generate_header.
+
+    Returns:
+      A tuple of (header, errors), where `header` is a code_template.Rendering
+      or None, and `errors` is a possibly-empty list of error messages to
+      display to the user.
+    """
     errors = _propagate_defaults_and_verify_attributes(ir)
     if errors:
         return None, errors
+    jobs = jobs or os.cpu_count() or 1
+    type_count = len(ir.module[0].type)
+    if jobs > 1 and type_count > 1:
+        generated_types = _generate_type_definitions_in_parallel(
+            ir, config, min(jobs, type_count)
+        )
+    else:
+        generated_types = _generate_type_definitions(ir, config, range(type_count))
     type_declarations = []
     type_definitions = []
     method_definitions = []
-    for type_definition in ir.module[0].type:
-        declaration, definition, methods = _generate_type_definition(
-            type_definition, ir, config
-        )
+    for declaration, definition, methods in generated_types:
         type_declarations.append(declaration)
         type_definitions.append(definition)
         method_definitions.append(methods)
-    body = code_template.format_template(
+    body = code_template.Rendering(
         _TEMPLATES.body,
-        type_declarations="".join(type_declarations),
-        type_definitions="".join(type_definitions),
-        method_definitions="".join(method_definitions),
+        type_declarations=code_template.Chunks(type_declarations),
+        type_definitions=code_template.Chunks(type_definitions),
+        method_definitions=code_template.Chunks(method_definitions),
     )
-    body = _wrap_in_namespace(body, _get_module_namespace(ir.module[0]))
+    body = _wrap_chunks_in_namespace(body, _get_module_namespace(ir.module[0]))
     includes = _get_includes(ir.module[0], config)
     return (
-        code_template.format_template(
+        code_template.Rendering(
             _TEMPLATES.outline,
             includes=includes,
             body=body,
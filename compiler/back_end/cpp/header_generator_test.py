@@ -14,6 +14,7 @@
 
 """Tests for attribute_checker.py."""
 
+import io
 import unittest
 from compiler.back_end.cpp import header_generator
 from compiler.front_end import glue
@@ -33,6 +34,84 @@ def _make_ir_from_emb(emb_text, name="m.emb"):
 
 class NormalizeIrTest(unittest.TestCase):
 
+    def test_parallel_generation_matches_serial(self):
+        ir = _make_ir_from_emb(
+            "enum Color:\n"
+            "  RED = 1\n"
+            "  GREEN = 2\n"
+            "struct Pixel:\n"
+            "  0 [+1]  Color  color\n"
+            "  1 [+1]  UInt  brightness\n"
+            "struct Image:\n"
+            "  0 [+1]  UInt  width\n"
+            "  1 [+1]  UInt  height\n"
+            "  2 [+width*height]  Pixel[]  pixels\n"
+            "bits Flags:\n"
+            "  0 [+1]  Flag  enabled\n"
+            "  1 [+7]  UInt  reserved\n"
+            "struct Packet:\n"
+            "  0 [+1]  Flags  flags\n"
+            "  1 [+1]  bits:\n"
+            "    0 [+8]  UInt  anonymous\n"
+        )
+        header, errors = header_generator.generate_header(ir)
+        self.assertEqual([], errors)
+        self.assertEqual((header, []), header_generator.generate_header(ir, jobs=2))
+        self.assertEqual((header, []), header_generator.generate_header(ir, jobs=10))
+
+    def test_header_chunks_match_header(self):
+        ir = _make_ir_from_emb(
+            '[(cpp) namespace: "foo::bar"]\n'
+            "struct Foo:\n"
+            "  0 [+1]  UInt  x\n"
+            "enum Bar:\n"
+            "  BAZ = 1\n"
+        )
+        header, errors = header_generator.generate_header(ir)
+        self.assertEqual([], errors)
+        chunks, errors = header_generator.generate_header_chunks(ir)
+        self.assertEqual([], errors)
+        self.assertEqual(header, str(chunks))
+        written = io.StringIO()
+        chunks.write_to(written.write)
+        self.assertEqual(header, written.getvalue())
+
+    def test_header_chunks_errors(self):
+        ir = _make_ir_from_emb("[(cpp) namespace: 9]\n")
+        header, errors = header_generator.generate_header_chunks(ir)
+        self.assertIsNone(header)
+        self.assertTrue(errors)
+
+    def test_cache_field_locations(self):
+        ir = _make_ir_from_emb(
+            "struct Fixed:\n"
+            "  0 [+1]  UInt  x\n"
+            "struct Dynamic:\n"
+            "  0 [+1]  UInt  length\n"
+            "  1 [+length]  UInt:8[]  data\n"
+        )
+        header, errors = header_generator.generate_header(ir)
+        self.assertEqual([], errors)
+        self.assertNotIn("Cached", header)
+        cached_header, errors = header_generator.generate_header(
+            ir, header_generator.Config(cache_field_locations=True)
+        )
+        self.assertEqual([], errors)
+        # Only structures with dynamically placed fields get a caching View.
+        self.assertIn("class GenericCachedDynamicView final", cached_header)
+        self.assertIn("using CachedDynamicWriter", cached_header)
+        self.assertIn("MakeCachedDynamicView(", cached_header)
+        self.assertNotIn("GenericCachedFixedView", cached_header)
+        self.assertIn("emboss_reserved_data_is_cached_", cached_header)
+        self.assertNotIn("emboss_reserved_length_is_cached_", cached_header)
+
+        # The usual View is unchanged.
+        def view_class(text):
+            start = text.index("class GenericDynamicView final")
+            return text[start : text.index("using DynamicView", start)]
+
+        self.assertEqual(view_class(header), view_class(cached_header))
+
     def test_accepts_string_attribute(self):
         ir = _make_ir_from_emb('[(cpp) namespace: "foo"]\n')
         self.assertEqual([], header_generator.generate_header(ir)[1])
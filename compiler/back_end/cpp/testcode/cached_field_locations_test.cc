@@ -0,0 +1,134 @@
+// Copyright 2024 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+// Tests for the Cached*View types generated with cache_field_locations = True.
+
+#include <stdint.h>
+
+#include <array>
+#include <vector>
+
+#include "gtest/gtest.h"
+#include "testdata/cached_field_locations.emb.h"
+
+namespace emboss {
+namespace test {
+namespace {
+
+alignas(8) static const ::std::uint8_t kRecord[8] = {
+    0x02,              // 0:1  name_length == 2
+    0x61, 0x62,        // 1:3  name == "ab"
+    0x03,              // 3:4  payload_length == 3
+    0x01, 0x02, 0x03,  // 4:7  payload
+    0x06,              // 7:8  checksum
+};
+
+alignas(8) static const ::std::uint8_t kShortRecord[6] = {
+    0x01,        // 0:1  name_length == 1
+    0x7a,        // 1:2  name == "z"
+    0x02,        // 2:3  payload_length == 2
+    0x09, 0x08,  // 3:5  payload
+    0x11,        // 5:6  checksum
+};
+
+TEST(CachedFieldLocations, ReadsFields) {
+  auto view = CachedRecordView(kRecord, sizeof kRecord);
+  EXPECT_TRUE(view.Ok());
+  EXPECT_EQ(8U, view.SizeInBytes());
+  // Reading each field twice exercises both the uncached and cached paths.
+  for (int i = 0; i < 2; ++i) {
+    EXPECT_EQ(2U, view.name().ElementCount());
+    EXPECT_EQ(0x62U, view.name()[1].Read());
+    EXPECT_EQ(3U, view.payload_length().Read());
+    EXPECT_EQ(3U, view.payload().ElementCount());
+    EXPECT_EQ(0x03U, view.payload()[2].Read());
+    EXPECT_TRUE(view.has_checksum().Value());
+    EXPECT_EQ(0x06U, view.checksum().Read());
+  }
+}
+
+TEST(CachedFieldLocations, CopiedViewReadsFields) {
+  const auto view = CachedRecordView(kRecord, sizeof kRecord);
+  EXPECT_EQ(0x06U, view.checksum().Read());
+  const auto copy = view;
+  EXPECT_EQ(0x06U, copy.checksum().Read());
+  EXPECT_EQ(0x01U, copy.payload()[0].Read());
+}
+
+TEST(CachedFieldLocations, AssignmentFromNewBufferClearsCache) {
+  auto view = CachedRecordView(kRecord, sizeof kRecord);
+  EXPECT_EQ(0x06U, view.checksum().Read());
+  view = CachedRecordView(kShortRecord, sizeof kShortRecord);
+  EXPECT_EQ(0x11U, view.checksum().Read());
+  EXPECT_EQ(0x08U, view.payload()[1].Read());
+
+  ::std::vector</**/ ::std::uint8_t> buffer(kRecord, kRecord + sizeof kRecord);
+  auto writer = CachedRecordWriter(&buffer);
+  view = writer;
+  EXPECT_EQ(0x06U, view.checksum().Read());
+  EXPECT_EQ(0x62U, view.name()[1].Read());
+}
+
+TEST(CachedFieldLocations, CopyFromClearsCache) {
+  ::std::vector</**/ ::std::uint8_t> buffer(kRecord, kRecord + sizeof kRecord);
+  auto writer = CachedRecordWriter(&buffer);
+  EXPECT_EQ(0x06U, writer.checksum().Read());
+  writer.CopyFrom(CachedRecordView(kShortRecord, sizeof kShortRecord));
+  EXPECT_EQ(0x11U, writer.checksum().Read());
+  EXPECT_EQ(0x09U, writer.payload()[0].Read());
+  EXPECT_TRUE(writer.TryToCopyFrom(CachedRecordView(kRecord, sizeof kRecord)));
+  EXPECT_EQ(0x06U, writer.checksum().Read());
+}
+
+TEST(CachedFieldLocations, UpdateFromTextClearsCache) {
+  ::std::vector</**/ ::std::uint8_t> buffer(kRecord, kRecord + sizeof kRecord);
+  auto writer = CachedRecordWriter(&buffer);
+  EXPECT_EQ(0x06U, writer.checksum().Read());
+  EXPECT_TRUE(::emboss::UpdateFromText(
+      writer,
+      "{ name_length: 1, name: { 0x7a }, payload_length: 2, "
+      "payload: { 9, 8 }, checksum: 0x11 }"));
+  EXPECT_EQ(::std::vector</**/ ::std::uint8_t>(
+                kShortRecord, kShortRecord + sizeof kShortRecord),
+            ::std::vector</**/ ::std::uint8_t>(
+                buffer.begin(), buffer.begin() + sizeof kShortRecord));
+  EXPECT_EQ(0x11U, writer.checksum().Read());
+}
+
+TEST(CachedFieldLocations, WritesThroughFieldsNeedANewView) {
+  ::std::vector</**/ ::std::uint8_t> buffer(kRecord, kRecord + sizeof kRecord);
+  auto writer = CachedRecordWriter(&buffer);
+  EXPECT_TRUE(writer.has_checksum().Value());
+  writer.payload_length().Write(0);
+  // A View made after the write sees the new layout.
+  auto new_writer = CachedRecordWriter(&buffer);
+  EXPECT_FALSE(new_writer.has_checksum().Value());
+  EXPECT_EQ(0U, new_writer.payload().ElementCount());
+  EXPECT_EQ(4U, new_writer.SizeInBytes());
+}
+
+TEST(CachedFieldLocations, UsualWriterDoesNotCache) {
+  ::std::vector</**/ ::std::uint8_t> buffer(kRecord, kRecord + sizeof kRecord);
+  auto writer = RecordWriter(&buffer);
+  EXPECT_TRUE(writer.Ok());
+  writer.payload_length().Write(1);
+  writer.payload()[0].Write(0x0a);
+  writer.checksum().Write(0x0b);
+  EXPECT_EQ(0x0aU, buffer[4]);
+  EXPECT_EQ(0x0bU, buffer[5]);
+}
+
+}  // namespace
+}  // namespace test
+}  // namespace emboss
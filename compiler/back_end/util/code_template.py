@@ -22,6 +22,123 @@ import re
 import string
 
 
+class CompiledTemplate(string.Template):
+    """A string.Template which is compiled to Python functions when created.
+
+    string.Template.substitute scans its template with a regex every time it
+    is called.  A CompiledTemplate finds its substitutions once, and generates
+    a function which joins its literal text and the substituted values, and
+    another which writes them to a stream.  `render` gives exactly the same
+    result as `substitute`, including raising KeyError for a missing value.
+    """
+
+    def __init__(self, template):
+        super().__init__(template)
+        # Python expressions for the literal text and values of the template,
+        # in order.
+        pieces = []
+        position = 0
+        for match in self.pattern.finditer(template):
+            if match.group("invalid") is not None:
+                # substitute() reports invalid placeholders, so the template is
+                # left uncompiled.
+                self._render = self._write_to = None
+                return
+            pieces.append(repr(template[position : match.start()]))
+            if match.group("escaped") is not None:
+                pieces.append(repr(self.delimiter))
+            else:
+                name = match.group("named") or match.group("braced")
+                pieces.append("values[{!r}]".format(name))
+            position = match.end()
+        pieces.append(repr(template[position:]))
+        pieces = [piece for piece in pieces if piece != "''"]
+        source = [
+            "def render(values):",
+            "    return ''.join(({},))".format(
+                ", ".join(
+                    "str({})".format(piece) if piece.startswith("values") else piece
+                    for piece in pieces
+                )
+                or "''"
+            ),
+            "def write_to(write, values):",
+        ]
+        for piece in pieces:
+            if piece.startswith("values"):
+                source.append("    _write_value(write, {})".format(piece))
+            else:
+                source.append("    write({})".format(piece))
+        source.append("    pass")
+        namespace = {"_write_value": _write_value}
+        exec(compile("\n".join(source), "<code_template>", "exec"), namespace)
+        self._render = namespace["render"]
+        self._write_to = namespace["write_to"]
+
+    def render(self, values):
+        """Returns self.substitute(values)."""
+        if self._render is None:
+            return self.substitute(values)
+        return self._render(values)
+
+    def write_to(self, write, values):
+        """Calls write with the pieces of self.render(values), in order.
+
+        Values which are Chunks or Renderings are written piece by piece,
+        instead of being converted to strings first.
+        """
+        if self._write_to is None:
+            write(self.substitute(values))
+        else:
+            self._write_to(write, values)
+
+
+class Chunks(list):
+    """A list of strings, Chunks, and Renderings, to be written in order.
+
+    Chunks may be used as template values, in place of the string they would
+    be joined into; `write_template` writes them out without joining them.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return "".join([str(chunk) for chunk in self])
+
+    def write_to(self, write):
+        for chunk in self:
+            _write_value(write, chunk)
+
+
+class Rendering(object):
+    """A template and its values, which are rendered when needed.
+
+    A Rendering may be used as a template value, in place of the string that
+    `format_template(template, **kwargs)` would return.
+    """
+
+    __slots__ = ("template", "values")
+
+    def __init__(self, template, **kwargs):
+        self.template = template
+        self.values = kwargs
+
+    def __str__(self):
+        return format_template(self.template, **self.values)
+
+    def write_to(self, write):
+        write_template(write, self.template, **self.values)
+
+
+def _write_value(write, value):
+    if type(value) is str:
+        write(value)
+    elif isinstance(value, (Chunks, Rendering)):
+        value.write_to(write)
+    else:
+        write(str(value))
+
+
 def format_template(template, **kwargs):
     """format_template acts like str.format, but uses ${name} instead of {name}.
 
@@ -40,9 +157,31 @@ def format_template(template, **kwargs):
     Returns:
       A formatted string.
     """
+    if type(template) is CompiledTemplate:
+        return template.render(kwargs)
     return template.substitute(**kwargs)
 
 
+def write_template(write, template, **kwargs):
+    """Writes `format_template(template, **kwargs)` in pieces.
+
+    write_template calls write with successive pieces of the formatted
+    template, so that large templates can be written to a stream without ever
+    being built as one string.  Values which are Chunks or Renderings are
+    written piece by piece, rather than being converted to strings first.
+
+    Arguments:
+      write: A function which takes a string, such as the write method of a
+          text stream.
+      template: A template to format.
+      **kwargs: The values of the template's substitutions.
+    """
+    if type(template) is CompiledTemplate:
+        template.write_to(write, kwargs)
+    else:
+        write(template.substitute(**kwargs))
+
+
 def parse_templates(text):
     """Parses text into a namedtuple of templates.
 
@@ -80,7 +219,8 @@ def parse_templates(text):
       text: The text to parse into templates.
 
     Returns:
-      A namedtuple object whose attributes are the templates from text.
+      A namedtuple object whose attributes are the templates (as
+      CompiledTemplates) from text.
     """
     delimiter_re = re.compile(r"^\W*\*\* ([A-Za-z][A-Za-z0-9_]*) \*\*\W*$")
     comment_re = re.compile(r"^\s*//.*$")
@@ -89,7 +229,7 @@ def parse_templates(text):
     template = []
 
     def finish_template(template):
-        return string.Template("\n".join(template))
+        return CompiledTemplate("\n".join(template))
 
     for line in text.splitlines():
         if delimiter_re.match(line):
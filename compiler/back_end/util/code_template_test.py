@@ -51,6 +51,83 @@ class FormatTest(unittest.TestCase):
         )
 
 
+class CompiledTemplateTest(unittest.TestCase):
+    """Tests for code_template.CompiledTemplate."""
+
+    def assertRendersLikeTemplate(
+        self, template, **kwargs
+    ):  # pylint:disable=invalid-name
+        self.assertEqual(
+            string.Template(template).substitute(**kwargs),
+            code_template.format_template(
+                code_template.CompiledTemplate(template), **kwargs
+            ),
+        )
+
+    def test_matches_string_template(self):
+        self.assertRendersLikeTemplate("")
+        self.assertRendersLikeTemplate("foo")
+        self.assertRendersLikeTemplate("${bar}", bar="foo")
+        self.assertRendersLikeTemplate("$bar.baz", bar="foo")
+        self.assertRendersLikeTemplate("a $$bar $${baz} $$$bar", bar="foo")
+        self.assertRendersLikeTemplate("${bar}${bar}'\"\\\n", bar=1, unused=2)
+        self.assertRendersLikeTemplate("$_under_score1 ${X}", _under_score1=[], X=None)
+
+    def test_missing_value(self):
+        template = code_template.CompiledTemplate("a ${bar} ${baz}")
+        with self.assertRaisesRegex(KeyError, "baz"):
+            code_template.format_template(template, bar="foo")
+
+    def test_invalid_placeholder(self):
+        template = code_template.CompiledTemplate("a ${bar:.6f}")
+        self.assertRaises(ValueError, code_template.format_template, template, bar=1.0)
+
+    def test_is_string_template(self):
+        template = code_template.CompiledTemplate("a ${bar}")
+        self.assertEqual("a ${bar}", template.template)
+        self.assertEqual("a b", template.substitute(bar="b"))
+        self.assertEqual("a b", template.render({"bar": "b"}))
+
+
+class WriteTemplateTest(unittest.TestCase):
+    """Tests for code_template.write_template and its value types."""
+
+    def _write(self, template, **kwargs):
+        chunks = []
+        code_template.write_template(chunks.append, template, **kwargs)
+        return "".join(chunks)
+
+    def test_matches_format_template(self):
+        for template in (
+            code_template.CompiledTemplate("a ${bar} $$ $baz"),
+            string.Template("a ${bar} $$ $baz"),
+        ):
+            self.assertEqual(
+                code_template.format_template(template, bar="b", baz=3),
+                self._write(template, bar="b", baz=3),
+            )
+
+    def test_chunks(self):
+        chunks = code_template.Chunks(["a", 1, code_template.Chunks(["b", "c"])])
+        self.assertEqual("a1bc", str(chunks))
+        self.assertEqual(
+            "<a1bc>", self._write(code_template.CompiledTemplate("<$x>"), x=chunks)
+        )
+
+    def test_rendering(self):
+        template = code_template.CompiledTemplate("<${x}>")
+        inner = code_template.Rendering(template, x=code_template.Chunks(["a", "b"]))
+        outer = code_template.Rendering(template, x=inner)
+        self.assertEqual("<<ab>>", str(outer))
+        written = []
+        outer.write_to(written.append)
+        self.assertEqual(["<", "<", "a", "b", ">", ">"], written)
+
+    def test_missing_value(self):
+        with self.assertRaisesRegex(KeyError, "baz"):
+            self._write(code_template.CompiledTemplate("a ${bar} ${baz}"), bar="b")
+
+
 class ParseTemplatesTest(unittest.TestCase):
     """Tests for code_template.parse_templates."""
 
@@ -92,6 +169,13 @@ class ParseTemplatesTest(unittest.TestCase):
             code_template.parse_templates("** foo **\nbar\n** baz **\nqux"),
         )
 
+    def test_returns_compiled_templates(self):
+        templates = code_template.parse_templates("** foo **\nbar ${baz}")
+        self.assertIsInstance(templates.foo, code_template.CompiledTemplate)
+        self.assertEqual(
+            "bar qux", code_template.format_template(templates.foo, baz="qux")
+        )
+
     def test_returns_object_with_attributes(self):
         self.assertEqual(
             "bar",
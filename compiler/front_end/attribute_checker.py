@@ -24,6 +24,7 @@ from compiler.front_end import attributes
 from compiler.front_end import type_check
 from compiler.util import attribute_util
 from compiler.util import error
+from compiler.util import fact_cache
 from compiler.util import ir_data
 from compiler.util import ir_data_utils
 from compiler.util import ir_util
@@ -587,38 +588,27 @@ def _verify_back_end_attributes(
 
 def _verify_attributes_on_ir(ir):
     """Verifies attributes in a complete IR."""
-    errors = []
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Attribute],
-        _verify_back_end_attributes,
-        incidental_actions={
-            ir_data.Module: _gather_expected_back_ends,
-        },
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Structure],
-        _verify_size_attributes_on_structure,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Enum],
-        _verify_width_attribute_on_enum,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.External],
-        _verify_addressable_unit_attribute_on_external,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir, [ir_data.Field], _verify_field_attributes, parameters={"errors": errors}
-    )
-    return errors
+    with fact_cache.scope(ir):
+        return traverse_ir.fast_traverse_ir_top_down_collecting_errors(
+            ir,
+            [
+                traverse_ir.Visitor(
+                    [ir_data.Attribute],
+                    _verify_back_end_attributes,
+                    incidental_actions={
+                        ir_data.Module: _gather_expected_back_ends,
+                    },
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.Structure], _verify_size_attributes_on_structure
+                ),
+                traverse_ir.Visitor([ir_data.Enum], _verify_width_attribute_on_enum),
+                traverse_ir.Visitor(
+                    [ir_data.External], _verify_addressable_unit_attribute_on_external
+                ),
+                traverse_ir.Visitor([ir_data.Field], _verify_field_attributes),
+            ],
+        )
 
 
 def normalize_and_verify(ir):
@@ -12,12 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Tests that compiler/front_end/generated/cached_parser.py is up to date."""
+"""Tests that compiler/front_end/generated/cached_parser.* are up to date."""
 
 import pkgutil
 import unittest
 
 from compiler.front_end import generate_cached_parser
+from compiler.util import resources
 
 
 class CachedParserIsUpToDateTest(unittest.TestCase):
@@ -34,6 +35,17 @@ class CachedParserIsUpToDateTest(unittest.TestCase):
             msg="Run\n\nbazel run //compiler/front_end:generate_cached_parser > compiler/front_end/generated/cached_parser.py",
         )
 
+    def test_cached_parser_tables(self):
+        cached_parser_tables = resources.load_binary(
+            "compiler.front_end.generated", "cached_parser.bin"
+        )
+        correct_parser_tables = generate_cached_parser.generate_parser_tables()
+        self.assertEqual(
+            cached_parser_tables,
+            correct_parser_tables,
+            msg="Run\n\nbazel run //compiler/front_end:generate_cached_parser -- --format=binary > compiler/front_end/generated/cached_parser.bin",
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
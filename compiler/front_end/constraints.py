@@ -16,6 +16,7 @@
 
 from compiler.front_end import attributes
 from compiler.util import error
+from compiler.util import fact_cache
 from compiler.util import ir_data
 from compiler.util import ir_data_utils
 from compiler.util import ir_util
@@ -744,84 +745,58 @@ def check_constraints(ir):
     Returns:
       A list of ConstraintViolations, or an empty list if there are none.
     """
-    errors = []
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Structure, ir_data.Type],
-        _check_allowed_in_bits,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        # TODO(bolms): look for [ir_data.ArrayType], [ir_data.AtomicType], and
-        # simplify _check_that_array_base_types_are_fixed_size.
-        ir,
-        [ir_data.ArrayType],
-        _check_that_array_base_types_are_fixed_size,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Structure, ir_data.ArrayType],
-        _check_that_array_base_types_in_structs_are_multiples_of_bytes,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.ArrayType, ir_data.ArrayType],
-        _check_that_inner_array_dimensions_are_constant,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir, [ir_data.Structure], _check_size_of_bits, parameters={"errors": errors}
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Structure, ir_data.Type],
-        _check_type_requirements_for_field,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Field],
-        _check_field_name_for_reserved_words,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.EnumValue],
-        _check_enum_name_for_reserved_words,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.TypeDefinition],
-        _check_type_name_for_reserved_words,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Expression],
-        _check_constancy_of_constant_references,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Enum],
-        _check_that_enum_values_are_representable,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Expression],
-        _check_bounds_on_runtime_integer_expressions,
-        incidental_actions={ir_data.Attribute: _attribute_in_attribute_action},
-        skip_descendants_of={ir_data.EnumValue, ir_data.Expression},
-        parameters={"errors": errors, "in_attribute": None},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.RuntimeParameter],
-        _check_type_requirements_for_parameter_type,
-        parameters={"errors": errors},
-    )
-    return errors
+    with fact_cache.scope(ir):
+        return traverse_ir.fast_traverse_ir_top_down_collecting_errors(
+            ir,
+            [
+                traverse_ir.Visitor(
+                    [ir_data.Structure, ir_data.Type], _check_allowed_in_bits
+                ),
+                # TODO(bolms): look for [ir_data.ArrayType], [ir_data.AtomicType], and
+                # simplify _check_that_array_base_types_are_fixed_size.
+                traverse_ir.Visitor(
+                    [ir_data.ArrayType], _check_that_array_base_types_are_fixed_size
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.Structure, ir_data.ArrayType],
+                    _check_that_array_base_types_in_structs_are_multiples_of_bytes,
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.ArrayType, ir_data.ArrayType],
+                    _check_that_inner_array_dimensions_are_constant,
+                ),
+                traverse_ir.Visitor([ir_data.Structure], _check_size_of_bits),
+                traverse_ir.Visitor(
+                    [ir_data.Structure, ir_data.Type],
+                    _check_type_requirements_for_field,
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.Field], _check_field_name_for_reserved_words
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.EnumValue], _check_enum_name_for_reserved_words
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.TypeDefinition], _check_type_name_for_reserved_words
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.Expression], _check_constancy_of_constant_references
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.Enum], _check_that_enum_values_are_representable
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.Expression],
+                    _check_bounds_on_runtime_integer_expressions,
+                    incidental_actions={
+                        ir_data.Attribute: _attribute_in_attribute_action
+                    },
+                    skip_descendants_of={ir_data.EnumValue, ir_data.Expression},
+                    parameters={"in_attribute": None},
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.RuntimeParameter],
+                    _check_type_requirements_for_parameter_type,
+                ),
+            ],
+        )
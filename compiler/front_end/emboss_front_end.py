@@ -18,20 +18,33 @@ This is an internal tool, normally called by the "embossc" driver, rather than
 directly by a user.  It parses a .emb file and its dependencies, and prints an
 intermediate representation of the parse trees and symbol tables to stdout, or
 prints various bits of debug info, depending on which flags are passed.
+
+When given several input files (or an --input-manifest), it compiles all of
+them in a single session, so that the parser, the prelude, and any modules
+imported by more than one input are only loaded once, and writes one IR file per
+input to --output-dir.
 """
 
 from __future__ import print_function
 
 import argparse
+import collections
+import concurrent.futures
+import contextlib
+import io
 import os
 from os import path
 import sys
 
 from compiler.front_end import glue
+from compiler.front_end import module_cache
 from compiler.front_end import module_ir
 from compiler.front_end import parser
 from compiler.util import error
+from compiler.util import ir_binary
 from compiler.util import ir_data_utils
+from compiler.util import ir_debug_info
+from compiler.util import profiling
 
 
 def _parse_command_line(argv):
@@ -39,7 +52,14 @@ def _parse_command_line(argv):
     parser = argparse.ArgumentParser(
         description="Emboss compiler front end.", prog=argv[0]
     )
-    parser.add_argument("input_file", type=str, nargs=1, help=".emb file to compile.")
+    parser.add_argument(
+        "input_file", type=str, nargs="*", help=".emb file(s) to compile."
+    )
+    parser.add_argument(
+        "--input-manifest",
+        type=str,
+        help="A file listing additional .emb files to compile, one per line.",
+    )
     parser.add_argument(
         "--debug-show-tokenization",
         action="store_true",
@@ -84,6 +104,36 @@ def _parse_command_line(argv):
         help="Dump serialized IR to stdout.",
     )
     parser.add_argument("--output-file", type=str, help="Write serialized IR to file.")
+    parser.add_argument(
+        "--output-ir-format",
+        default="json",
+        choices=["json", "binary"],
+        help="The format of serialized IR.  Back ends detect the format "
+        "automatically.  'binary' is smaller and faster to read and write.",
+    )
+    parser.add_argument(
+        "--omit-ir-field",
+        dest="omit_ir_fields",
+        action="append",
+        default=[],
+        choices=["source_text", "source_location"],
+        help="Leave this field out of the serialized IR, wherever it appears.  "
+        "May be repeated.  Back ends do not need these fields, but without "
+        "them their error messages cannot show source code or locations.",
+    )
+    parser.add_argument(
+        "--debug-info-file",
+        type=str,
+        help="Leave source text and source locations out of the serialized IR, "
+        "and write them to this file instead.  Back ends which are given this "
+        "file can still show source code and locations in error messages.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help="Write serialized IR for each input file to a file in this "
+        "directory, named after the input file with an '.ir' suffix.",
+    )
     parser.add_argument(
         "--no-debug-show-header-lines",
         dest="debug_show_header_lines",
@@ -106,19 +156,95 @@ def _parse_command_line(argv):
         "embs.  If no import_dirs are specified, the "
         "current directory will be used.",
     )
-    return parser.parse_args(argv[1:])
+    parser.add_argument(
+        "--profile",
+        type=str,
+        help="Write a JSON profile of the time, IR node visits, and peak memory "
+        "of each compiler stage to this file.  Implies --jobs=1.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="The number of processes to use to compile multiple input files, "
+        "or to parse the imports of a single input file, or 0 to use one per "
+        "CPU.",
+    )
+    parser.add_argument(
+        "--module-cache-dir",
+        type=str,
+        help="A directory in which to cache parsed modules across compiler "
+        "runs.  The directory may be shared by concurrent compiler runs.",
+    )
+    parser.add_argument(
+        "--module-cache-max-size",
+        type=int,
+        default=module_cache.DEFAULT_MAX_SIZE // (1024 * 1024),
+        help="Maximum total size of --module-cache-dir, in MiB.",
+    )
+    flags = parser.parse_args(argv[1:])
+    if flags.input_manifest:
+        flags.input_file.extend(read_input_manifest(flags.input_manifest))
+    if not flags.input_file:
+        parser.error("no input files")
+    if len(flags.input_file) > 1 and not flags.output_dir:
+        parser.error("--output-dir is required with multiple input files")
+    if flags.output_dir:
+        single_file_flags = [
+            "--" + name.replace("_", "-")
+            for name in (
+                "debug_show_tokenization",
+                "debug_show_parse_tree",
+                "debug_show_module_ir",
+                "debug_stop_before_step",
+                "debug_show_full_ir",
+                "debug_show_used_productions",
+                "debug_show_unused_productions",
+                "output_ir_to_stdout",
+                "output_file",
+                "debug_info_file",
+            )
+            if getattr(flags, name)
+        ]
+        if single_file_flags:
+            parser.error(
+                "{} cannot be used with --output-dir".format(
+                    ", ".join(single_file_flags)
+                )
+            )
+    return flags
 
 
-def _show_errors(errors, ir, color_output):
-    """Prints errors with source code snippets."""
+def read_input_manifest(manifest_file):
+    """Returns the list of .emb files named in manifest_file.
+
+    A manifest lists one file per line.  Leading and trailing whitespace is
+    ignored, as are blank lines and lines starting with "#".
+    """
+    with open(manifest_file) as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def _use_color(color_output):
+    return color_output == "always" or (
+        color_output in ("auto", "if_tty") and sys.stderr.isatty()
+    )
+
+
+def _format_errors(errors, ir, use_color):
+    """Formats errors with source code snippets."""
     source_codes = {}
     if ir:
         for module in ir.module:
             source_codes[module.source_file_name] = module.source_text
-    use_color = color_output == "always" or (
-        color_output in ("auto", "if_tty") and os.isatty(sys.stderr.fileno())
-    )
-    print(error.format_errors(errors, source_codes, use_color), file=sys.stderr)
+    return error.format_errors(errors, source_codes, use_color)
+
+
+def _show_errors(errors, ir, color_output):
+    """Prints errors with source code snippets."""
+    print(_format_errors(errors, ir, _use_color(color_output)), file=sys.stderr)
 
 
 def _find_in_dirs_and_read(import_dirs):
@@ -152,6 +278,18 @@ def _find_in_dirs_and_read(import_dirs):
     return _find_and_read
 
 
+def _memoize_file_reader(file_reader):
+    """Returns a file reader which only calls file_reader once per file."""
+    results = {}
+
+    def _read(file_name):
+        if file_name not in results:
+            results[file_name] = file_reader(file_name)
+        return results[file_name]
+
+    return _read
+
+
 def _warn_if_cached_parser_is_mismatched(color_output):
     cached_parser_mismatch = parser.module_parser_cache_mismatch()
     extra_production_notes = [
@@ -180,35 +318,356 @@ def _warn_if_cached_parser_is_mismatched(color_output):
         )
 
 
-def parse_and_log_errors(input_file, import_dirs, color_output, stop_before_step=None):
+def make_module_cache(cache_dir, max_size_mib):
+    """Returns a ModuleCache for cache_dir, or None if cache_dir is not set."""
+    if not cache_dir:
+        return None
+    return module_cache.ModuleCache(cache_dir, max_size_mib * 1024 * 1024)
+
+
+def parse_and_log_errors(
+    input_file,
+    import_dirs,
+    color_output,
+    stop_before_step=None,
+    module_cache=None,
+    jobs=1,
+):
     """Fully parses an .emb and logs any errors.
 
     Arguments:
       input_file: The path of the module source file.
       import_dirs: Directories to search for imported dependencies.
       color_output: Used when logging errors: "always", "never", "if_tty", "auto"
+      stop_before_step: If set, stop processing before the specified step.
+      module_cache: An optional module_cache.ModuleCache for parsed modules.
+      jobs: The number of processes to use to parse imported modules, or 0 to
+          use one per CPU.  Ignored while a profiling.Profiler is active.
 
     Returns:
       (ir, debug_info, errors)
     """
     _warn_if_cached_parser_is_mismatched(color_output)
-    ir, debug_info, errors = glue.parse_emboss_file(
-        input_file,
-        _find_in_dirs_and_read(import_dirs),
-        stop_before_step=stop_before_step,
-    )
+    jobs = jobs or os.cpu_count() or 1
+    with contextlib.ExitStack() as stack:
+        # Profiles are only collected from this process.
+        if jobs > 1 and profiling.active_profiler() is None:
+            executor = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+            )
+        else:
+            executor = None
+        ir, debug_info, errors = glue.parse_emboss_file(
+            input_file,
+            _find_in_dirs_and_read(import_dirs),
+            stop_before_step=stop_before_step,
+            module_cache=module_cache,
+            executor=executor,
+        )
     if errors:
         _show_errors(errors, ir, color_output)
 
     return (ir, debug_info, errors)
 
 
+_CompileResult = collections.namedtuple(
+    "_CompileResult", ["output", "errors", "formatted_errors"]
+)
+
+
+class _Session(object):
+    """State shared by the compilation of several input files.
+
+    A _Session may be pickled and sent to worker processes; each process reads
+    input files through its own memoizing file reader.
+    """
+
+    def __init__(self, import_dirs, use_color, backing_cache, back_end):
+        self.import_dirs = import_dirs
+        self.use_color = use_color
+        self.module_cache = module_cache.SharedModuleCache(backing_cache)
+        self.back_end = back_end
+        self._file_reader = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_file_reader"] = None
+        return state
+
+    def file_reader(self, file_name):
+        if self._file_reader is None:
+            self._file_reader = _memoize_file_reader(
+                _find_in_dirs_and_read(self.import_dirs)
+            )
+        return self._file_reader(file_name)
+
+    def only_parse(self, input_file):
+        """Parses input_file and its imports, populating self.module_cache.
+
+        Returns:
+          None if input_file parsed successfully, or a _CompileResult holding
+          its errors.
+        """
+        ir, _, errors = glue.only_parse_emboss_file(
+            input_file, self.file_reader, self.module_cache
+        )
+        if errors:
+            return _CompileResult(
+                None, errors, _format_errors(errors, ir, self.use_color)
+            )
+        return None
+
+    def compile(self, input_file):
+        """Compiles input_file, and runs self.back_end on the result, if set."""
+        with profiling.stage("compile", input_file):
+            return self._compile(input_file)
+
+    def _compile(self, input_file):
+        ir, _, errors = glue.parse_emboss_file(
+            input_file, self.file_reader, module_cache=self.module_cache
+        )
+        if errors:
+            return _CompileResult(
+                None, errors, _format_errors(errors, ir, self.use_color)
+            )
+        if self.back_end is None:
+            return _CompileResult(ir, [], None)
+        with profiling.stage("back_end", input_file):
+            output, errors = self.back_end(ir)
+        if errors:
+            return _CompileResult(
+                None, errors, _format_errors(errors, ir, self.use_color)
+            )
+        return _CompileResult(output, [], None)
+
+
+# The _Session of a worker process started by compile_files_and_log_errors.
+_worker_session = None
+
+
+def _init_worker(session):
+    global _worker_session
+    _worker_session = session
+
+
+def _compile_in_worker(input_file):
+    return _worker_session.compile(input_file)
+
+
+def _compile_in_parallel(session, input_files, jobs):
+    """Yields the _CompileResult for each of input_files, using jobs processes.
+
+    Every input file and its imports are parsed once, in this process, before
+    any worker is started, so that modules shared between input files are
+    handed to the workers through session.module_cache instead of being
+    re-parsed by each worker.
+    """
+    parse_results = [session.only_parse(input_file) for input_file in input_files]
+    files_to_compile = [
+        input_file
+        for input_file, parse_result in zip(input_files, parse_results)
+        if parse_result is None
+    ]
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(session,)
+    ) as executor:
+        compile_results = executor.map(_compile_in_worker, files_to_compile)
+        for parse_result in parse_results:
+            if parse_result is None:
+                yield next(compile_results)
+            else:
+                yield parse_result
+
+
+def compile_files_and_log_errors(
+    input_files, import_dirs, color_output, module_cache=None, back_end=None, jobs=1
+):
+    """Fully compiles several .embs in one session, and logs any errors.
+
+    The parser, the prelude, and any files imported by more than one of
+    input_files are only loaded and parsed once.  A failure to compile one
+    input file does not stop the compilation of the rest.
+
+    With jobs > 1, input files are compiled by a pool of worker processes.
+    Results and errors are still reported in the order of input_files, and
+    outputs are identical to those of serial compilation.
+
+    Arguments:
+      input_files: The paths of the module source files.
+      import_dirs: Directories to search for imported dependencies.
+      color_output: Used when logging errors: "always", "never", "if_tty", "auto"
+      module_cache: An optional module_cache.ModuleCache for parsed modules.
+      back_end: An optional callable which takes a complete IR, and returns
+          (output, errors).  With jobs > 1, back_end must be picklable, and is
+          run in the worker process.
+      jobs: The number of processes to use, or 0 to use one per CPU.  Ignored
+          while a profiling.Profiler is active.
+
+    Yields:
+      (input_file, output, errors) for each of input_files, in order, where
+      output is the complete IR, or the output of back_end if it is set.
+    """
+    _warn_if_cached_parser_is_mismatched(color_output)
+    session = _Session(
+        import_dirs,
+        _use_color(color_output),
+        module_cache,
+        back_end,
+    )
+    jobs = jobs or os.cpu_count() or 1
+    # Profiles are only collected from this process.
+    if jobs > 1 and len(input_files) > 1 and profiling.active_profiler() is None:
+        results = _compile_in_parallel(session, input_files, jobs)
+    else:
+        results = (session.compile(input_file) for input_file in input_files)
+    for input_file, result in zip(input_files, results):
+        if result.formatted_errors is not None:
+            print(result.formatted_errors, file=sys.stderr)
+        yield input_file, result.output, result.errors
+
+
+class _TeeStream(io.RawIOBase):
+    """A binary stream which writes everything to several other streams."""
+
+    def __init__(self, streams):
+        super().__init__()
+        self._streams = streams
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        for stream in self._streams:
+            stream.write(data)
+        return len(data)
+
+
+def write_ir(ir, streams, output_ir_format, omit_fields=()):
+    """Serializes ir once, and writes it to each of streams.
+
+    The IR is written in pieces as it is serialized, so the serialized IR is
+    never held in memory all at once.
+
+    Arguments:
+      ir: The IR to write.
+      streams: A list of binary file-like objects.
+      output_ir_format: "json" or "binary".
+      omit_fields: The names of IR fields to leave out of the serialized IR.
+    """
+    buffered = io.BufferedWriter(_TeeStream(streams))
+    if output_ir_format == "binary":
+        ir_binary.write(ir, buffered, omit_fields=omit_fields)
+    else:
+        text = io.TextIOWrapper(buffered, encoding="utf-8")
+        ir_data_utils.IrDataSerializer(ir).write_json(text, omit_fields)
+        text.flush()
+        text.detach()
+    buffered.flush()
+
+
+def serialize_ir(ir, output_ir_format, omit_fields=()):
+    """Returns ir serialized in output_ir_format ("json" or "binary"), as bytes."""
+    stream = io.BytesIO()
+    write_ir(ir, [stream], output_ir_format, omit_fields)
+    return stream.getvalue()
+
+
+def _write_ir(ir, output_file, output_ir_format, omit_fields):
+    with profiling.stage("write_ir"):
+        with open(output_file, "wb") as f:
+            write_ir(ir, [f], output_ir_format, omit_fields)
+
+
+def _batch_output_file(output_dir, input_file, import_dirs):
+    """Returns the path of the .ir file for input_file under output_dir.
+
+    A relative input_file keeps its (normalized) path under output_dir.  An
+    absolute input_file is made relative to the first of import_dirs which
+    contains it, or else to the current directory.
+
+    Returns None if the output file would not be inside output_dir.
+    """
+    name = path.normpath(input_file)
+    if path.isabs(name):
+        for base in list(import_dirs) + [os.curdir]:
+            try:
+                relative = path.relpath(name, path.abspath(base))
+            except ValueError:
+                # On Windows, name and base may be on different drives.
+                continue
+            if relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+                name = relative
+                break
+        else:
+            return None
+    if name == os.pardir or name.startswith(os.pardir + os.sep):
+        return None
+    return path.join(output_dir, name + ".ir")
+
+
+def _batch_main(flags, cache):
+    """Compiles each of flags.input_file into flags.output_dir."""
+    result = 0
+    for input_file, ir, errors in compile_files_and_log_errors(
+        flags.input_file, flags.import_dirs, flags.color_output, cache, jobs=flags.jobs
+    ):
+        if errors:
+            result = 1
+            continue
+        output_file = _batch_output_file(
+            flags.output_dir, input_file, flags.import_dirs
+        )
+        if output_file is None:
+            print(
+                "{}: output file would be outside of --output-dir {}".format(
+                    input_file, flags.output_dir
+                ),
+                file=sys.stderr,
+            )
+            result = 1
+            continue
+        os.makedirs(path.dirname(output_file), exist_ok=True)
+        _write_ir(ir, output_file, flags.output_ir_format, flags.omit_ir_fields)
+    return result
+
+
+def write_profile(profiler, output_file):
+    """Writes the records of profiler to output_file as JSON."""
+    with open(output_file, "w") as f:
+        f.write(profiler.to_json(indent=2))
+
+
 def main(flags):
+    if not flags.profile:
+        return _main(flags)
+    profiler = profiling.Profiler()
+    with profiler.activate():
+        result = _main(flags)
+    write_profile(profiler, flags.profile)
+    return result
+
+
+def _main(flags):
+    # Modules loaded from the module cache do not have tokens, parse trees, or
+    # used productions, so the cache cannot be used to show them.
+    if (
+        flags.debug_show_tokenization
+        or flags.debug_show_parse_tree
+        or flags.debug_show_used_productions
+        or flags.debug_show_unused_productions
+    ):
+        cache = None
+    else:
+        cache = make_module_cache(flags.module_cache_dir, flags.module_cache_max_size)
+    if flags.output_dir:
+        return _batch_main(flags, cache)
     ir, debug_info, errors = parse_and_log_errors(
         flags.input_file[0],
         flags.import_dirs,
         flags.color_output,
         stop_before_step=flags.debug_stop_before_step,
+        module_cache=cache,
+        jobs=flags.jobs,
     )
     if errors:
         return 1
@@ -241,11 +700,27 @@ def main(flags):
                 set(module_ir.PRODUCTIONS) - main_module_debug_info.used_productions
             )
         )
-    if flags.output_ir_to_stdout:
-        print(ir_data_utils.IrDataSerializer(ir).to_json())
-    if flags.output_file:
-        with open(flags.output_file, "w") as f:
-            f.write(ir_data_utils.IrDataSerializer(ir).to_json())
+    if flags.output_ir_to_stdout or flags.output_file:
+        omit_fields = flags.omit_ir_fields
+        if flags.debug_info_file:
+            with profiling.stage("write_debug_info"):
+                with open(flags.debug_info_file, "w") as f:
+                    ir_debug_info.write(ir_debug_info.extract(ir), f)
+            omit_fields = list(omit_fields) + list(ir_debug_info.FIELDS)
+        with profiling.stage("write_ir"), contextlib.ExitStack() as stack:
+            streams = []
+            if flags.output_ir_to_stdout:
+                sys.stdout.flush()
+                streams.append(sys.stdout.buffer)
+            if flags.output_file:
+                streams.append(stack.enter_context(open(flags.output_file, "wb")))
+            # The IR is only serialized once, even if it is written to both
+            # stdout and a file.
+            write_ir(ir, streams, flags.output_ir_format, omit_fields)
+            if flags.output_ir_to_stdout:
+                if flags.output_ir_format == "json":
+                    sys.stdout.buffer.write(b"\n")
+                sys.stdout.buffer.flush()
     return 0
 
 
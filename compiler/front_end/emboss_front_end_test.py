@@ -0,0 +1,265 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for emboss_front_end batch compilation."""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from compiler.front_end import emboss_front_end
+from compiler.util import ir_binary
+from compiler.util import ir_data
+from compiler.util import ir_data_utils
+from compiler.util import ir_debug_info
+
+_FILES = {
+    "common.emb": "struct Common:\n  0 [+1]  UInt  x\n",
+    "a.emb": 'import "common.emb" as c\nstruct Alpha:\n  0 [+1]  c.Common  common\n',
+    "b.emb": 'import "common.emb" as c\nstruct Beta:\n  0 [+1]  c.Common  common\n',
+    "bad.emb": "struct Bad:\n  0 [+1]  Missing  x\n",
+}
+
+
+class EmbossFrontEndTest(unittest.TestCase):
+    """Tests for emboss_front_end's multiple-input mode."""
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.source_dir = os.path.join(self._directory.name, "src")
+        self.output_dir = os.path.join(self._directory.name, "out")
+        os.makedirs(self.source_dir)
+        for name, text in _FILES.items():
+            with open(os.path.join(self.source_dir, name), "w") as f:
+                f.write(text)
+
+    def _run(self, *args):
+        flags = emboss_front_end._parse_command_line(
+            [
+                "emboss_front_end",
+                "--color-output=never",
+                "--import-dir",
+                self.source_dir,
+            ]
+            + list(args)
+        )
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            result = emboss_front_end.main(flags)
+        return result, stderr.getvalue()
+
+    def _read_output(self, name):
+        with open(os.path.join(self.output_dir, name)) as f:
+            return ir_data_utils.IrDataSerializer.from_json(ir_data.EmbossIr, f.read())
+
+    def test_multiple_inputs(self):
+        result, stderr = self._run("--output-dir", self.output_dir, "a.emb", "b.emb")
+        self.assertEqual(0, result)
+        self.assertEqual("", stderr)
+        self.assertEqual(
+            "Alpha", self._read_output("a.emb.ir").module[0].type[0].name.name.text
+        )
+        self.assertEqual(
+            "Beta", self._read_output("b.emb.ir").module[0].type[0].name.name.text
+        )
+
+    def test_manifest(self):
+        manifest = os.path.join(self._directory.name, "manifest")
+        with open(manifest, "w") as f:
+            f.write("# Comment\n\n  b.emb  \n")
+        result, _ = self._run(
+            "--output-dir", self.output_dir, "--input-manifest", manifest, "a.emb"
+        )
+        self.assertEqual(0, result)
+        self.assertEqual(["a.emb.ir", "b.emb.ir"], sorted(os.listdir(self.output_dir)))
+
+    def test_errors_are_per_file(self):
+        result, stderr = self._run(
+            "--output-dir", self.output_dir, "a.emb", "bad.emb", "b.emb"
+        )
+        self.assertEqual(1, result)
+        self.assertIn("bad.emb", stderr)
+        self.assertNotIn("a.emb", stderr)
+        self.assertEqual(["a.emb.ir", "b.emb.ir"], sorted(os.listdir(self.output_dir)))
+
+    def test_absolute_input_is_written_under_output_dir(self):
+        result, stderr = self._run(
+            "--output-dir", self.output_dir, os.path.join(self.source_dir, "a.emb")
+        )
+        self.assertEqual(0, result)
+        self.assertEqual("", stderr)
+        self.assertEqual(["a.emb.ir"], os.listdir(self.output_dir))
+
+    def test_input_outside_output_dir_is_rejected(self):
+        with open(os.path.join(self._directory.name, "escape.emb"), "w") as f:
+            f.write(_FILES["a.emb"])
+        result, stderr = self._run(
+            "--output-dir", self.output_dir, os.path.join("..", "escape.emb"), "b.emb"
+        )
+        self.assertEqual(1, result)
+        self.assertIn("outside of --output-dir", stderr)
+        self.assertFalse(
+            os.path.exists(os.path.join(self._directory.name, "escape.emb.ir"))
+        )
+        self.assertEqual(["b.emb.ir"], os.listdir(self.output_dir))
+
+    def test_matches_single_file_output(self):
+        single_output = os.path.join(self._directory.name, "single.ir")
+        self.assertEqual(0, self._run("--output-file", single_output, "a.emb")[0])
+        self.assertEqual(0, self._run("--output-dir", self.output_dir, "a.emb")[0])
+        with open(single_output) as f:
+            single_ir = f.read()
+        with open(os.path.join(self.output_dir, "a.emb.ir")) as f:
+            self.assertEqual(single_ir, f.read())
+
+    def test_binary_ir_format(self):
+        json_output = os.path.join(self._directory.name, "a.json.ir")
+        binary_output = os.path.join(self._directory.name, "a.binary.ir")
+        self.assertEqual(0, self._run("--output-file", json_output, "a.emb")[0])
+        self.assertEqual(
+            0,
+            self._run(
+                "--output-ir-format=binary", "--output-file", binary_output, "a.emb"
+            )[0],
+        )
+        with open(json_output) as f:
+            json_ir = f.read()
+        with open(binary_output, "rb") as f:
+            binary_ir = f.read()
+        self.assertTrue(ir_binary.is_binary_ir(binary_ir))
+        self.assertEqual(
+            json_ir,
+            ir_data_utils.IrDataSerializer(
+                ir_binary.deserialize(ir_data.EmbossIr, binary_ir)
+            ).to_json(),
+        )
+
+    def test_stdout_matches_file_output(self):
+        output_file = os.path.join(self._directory.name, "a.ir")
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        with contextlib.redirect_stdout(stdout):
+            result, _ = self._run(
+                "--output-ir-to-stdout", "--output-file", output_file, "a.emb"
+            )
+        self.assertEqual(0, result)
+        stdout.flush()
+        with open(output_file) as f:
+            file_ir = f.read()
+        self.assertEqual(file_ir + "\n", stdout.buffer.getvalue().decode("utf-8"))
+
+    def test_omit_ir_fields(self):
+        for output_ir_format in ("json", "binary"):
+            output_file = os.path.join(self._directory.name, "a.ir")
+            result, _ = self._run(
+                "--output-ir-format",
+                output_ir_format,
+                "--omit-ir-field=source_text",
+                "--omit-ir-field=source_location",
+                "--output-file",
+                output_file,
+                "a.emb",
+            )
+            self.assertEqual(0, result)
+            with open(output_file, "rb") as f:
+                data = f.read()
+            if output_ir_format == "binary":
+                ir = ir_binary.deserialize(ir_data.EmbossIr, data)
+            else:
+                ir = ir_data_utils.IrDataSerializer.from_json(
+                    ir_data.EmbossIr, data.decode("utf-8")
+                )
+            module = ir.module[0]
+            self.assertIsNone(module.source_text)
+            self.assertIsNone(module.source_location)
+            self.assertIsNone(module.type[0].name.name.source_location)
+            self.assertEqual("Alpha", module.type[0].name.name.text)
+
+    def test_debug_info_file(self):
+        full_output = os.path.join(self._directory.name, "full.ir")
+        stripped_output = os.path.join(self._directory.name, "stripped.ir")
+        debug_info_file = os.path.join(self._directory.name, "a.emb.debug")
+        self.assertEqual(0, self._run("--output-file", full_output, "a.emb")[0])
+        result, _ = self._run(
+            "--debug-info-file",
+            debug_info_file,
+            "--output-file",
+            stripped_output,
+            "a.emb",
+        )
+        self.assertEqual(0, result)
+        with open(full_output) as f:
+            full_ir = f.read()
+        with open(stripped_output) as f:
+            stripped_ir = f.read()
+        self.assertNotIn("source_location", stripped_ir)
+        self.assertLess(len(stripped_ir), len(full_ir))
+        ir = ir_data_utils.IrDataSerializer.from_json(ir_data.EmbossIr, stripped_ir)
+        with open(debug_info_file) as f:
+            ir_debug_info.restore(ir, ir_debug_info.read(f))
+        self.assertEqual(full_ir, ir_data_utils.IrDataSerializer(ir).to_json())
+
+    def test_parallel_compilation_matches_serial(self):
+        inputs = ["a.emb", "bad.emb", "b.emb", "common.emb"]
+        serial_dir = os.path.join(self._directory.name, "serial")
+        serial_result, serial_stderr = self._run("--output-dir", serial_dir, *inputs)
+        result, stderr = self._run("--output-dir", self.output_dir, "-j", "3", *inputs)
+        self.assertEqual(1, result)
+        self.assertEqual(serial_result, result)
+        self.assertEqual(serial_stderr, stderr)
+        outputs = sorted(os.listdir(self.output_dir))
+        self.assertEqual(["a.emb.ir", "b.emb.ir", "common.emb.ir"], outputs)
+        self.assertEqual(outputs, sorted(os.listdir(serial_dir)))
+        for output in outputs:
+            with open(os.path.join(serial_dir, output)) as f:
+                serial_ir = f.read()
+            with open(os.path.join(self.output_dir, output)) as f:
+                self.assertEqual(serial_ir, f.read())
+
+    def test_profile(self):
+        profile = os.path.join(self._directory.name, "profile.json")
+        result, _ = self._run(
+            "--output-dir", self.output_dir, "--profile", profile, "-j", "2", "a.emb"
+        )
+        self.assertEqual(0, result)
+        with open(profile) as f:
+            stages = json.load(f)["stages"]
+        self.assertEqual(["compile", "write_ir"], [s["name"] for s in stages])
+        self.assertEqual("a.emb", stages[0]["module"])
+        child_names = [child["name"] for child in stages[0]["children"]]
+        self.assertIn("desugar", child_names)
+        self.assertIn("write_methods", child_names[-1])
+
+    def test_multiple_inputs_require_output_dir(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                emboss_front_end._parse_command_line(
+                    ["emboss_front_end", "a.emb", "b.emb"]
+                )
+            with self.assertRaises(SystemExit):
+                emboss_front_end._parse_command_line(
+                    [
+                        "emboss_front_end",
+                        "--output-dir=out",
+                        "--debug-show-full-ir",
+                        "a.emb",
+                    ]
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
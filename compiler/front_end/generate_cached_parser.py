@@ -13,12 +13,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
 import keyword
 import collections
 import sys
 
 from compiler.front_end import lr1
 from compiler.front_end import make_parser
+from compiler.front_end import parser_tables
 from compiler.util import parser_types
 
 
@@ -251,8 +253,37 @@ def generate_parser_file_text():
     )
 
 
+def generate_parser_tables():
+    """Returns the contents of a binary parser table file for module_ir."""
+    return parser_tables.serialize(
+        [
+            ("module", make_parser.build_module_parser().compile()),
+            ("expression", make_parser.build_expression_parser().compile()),
+        ],
+        make_parser.grammar_hash(),
+    )
+
+
+def _parse_command_line(argv):
+    """Parses the given command-line arguments."""
+    argparser = argparse.ArgumentParser(
+        description="Emboss cached parser generator.", prog=argv[0]
+    )
+    argparser.add_argument(
+        "--format",
+        default="py",
+        choices=["py", "binary"],
+        help="Emit a Python module ('py') or binary parser tables ('binary').",
+    )
+    return argparser.parse_args(argv[1:])
+
+
 def main(argv):
-    print(generate_parser_file_text(), end="")
+    flags = _parse_command_line(argv)
+    if flags.format == "binary":
+        sys.stdout.buffer.write(generate_parser_tables())
+    else:
+        print(generate_parser_file_text(), end="")
     return 0
 
 
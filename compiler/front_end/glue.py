@@ -19,6 +19,7 @@ and returns an IR or formatted error message.
 """
 
 import collections
+import concurrent.futures
 import sys
 
 from compiler.front_end import attribute_checker
@@ -37,6 +38,7 @@ from compiler.util import error
 from compiler.util import ir_data
 from compiler.util import ir_data_utils
 from compiler.util import parser_types
+from compiler.util import profiling
 from compiler.util import resources
 
 _IrDebugInfo = collections.namedtuple("IrDebugInfo", ["ir", "debug_info", "errors"])
@@ -135,13 +137,17 @@ def format_production_set(productions):
 _cached_modules = {}
 
 
-def parse_module_text(source_code, file_name):
+def parse_module_text(source_code, file_name, module_cache=None):
     """Parses the text of a module, returning a module-level IR.
 
     Arguments:
       source_code: The text of the module to parse.
       file_name: The name of the module's source file (will be included in the
           resulting IR).
+      module_cache: If set, a module_cache.ModuleCache to check for a module IR
+          for source_code before parsing, and to update after parsing.  Modules
+          loaded from module_cache have no tokens, parse_tree, or
+          used_productions in their ModuleDebugInfo.
 
     Returns:
       A module-level intermediate representation (IR), prior to import and symbol
@@ -151,37 +157,110 @@ def parse_module_text(source_code, file_name):
       FrontEndFailure: An error occurred while parsing the module.  str(error)
           will give a human-readable error message.
     """
+    result = _find_parsed_module(source_code, file_name, module_cache)
+    if result is None:
+        result = _add_parsed_module(
+            source_code,
+            file_name,
+            module_cache,
+            _parse_module_source(source_code, file_name),
+        )
+    return result
+
+
+def _find_parsed_module(source_code, file_name, module_cache):
+    """Returns the cached parse of a module, as parse_module_text, or None."""
     # This is strictly an optimization to speed up tests, mostly by avoiding the
     # need to re-parse the prelude for every test .emb.
-    if (source_code, file_name) in _cached_modules:
-        debug_info = _cached_modules[source_code, file_name]
+    #
+    # The entry is moved to the end of _cached_modules, so that the most
+    # recently used parse of each file is last; see discard_stale_cached_modules.
+    debug_info = _cached_modules.pop((source_code, file_name), None)
+    if debug_info is not None and (
+        debug_info.parse_tree is not None or module_cache is not None
+    ):
+        _cached_modules[source_code, file_name] = debug_info
         ir = ir_data_utils.copy(debug_info.ir)
-    else:
-        debug_info = ModuleDebugInfo(file_name)
-        debug_info.source_code = source_code
+        ir.source_file_name = file_name
+        return _IrDebugInfo(ir, debug_info, [])
+    ir = module_cache.get(source_code) if module_cache is not None else None
+    if ir is None:
+        return None
+    debug_info = ModuleDebugInfo(file_name)
+    return _finish_parsed_module(ir, debug_info, source_code, file_name)
+
+
+def _parse_module_source(source_code, file_name):
+    """Tokenizes and parses a module, and builds its module-level IR.
+
+    _parse_module_source depends only on its arguments, so that it can be run
+    in a worker process.
+
+    Returns:
+      (ir, tokens, parse_tree, used_productions, errors).  If errors is not an
+      empty list, ir, parse_tree, and used_productions will be None.
+    """
+    with profiling.stage("tokenize", file_name):
         tokens, errors = tokenizer.tokenize(source_code, file_name)
-        if errors:
-            return _IrDebugInfo(None, debug_info, errors)
-        debug_info.tokens = tokens
+    if errors:
+        return None, None, None, None, errors
+    with profiling.stage("parse", file_name):
         parse_result = parser.parse_module(tokens)
-        if parse_result.error:
-            return _IrDebugInfo(
-                None,
-                debug_info,
-                [error.make_error_from_parse_error(file_name, parse_result.error)],
-            )
-        debug_info.parse_tree = parse_result.parse_tree
-        used_productions = set()
+    if parse_result.error:
+        return (
+            None,
+            tokens,
+            None,
+            None,
+            [error.make_error_from_parse_error(file_name, parse_result.error)],
+        )
+    used_productions = set()
+    with profiling.stage("build_ir", file_name):
         ir = module_ir.build_ir(parse_result.parse_tree, used_productions)
-        ir.source_text = source_code
-        debug_info.used_productions = used_productions
-        debug_info.ir = ir_data_utils.copy(ir)
-        _cached_modules[source_code, file_name] = debug_info
+    return ir, tokens, parse_result.parse_tree, used_productions, []
+
+
+def _add_parsed_module(source_code, file_name, module_cache, parsed_module):
+    """Caches the result of _parse_module_source, as parse_module_text."""
+    ir, tokens, parse_tree, used_productions, errors = parsed_module
+    debug_info = ModuleDebugInfo(file_name)
+    debug_info.tokens = tokens
+    if errors:
+        debug_info.source_code = source_code
+        return _IrDebugInfo(None, debug_info, errors)
+    debug_info.parse_tree = parse_tree
+    debug_info.used_productions = used_productions
+    if module_cache is not None:
+        module_cache.put(source_code, ir)
+    return _finish_parsed_module(ir, debug_info, source_code, file_name)
+
+
+def _finish_parsed_module(ir, debug_info, source_code, file_name):
+    debug_info.source_code = source_code
+    ir.source_text = source_code
+    debug_info.ir = ir_data_utils.copy(ir)
+    _cached_modules[source_code, file_name] = debug_info
     ir.source_file_name = file_name
     return _IrDebugInfo(ir, debug_info, [])
 
 
-def parse_module(file_name, file_reader):
+def discard_stale_cached_modules():
+    """Discards all but the most recently used parse of each module file.
+
+    Parsed modules are cached in memory by source text and file name, so that
+    a changed file is always re-parsed.  Long-running processes, which may see
+    many versions of each file, should call discard_stale_cached_modules
+    periodically to release the cached parses of older versions.
+    """
+    latest_keys = {}
+    for key in _cached_modules:
+        latest_keys[key[1]] = key
+    for key in list(_cached_modules):
+        if latest_keys[key[1]] != key:
+            del _cached_modules[key]
+
+
+def parse_module(file_name, file_reader, module_cache=None):
     """Parses a module, returning a module-level IR.
 
     Arguments:
@@ -189,6 +268,8 @@ def parse_module(file_name, file_reader):
       file_reader: A callable that returns either:
           (file_contents, None) or
           (None, list_of_error_detail_strings)
+      module_cache: An optional module_cache.ModuleCache; see
+          parse_module_text.
 
     Returns:
       (ir, debug_info, errors), where ir is a module-level intermediate
@@ -203,24 +284,35 @@ def parse_module(file_name, file_reader):
     """
     source_code, errors = file_reader(file_name)
     if errors:
-        location = parser_types.SourceLocation((1, 1), (1, 1))
-        return (
-            None,
-            None,
-            [
-                [error.error(file_name, location, "Unable to read file.")]
-                + [error.note(file_name, location, e) for e in errors]
-            ],
-        )
-    return parse_module_text(source_code, file_name)
+        return _read_error(file_name, errors)
+    return parse_module_text(source_code, file_name, module_cache)
+
+
+def _read_error(file_name, errors):
+    """Returns the result of parse_module for a file which could not be read."""
+    location = parser_types.SourceLocation((1, 1), (1, 1))
+    return (
+        None,
+        None,
+        [
+            [error.error(file_name, location, "Unable to read file.")]
+            + [error.note(file_name, location, e) for e in errors]
+        ],
+    )
 
 
-def get_prelude():
+def _prelude_source():
+    return resources.load("compiler.front_end", "prelude.emb")
+
+
+def get_prelude(module_cache=None):
     """Returns the module IR and debug info of the Emboss Prelude."""
-    return parse_module_text(resources.load("compiler.front_end", "prelude.emb"), "")
+    return parse_module_text(_prelude_source(), "", module_cache)
 
 
-def parse_emboss_file(file_name, file_reader, stop_before_step=None):
+def parse_emboss_file(
+    file_name, file_reader, stop_before_step=None, module_cache=None, executor=None
+):
     """Fully parses an .emb, and returns an IR suitable for passing to a back end.
 
     parse_emboss_file is a convenience function which calls only_parse_emboss_file
@@ -233,6 +325,10 @@ def parse_emboss_file(file_name, file_reader, stop_before_step=None):
       stop_before_step: If set, parse_emboss_file will stop normalizing the IR
           just before the specified step.  This parameter should be None for
           non-test code.
+      module_cache: An optional module_cache.ModuleCache, used to avoid
+          re-parsing modules which have been parsed by earlier compiler runs.
+      executor: An optional concurrent.futures.Executor; see
+          only_parse_emboss_file.
 
     Returns:
       (ir, debug_info, errors), where ir is a complete IR, ready for consumption
@@ -241,7 +337,9 @@ def parse_emboss_file(file_name, file_reader, stop_before_step=None):
       errors is a list of tokenization or parse errors.  If errors is not an empty
       list, ir will be None.
     """
-    ir, debug_info, errors = only_parse_emboss_file(file_name, file_reader)
+    ir, debug_info, errors = only_parse_emboss_file(
+        file_name, file_reader, module_cache, executor
+    )
     if errors:
         return _IrDebugInfo(None, debug_info, errors)
     ir, errors = process_ir(ir, stop_before_step)
@@ -250,17 +348,27 @@ def parse_emboss_file(file_name, file_reader, stop_before_step=None):
     return _IrDebugInfo(ir, debug_info, errors)
 
 
-def only_parse_emboss_file(file_name, file_reader):
+def only_parse_emboss_file(file_name, file_reader, module_cache=None, executor=None):
     """Parses an .emb, and returns an IR suitable for process_ir.
 
     only_parse_emboss_file parses the given file and all of its transitive
     imports, and returns a first-stage intermediate representation, which can be
     passed to process_ir.
 
+    Imports are found breadth-first.  If executor is set, all of the modules
+    found at the same depth are tokenized and parsed concurrently; the result
+    is the same as without executor.
+
     Arguments:
       file_name: The name of the module's source file.
       file_reader: A callable that returns the contents of files, or raises
           IOError.
+      module_cache: An optional module_cache.ModuleCache, used to avoid
+          re-parsing modules which have been parsed by earlier compiler runs.
+      executor: An optional concurrent.futures.Executor (usually a
+          ProcessPoolExecutor) used to parse modules.  Files are still read,
+          and caches are still checked and updated, by the calling thread.
+          Profiling stages of work done by the executor are not recorded.
 
     Returns:
       (ir, debug_info, errors), where ir is an intermediate representation (IR),
@@ -268,29 +376,76 @@ def only_parse_emboss_file(file_name, file_reader):
       original source text of all modules, and errors is a list of tokenization or
       parse errors.  If errors is not an empty list, ir will be None.
     """
-    file_queue = [file_name]
+    files_to_parse = [file_name]
     files = {file_name}
     debug_info = DebugInfo()
     ir = ir_data.EmbossIr(module=[])
-    while file_queue:
-        file_to_parse = file_queue[0]
-        del file_queue[0]
-        if file_to_parse:
-            module, module_debug_info, errors = parse_module(file_to_parse, file_reader)
+    while files_to_parse:
+        if executor is None:
+            results = (
+                _parse_module_or_prelude(file_to_parse, file_reader, module_cache)
+                for file_to_parse in files_to_parse
+            )
         else:
-            module, module_debug_info, errors = get_prelude()
-        if module_debug_info:
-            debug_info.modules[file_to_parse] = module_debug_info
-        if errors:
-            return _IrDebugInfo(None, debug_info, errors)
-        ir.module.extend([module])  # Proto supports extend but not append here.
-        for import_ in module.foreign_import:
-            if import_.file_name.text not in files:
-                file_queue.append(import_.file_name.text)
-                files.add(import_.file_name.text)
+            results = _parse_modules_concurrently(
+                files_to_parse, file_reader, module_cache, executor
+            )
+        imported_files = []
+        for file_to_parse, (module, module_debug_info, errors) in zip(
+            files_to_parse, results
+        ):
+            if module_debug_info:
+                debug_info.modules[file_to_parse] = module_debug_info
+            if errors:
+                return _IrDebugInfo(None, debug_info, errors)
+            # module is a fresh copy which is not used elsewhere, so it can be
+            # moved into ir instead of being copied again.
+            ir.module.shallow_copy([module])
+            for import_ in module.foreign_import:
+                if import_.file_name.text not in files:
+                    imported_files.append(import_.file_name.text)
+                    files.add(import_.file_name.text)
+        files_to_parse = imported_files
     return _IrDebugInfo(ir, debug_info, [])
 
 
+def _parse_module_or_prelude(file_name, file_reader, module_cache):
+    if file_name:
+        return parse_module(file_name, file_reader, module_cache)
+    return get_prelude(module_cache)
+
+
+def _parse_modules_concurrently(file_names, file_reader, module_cache, executor):
+    """Returns the parse of each of file_names, as _parse_module_or_prelude.
+
+    Modules which are not already cached are parsed by executor.
+    """
+    results = []
+    source_codes = []
+    for file_name in file_names:
+        if file_name:
+            source_code, errors = file_reader(file_name)
+            if errors:
+                results.append(_read_error(file_name, errors))
+                source_codes.append(None)
+                continue
+        else:
+            source_code = _prelude_source()
+        result = _find_parsed_module(source_code, file_name, module_cache)
+        if result is None:
+            result = executor.submit(_parse_module_source, source_code, file_name)
+        results.append(result)
+        source_codes.append(source_code)
+    return [
+        (
+            _add_parsed_module(source_code, file_name, module_cache, result.result())
+            if isinstance(result, concurrent.futures.Future)
+            else result
+        )
+        for file_name, source_code, result in zip(file_names, source_codes, results)
+    ]
+
+
 def process_ir(ir, stop_before_step):
     """Turns a first-stage IR into a fully-processed IR.
 
@@ -376,7 +531,8 @@ def process_ir(ir, stop_before_step):
     for function in passes:
         if stop_before_step == function.__name__:
             return (ir, [])
-        errors, hidden_errors = error.split_errors(function(ir))
+        with profiling.stage(function.__name__):
+            errors, hidden_errors = error.split_errors(function(ir))
         if errors:
             return (None, errors)
         deferred_errors.extend(hidden_errors)
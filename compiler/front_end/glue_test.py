@@ -14,6 +14,7 @@
 
 """Tests for glue."""
 
+import concurrent.futures
 import pkgutil
 import unittest
 
@@ -274,6 +275,89 @@ class FrontEndGlueTest(unittest.TestCase):
         self.assertFalse(errors[0][1].location.is_synthetic)
         self.assertFalse(ir)
 
+    def test_discard_stale_cached_modules(self):
+        old_source = "struct StaleCacheTestOld:\n  0 [+1]  UInt  x\n"
+        new_source = "struct StaleCacheTestNew:\n  0 [+1]  UInt  x\n"
+        glue.parse_module_text(old_source, "stale_cache_test.emb")
+        glue.parse_module_text(new_source, "stale_cache_test.emb")
+        glue.parse_module_text(old_source, "stale_cache_test.emb")
+        glue.discard_stale_cached_modules()
+        self.assertIn((old_source, "stale_cache_test.emb"), glue._cached_modules)
+        self.assertNotIn((new_source, "stale_cache_test.emb"), glue._cached_modules)
+
+
+def _wide_import_files(tag):
+    """Returns .emb files in which main.emb imports a wide tree of modules."""
+    files = {
+        "main.emb": "".join('import "m{}.emb" as m{}\n'.format(i, i) for i in range(4))
+        + "struct Main{}:\n  0 [+1]  m0.Mod0  x\n".format(tag)
+    }
+    for i in range(4):
+        files["m{}.emb".format(i)] = (
+            'import "leaf.emb" as leaf\n'
+            'import "m{}.emb" as nxt\n'
+            "struct Mod{}:\n  0 [+1]  leaf.Leaf{}  x\n".format((i + 1) % 4, i, tag)
+        )
+    files["leaf.emb"] = "struct Leaf{}:\n  0 [+1]  UInt  x\n".format(tag)
+    return files
+
+
+class _CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    """A ThreadPoolExecutor which counts the calls submitted to it."""
+
+    def __init__(self):
+        super().__init__(max_workers=3)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+class ConcurrentParseTest(unittest.TestCase):
+    """Tests for only_parse_emboss_file with an executor."""
+
+    def _parse(self, files, executor=None):
+        result = glue.only_parse_emboss_file(
+            "main.emb", test_util.dict_file_reader(files), executor=executor
+        )
+        # Drop the parsed modules from the in-memory cache, so that the next
+        # parse of files parses them again.
+        for file_name, source_code in files.items():
+            glue._cached_modules.pop((source_code, file_name), None)
+        return result
+
+    def test_matches_serial_parse(self):
+        files = _wide_import_files("Threads")
+        serial_result = self._parse(files)
+        with _CountingExecutor() as executor:
+            result = self._parse(files, executor)
+        self.assertEqual(serial_result, result)
+        self.assertEqual(
+            ["main.emb", "", "m0.emb", "m1.emb", "m2.emb", "m3.emb", "leaf.emb"],
+            [module.source_file_name for module in result.ir.module],
+        )
+        # The prelude was already parsed by the serial parse.
+        self.assertEqual(len(files), executor.submitted)
+
+    def test_process_pool(self):
+        files = _wide_import_files("Processes")
+        serial_result = self._parse(files)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(serial_result, self._parse(files, executor))
+
+    def test_errors_match_serial_parse(self):
+        files = _wide_import_files("Errors")
+        files["m1.emb"] = "struct Bad:\n  0 [+1]  UInt\n"
+        del files["m2.emb"]
+        serial_result = self._parse(files)
+        self.assertTrue(serial_result.errors)
+        with _CountingExecutor() as executor:
+            result = self._parse(files, executor)
+        self.assertEqual(serial_result.errors, result.errors)
+        self.assertEqual(serial_result.debug_info, result.debug_info)
+        self.assertIsNone(result.ir)
+
 
 class DebugInfoTest(unittest.TestCase):
     """Tests for DebugInfo and ModuleDebugInfo classes."""
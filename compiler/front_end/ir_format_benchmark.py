@@ -0,0 +1,129 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks the JSON and binary IR formats against each other.
+
+Usage:
+
+    python3 -m compiler.front_end.ir_format_benchmark [--repeat N] [file.emb...]
+
+If no files are given, every .emb file under testdata/ is used.  Each file is
+compiled, its IR is written and read back in both formats, the results are
+checked for equality, and the total size and time for each format is printed.
+Files are found relative to the current directory, so this should be run from
+the root of the Emboss repository.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+from compiler.front_end import emboss_front_end
+from compiler.front_end import glue
+from compiler.util import ir_binary
+from compiler.util import ir_data
+from compiler.util import ir_data_utils
+
+_FORMATS = (
+    (
+        "json",
+        lambda ir: ir_data_utils.IrDataSerializer(ir).to_json(),
+        lambda data: ir_data_utils.IrDataSerializer.from_json(ir_data.EmbossIr, data),
+    ),
+    (
+        "binary",
+        ir_binary.serialize,
+        lambda data: ir_binary.deserialize(ir_data.EmbossIr, data),
+    ),
+)
+
+
+def _find_default_inputs():
+    """Returns the paths of all .emb files under testdata/."""
+    result = []
+    for root, _, files in os.walk("testdata"):
+        for name in files:
+            if name.endswith(".emb"):
+                result.append(os.path.join(root, name))
+    return sorted(result)
+
+
+def _parse_command_line(argv):
+    """Parses the given command-line arguments."""
+    argparser = argparse.ArgumentParser(
+        description="Emboss IR format benchmark.", prog=argv[0]
+    )
+    argparser.add_argument(
+        "input_file", type=str, nargs="*", help=".emb files to compile."
+    )
+    argparser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of times to write and read each IR in each format.",
+    )
+    return argparser.parse_args(argv[1:])
+
+
+def main(argv):
+    flags = _parse_command_line(argv)
+    inputs = flags.input_file or _find_default_inputs()
+    file_reader = emboss_front_end._find_in_dirs_and_read(["."])
+    irs = []
+    for file_name in inputs:
+        ir, _, errors = glue.parse_emboss_file(file_name, file_reader)
+        # Some test inputs are intentionally invalid.
+        if not errors:
+            irs.append(ir)
+
+    sizes = {}
+    write_times = {}
+    read_times = {}
+    for name, write, read in _FORMATS:
+        serialized = [write(ir) for ir in irs]
+        for original, data in zip(irs, serialized):
+            if read(data) != original:
+                print("{} IR does not round trip.".format(name), file=sys.stderr)
+                return 1
+        sizes[name] = sum(len(data) for data in serialized)
+        write_times[name] = timeit.timeit(
+            lambda: [write(ir) for ir in irs], number=flags.repeat
+        )
+        read_times[name] = timeit.timeit(
+            lambda: [read(data) for data in serialized], number=flags.repeat
+        )
+
+    print("Serialized {} IRs, {} times each.".format(len(irs), flags.repeat))
+    print("{:8} {:>12} {:>9} {:>9}".format("format", "bytes", "write", "read"))
+    for name, _, _ in _FORMATS:
+        print(
+            "{:8} {:12d} {:8.3f}s {:8.3f}s".format(
+                name, sizes[name], write_times[name], read_times[name]
+            )
+        )
+    print(
+        "ratio    {:11.2f}x {:8.2f}x {:8.2f}x".format(
+            sizes["json"] / sizes["binary"],
+            write_times["json"] / write_times["binary"],
+            read_times["json"] / read_times["binary"],
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
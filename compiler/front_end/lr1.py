@@ -26,6 +26,7 @@ Clients are expected to provide their own tokenizers and handle turning a raw
 parse tree into an intermediate representation on their own.
 """
 
+import array
 import collections
 
 from compiler.util import parser_types
@@ -720,6 +721,81 @@ class Parser(object):
             else:
                 assert False, "Shouldn't be here."
 
+    def compile(self):
+        """Returns a CompiledParser with the same tables as this Parser.
+
+        The CompiledParser is a snapshot: it should be created after any calls
+        to mark_error.
+
+        Returns:
+          A CompiledParser.
+        """
+        terminals = set()
+        reductions = set(self.productions)
+        for state_actions in self.action.values():
+            for symbol, action in state_actions.items():
+                terminals.add(symbol)
+                if isinstance(action, Reduce):
+                    reductions.add(action.rule)
+        nonterminals = set()
+        for state_gotos in self.goto.values():
+            nonterminals.update(state_gotos)
+        terminals = tuple(sorted(terminals))
+        nonterminals = tuple(sorted(nonterminals))
+        productions = tuple(sorted(reductions))
+        state_count = 1 + max(
+            [state for state in self.action]
+            + [state for state in self.goto]
+            + [
+                action.state
+                for state_actions in self.action.values()
+                for action in state_actions.values()
+                if isinstance(action, Shift)
+            ]
+            + [
+                state
+                for state_gotos in self.goto.values()
+                for state in state_gotos.values()
+            ]
+        )
+
+        terminal_index = {symbol: i for i, symbol in enumerate(terminals)}
+        production_index = {production: i for i, production in enumerate(productions)}
+        action_width = len(terminals) + 1
+        action_table = array.array("i", [0]) * (state_count * action_width)
+        error_codes = {}
+        for state, state_actions in self.action.items():
+            row = state * action_width
+            for symbol, action in state_actions.items():
+                column = terminal_index[symbol]
+                if isinstance(action, Shift):
+                    action_table[row + column] = action.state + 1
+                elif isinstance(action, Reduce):
+                    action_table[row + column] = -2 - production_index[action.rule]
+                elif isinstance(action, Accept):
+                    action_table[row + column] = -1
+                else:
+                    assert isinstance(action, Error), "Unknown action " + repr(action)
+                    error_codes[state, column] = action.code
+
+        nonterminal_index = {symbol: i for i, symbol in enumerate(nonterminals)}
+        goto_width = len(nonterminals)
+        goto_table = array.array("i", [-1]) * (state_count * goto_width)
+        for state, state_gotos in self.goto.items():
+            row = state * goto_width
+            for symbol, goto_state in state_gotos.items():
+                goto_table[row + nonterminal_index[symbol]] = goto_state
+
+        return CompiledParser(
+            terminals,
+            nonterminals,
+            productions,
+            action_table,
+            goto_table,
+            error_codes,
+            dict(self.default_errors),
+        )
+
     def mark_error(self, tokens, error_token, error_code):
         """Marks an error state with the given error code.
 
@@ -804,3 +880,146 @@ class Parser(object):
                 self.action[result.error.state][error_symbol] = Error(error_code)
                 return None
         assert False, "All other paths should lead to return."
+
+
+class CompiledParser(object):
+    """CompiledParser is a shift-reduce LR(1) parser with integer-coded tables.
+
+    A CompiledParser produces exactly the same ParseResults as the Parser it was
+    compiled from, but the tables are stored as flat arrays indexed by state
+    and symbol numbers, so that the main parse loop does not need to do any
+    dict lookups or type dispatch.
+
+    Generally, clients will want to get a CompiledParser from Parser.compile(),
+    rather than directly instantiating one.
+
+    Attributes:
+      terminals: A tuple of terminal symbols.  The index of a terminal in
+        terminals is its column in the action table.
+      nonterminals: A tuple of nonterminal symbols.  The index of a nonterminal
+        in nonterminals is its column in the goto table.
+      productions: A tuple of the productions in the grammar.  Reduce actions
+        refer to productions by their index in productions.
+      action: The ACTION table, as a flat array of
+        (len(terminals) + 1) * (number of states) ints, in row-major order.  The
+        extra column is used for symbols which are not terminals of the grammar,
+        and is always 0.  Each entry is encoded as:
+          0: Error.
+          -1: Accept.
+          n > 0: Shift to state n - 1.
+          n < -1: Reduce using productions[-n - 2].
+      goto: The GOTO table, as a flat array of
+        len(nonterminals) * (number of states) ints, in row-major order.  Unused
+        entries are -1.
+      error_codes: A dict of (state, terminal index) to error codes, for
+        explicitly-marked errors.
+      default_errors: A dict of states to default error codes to use when
+        encountering an error in that state, when a more-specific error code for
+        the state/terminal pair has not been set.
+    """
+
+    def __init__(
+        self,
+        terminals,
+        nonterminals,
+        productions,
+        action,
+        goto,
+        error_codes,
+        default_errors,
+    ):
+        super(CompiledParser, self).__init__()
+        self.terminals = terminals
+        self.nonterminals = nonterminals
+        self.productions = productions
+        self.action = action
+        self.goto = goto
+        self.error_codes = error_codes
+        self.default_errors = default_errors
+        self._terminal_index = {symbol: i for i, symbol in enumerate(terminals)}
+        nonterminal_index = {symbol: i for i, symbol in enumerate(nonterminals)}
+        self._reductions = [
+            (len(p.rhs), p.lhs, nonterminal_index.get(p.lhs, -1), p)
+            for p in productions
+        ]
+
+    def parse(self, tokens):
+        """parse implements the Shift-Reduce parsing algorithm.
+
+        This is equivalent to Parser.parse, but uses the integer-coded tables.
+
+        Arguments:
+          tokens: the list of token objects to parse.
+
+        Returns:
+          A ParseResult.
+        """
+        tokens = list(tokens) + [Symbol(END_OF_INPUT)]
+        unknown_symbol = len(self.terminals)
+        terminal_index = self._terminal_index.get
+        symbols = [terminal_index(token.symbol, unknown_symbol) for token in tokens]
+        action_table = self.action
+        action_width = unknown_symbol + 1
+        goto_table = self.goto
+        goto_width = len(self.nonterminals)
+        reductions = self._reductions
+        merge_source_locations = parser_types.merge_source_locations
+
+        # The state stack and the parse tree stack are kept separately, so that
+        # the current state can be read without unpacking a tuple.
+        states = [0]
+        trees = [None]
+        state = 0
+        cursor = 0
+        symbol = symbols[0]
+        while True:
+            next_action = action_table[state * action_width + symbol]
+            if next_action > 0:
+                state = next_action - 1
+                states.append(state)
+                trees.append(tokens[cursor])
+                cursor += 1
+                symbol = symbols[cursor]
+            elif next_action < -1:
+                rhs_length, lhs, lhs_index, production = reductions[-next_action - 2]
+                if rhs_length:
+                    children = trees[-rhs_length:]
+                    del trees[-rhs_length:]
+                    del states[-rhs_length:]
+                else:
+                    children = []
+                trees.append(
+                    Reduction(
+                        lhs, children, production, merge_source_locations(*children)
+                    )
+                )
+                state = goto_table[states[-1] * goto_width + lhs_index]
+                states.append(state)
+            elif next_action == -1:
+                assert len(trees) == 2, "Accepted incompletely-reduced input."
+                assert tokens[cursor].symbol == END_OF_INPUT, (
+                    "Accepted parse before " "end of input."
+                )
+                return ParseResult(trees[-1], None)
+            else:
+                return ParseResult(None, self._parse_error(state, cursor, tokens))
+
+    def _parse_error(self, state, cursor, tokens):
+        """Returns the ParseError for an Error action at the given position."""
+        symbol = self._terminal_index.get(tokens[cursor].symbol, len(self.terminals))
+        if (state, symbol) in self.error_codes:
+            code = self.error_codes[state, symbol]
+        else:
+            code = self.default_errors.get(state)
+        row = state * (len(self.terminals) + 1)
+        return ParseError(
+            code,
+            cursor,
+            tokens[cursor],
+            state,
+            set(
+                terminal
+                for i, terminal in enumerate(self.terminals)
+                if self.action[row + i]
+            ),
+        )
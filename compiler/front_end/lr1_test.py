@@ -353,6 +353,52 @@ class Lr1Test(unittest.TestCase):
         self.assertEqual("missing last C", parser.parse(_tokenize("ccccd")).error.code)
         self.assertEqual(None, parser.parse(_tokenize("ccc")).error.code)
 
+    def test_compiled_parser_matches_parser(self):
+        parser = _alsu_grammar.parser()
+        self.assertIsNone(parser.mark_error(_tokenize("cccdc"), None, "missing last d"))
+        self.assertIsNone(
+            parser.mark_error([lr1.ANY_TOKEN], lr1.ANY_TOKEN, "default error")
+        )
+        compiled_parser = parser.compile()
+        for text in ("cccdcd", "dd", "dcd", "d", "cccd", "", "cccdc", "dc", "z", "ddd"):
+            self.assertEqual(
+                parser.parse(_tokenize(text)), compiled_parser.parse(_tokenize(text))
+            )
+        self.assertEqual(
+            parser.parse([Token("d", None), Token("d", None)]),
+            compiled_parser.parse([Token("d", None), Token("d", None)]),
+        )
+
+    def test_compiled_parser_tables(self):
+        compiled_parser = _alsu_grammar.parser().compile()
+        self.assertEqual(("$", "c", "d"), compiled_parser.terminals)
+        self.assertEqual(("C", "S"), compiled_parser.nonterminals)
+        self.assertEqual(
+            len(compiled_parser.action),
+            len(_alsu_items) * (len(compiled_parser.terminals) + 1),
+        )
+        self.assertEqual(
+            len(compiled_parser.goto),
+            len(_alsu_items) * len(compiled_parser.nonterminals),
+        )
+
+    def test_compiled_parser_with_empty_rhs(self):
+        grammar = lr1.Grammar(
+            "S",
+            _parse_productions(
+                """S -> A B
+                                                    A -> a A
+                                                    A ->
+                                                    B -> b"""
+            ),
+        )
+        parser = grammar.parser()
+        compiled_parser = parser.compile()
+        for text in ("ab", "b", "aab", "a", "ba"):
+            self.assertEqual(
+                parser.parse(_tokenize(text)), compiled_parser.parse(_tokenize(text))
+            )
+
     def test_grammar_with_empty_rhs(self):
         grammar = lr1.Grammar(
             "S",
@@ -16,6 +16,7 @@
 
 from compiler.front_end import lr1
 from compiler.front_end import module_ir
+from compiler.front_end import parser_tables
 from compiler.front_end import tokenizer
 from compiler.util import parser_types
 from compiler.util import resources
@@ -122,3 +123,20 @@ def build_expression_parser():
     return generate_parser(
         module_ir.EXPRESSION_START_SYMBOL, sorted(module_ir.PRODUCTIONS), []
     )
+
+
+def grammar_hash():
+    """Returns the parser_tables.grammar_hash of the module_ir grammar.
+
+    The hash covers the productions of both the module parser and the
+    expression parser, including their "S' -> start" productions.
+    """
+    return parser_tables.grammar_hash(
+        set(module_ir.PRODUCTIONS)
+        | {
+            parser_types.Production(lr1.START_PRIME, (module_ir.START_SYMBOL,)),
+            parser_types.Production(
+                lr1.START_PRIME, (module_ir.EXPRESSION_START_SYMBOL,)
+            ),
+        }
+    )
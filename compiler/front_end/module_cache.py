@@ -0,0 +1,236 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A persistent, on-disk cache of parsed module IRs.
+
+Parsing a module (tokenizing, parsing, and building the module-level IR) is a
+pure function of the module's source text and of the compiler itself, so the
+result can be shared across compiler invocations.  ModuleCache stores module
+IRs in a directory, keyed by a hash of the source text and a "compiler version"
+hash which covers the grammar and the code that builds module IRs.
+
+Entries are written to a temporary file and then atomically renamed into place,
+so multiple compiler processes may safely share one cache directory: readers
+never see partially-written entries, and an entry which disappears (due to
+eviction by another process) is simply a cache miss.
+
+Entries are stored as pickles, so a cache directory must be as trusted as the
+compiler itself.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import types
+
+from compiler.front_end import make_parser
+from compiler.front_end import module_ir
+from compiler.front_end import tokenizer
+from compiler.util import resources
+from compiler.util import simple_memoizer
+
+# FORMAT_VERSION must be incremented any time the cache entry format changes.
+FORMAT_VERSION = 1
+
+# The default maximum total size of all entries in a cache directory.
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+_ENTRY_SUFFIX = ".module"
+
+# The modules which determine the module IR produced from a given source text.
+# A change to any of these, or to any compiler module which they import,
+# invalidates every entry in the cache.
+_VERSIONED_MODULES = (module_ir, tokenizer)
+
+
+@simple_memoizer.memoize
+def _versioned_sources():
+    """Returns the sources of _VERSIONED_MODULES and their compiler imports.
+
+    The compiler modules imported by _VERSIONED_MODULES are found by following
+    the module objects in their globals, so that the list of versioned sources
+    cannot fall out of date when an import is added.
+
+    Returns:
+      A sorted tuple of (package, file) pairs, suitable for
+      resources.load_binary.
+    """
+    modules = {}
+    pending = list(_VERSIONED_MODULES)
+    while pending:
+        module = pending.pop()
+        if module.__name__ in modules:
+            continue
+        modules[module.__name__] = module
+        for value in vars(module).values():
+            if isinstance(value, types.ModuleType) and value.__name__.startswith(
+                "compiler."
+            ):
+                pending.append(value)
+    sources = []
+    for name, module in modules.items():
+        if hasattr(module, "__path__"):
+            sources.append((name, "__init__.py"))
+        else:
+            package, base_name = name.rsplit(".", 1)
+            sources.append((package, base_name + ".py"))
+    return tuple(sorted(sources))
+
+
+@simple_memoizer.memoize
+def compiler_version():
+    """Returns a hash identifying the module IRs this compiler produces."""
+    version = hashlib.sha256()
+    version.update(
+        "{} {}.{}\n".format(FORMAT_VERSION, *sys.version_info[:2]).encode("utf-8")
+    )
+    version.update(make_parser.grammar_hash())
+    for package, file in _versioned_sources():
+        version.update(resources.load_binary(package, file))
+    return version.hexdigest()
+
+
+class ModuleCache(object):
+    """An on-disk cache of module IRs, keyed by source text.
+
+    The cache is bounded by the total size of its entries: when an entry is
+    added and the cache exceeds max_size, the least-recently-used entries are
+    removed.  Entry recency is tracked with file modification times, which are
+    updated on every cache hit.
+
+    Errors reading or writing the cache directory are never fatal: they are
+    treated as cache misses.
+
+    Attributes:
+      directory: The cache directory.
+      max_size: The maximum total size of cache entries, in bytes.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def _path(self, source_code):
+        key = hashlib.sha256(compiler_version().encode("utf-8"))
+        key.update(source_code.encode("utf-8"))
+        return os.path.join(self.directory, key.hexdigest() + _ENTRY_SUFFIX)
+
+    def get(self, source_code):
+        """Returns the cached module IR for source_code, or None.
+
+        The returned module does not have source_text or source_file_name set.
+        """
+        path = self._path(source_code)
+        try:
+            with open(path, "rb") as f:
+                module = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:  # pylint:disable=broad-except
+            # A corrupt or unreadable entry should just be a cache miss.
+            _remove_if_present(path)
+            return None
+        return module
+
+    def put(self, source_code, module):
+        """Adds module as the module IR for source_code.
+
+        Arguments:
+          source_code: The text of the module.
+          module: The module IR produced from source_code.  Its source_text and
+            source_file_name should not be set, since they are not part of the
+            cache key.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(module, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(source_code))
+        except (OSError, pickle.PicklingError):
+            _remove_if_present(temp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        """Removes least-recently-used entries until the cache fits max_size."""
+        entries = []
+        total_size = 0
+        try:
+            with os.scandir(self.directory) as directory_entries:
+                for entry in directory_entries:
+                    if not entry.name.endswith(_ENTRY_SUFFIX):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+                    total_size += stat.st_size
+        except OSError:
+            return
+        entries.sort()
+        for _, path, size in entries:
+            if total_size <= self.max_size:
+                break
+            _remove_if_present(path)
+            total_size -= size
+
+
+class SharedModuleCache(object):
+    """An in-memory cache of module IRs, which can be sent to other processes.
+
+    Entries are stored pickled, so every get returns a fresh module IR which
+    the caller may modify, and a SharedModuleCache can be cheaply pickled in
+    order to hand already-parsed modules to worker processes.
+
+    Attributes:
+      backing_cache: An optional ModuleCache which is consulted on misses and
+        updated on puts.
+    """
+
+    def __init__(self, backing_cache=None):
+        self.backing_cache = backing_cache
+        self._entries = {}
+
+    def get(self, source_code):
+        """Returns the cached module IR for source_code, or None."""
+        data = self._entries.get(source_code)
+        if data is not None:
+            return pickle.loads(data)
+        if self.backing_cache is None:
+            return None
+        module = self.backing_cache.get(source_code)
+        if module is not None:
+            self._entries[source_code] = pickle.dumps(module, pickle.HIGHEST_PROTOCOL)
+        return module
+
+    def put(self, source_code, module):
+        """Adds module as the module IR for source_code; see ModuleCache.put."""
+        self._entries[source_code] = pickle.dumps(module, pickle.HIGHEST_PROTOCOL)
+        if self.backing_cache is not None:
+            self.backing_cache.put(source_code, module)
+
+
+def _remove_if_present(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,206 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module_cache."""
+
+import ast
+import os
+import pickle
+import tempfile
+import unittest
+
+from compiler.front_end import glue
+from compiler.front_end import module_cache
+from compiler.util import ir_data
+from compiler.util import resources
+from compiler.util import test_util
+
+
+def _make_module(name):
+    return ir_data.Module(
+        type=[
+            ir_data.TypeDefinition(
+                name=ir_data.NameDefinition(name=ir_data.Word(text=name))
+            )
+        ]
+    )
+
+
+class ModuleCacheTest(unittest.TestCase):
+    """Tests for module_cache.ModuleCache."""
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.cache_dir = os.path.join(self._directory.name, "cache")
+
+    def _entries(self):
+        return [
+            name
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(module_cache._ENTRY_SUFFIX)
+        ]
+
+    def test_miss_on_empty_cache(self):
+        cache = module_cache.ModuleCache(self.cache_dir)
+        self.assertIsNone(cache.get("struct Foo:\n"))
+
+    def test_round_trip(self):
+        cache = module_cache.ModuleCache(self.cache_dir)
+        module = _make_module("Foo")
+        cache.put("source", module)
+        self.assertEqual(module, cache.get("source"))
+        self.assertIsNone(cache.get("other source"))
+        # A separate ModuleCache for the same directory should see the entry.
+        self.assertEqual(module, module_cache.ModuleCache(self.cache_dir).get("source"))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = module_cache.ModuleCache(self.cache_dir)
+        cache.put("source", _make_module("Foo"))
+        (entry,) = self._entries()
+        with open(os.path.join(self.cache_dir, entry), "wb") as f:
+            f.write(b"not a pickle")
+        self.assertIsNone(cache.get("source"))
+        self.assertEqual([], self._entries())
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = module_cache.ModuleCache(self.cache_dir)
+        for i in range(3):
+            cache.put(str(i), _make_module("Foo{}".format(i)))
+        entry_size = os.path.getsize(cache._path("0"))
+        # Make "0" the most recently used entry, and "1" the least.
+        for i, age in ((0, 1), (1, 3), (2, 2)):
+            timestamp = os.path.getmtime(cache._path(str(i))) - age * 100
+            os.utime(cache._path(str(i)), (timestamp, timestamp))
+        cache.get("0")
+        cache.max_size = entry_size * 3
+        cache.put("3", _make_module("Foo3"))
+        self.assertIsNone(cache.get("1"))
+        self.assertIsNotNone(cache.get("0"))
+        self.assertIsNotNone(cache.get("2"))
+        self.assertIsNotNone(cache.get("3"))
+
+    def test_unwritable_cache_is_not_an_error(self):
+        path = os.path.join(self._directory.name, "file")
+        with open(path, "w") as f:
+            f.write("")
+        cache = module_cache.ModuleCache(os.path.join(path, "cache"))
+        cache.put("source", _make_module("Foo"))
+        self.assertIsNone(cache.get("source"))
+
+    def test_parse_module_text_uses_cache(self):
+        cache = module_cache.ModuleCache(self.cache_dir)
+        source = "struct NotActuallyParsed:\n  0 [+1]  UInt  x\n"
+        cache.put(source, _make_module("FromCache"))
+        ir, debug_info, errors = glue.parse_module_text(source, "m.emb", cache)
+        self.assertEqual([], errors)
+        self.assertEqual("FromCache", ir.type[0].name.name.text)
+        self.assertEqual(source, ir.source_text)
+        self.assertEqual("m.emb", ir.source_file_name)
+        self.assertIsNone(debug_info.parse_tree)
+
+    def test_parse_emboss_file_populates_cache(self):
+        cache = module_cache.ModuleCache(self.cache_dir)
+        source = "struct ModuleCacheTestStruct:\n  0 [+1]  UInt  x\n"
+        ir, _, errors = glue.parse_emboss_file(
+            "m.emb", test_util.dict_file_reader({"m.emb": source}), module_cache=cache
+        )
+        self.assertEqual([], errors)
+        cached_module = cache.get(source)
+        self.assertEqual("ModuleCacheTestStruct", cached_module.type[0].name.name.text)
+
+
+class SharedModuleCacheTest(unittest.TestCase):
+    """Tests for module_cache.SharedModuleCache."""
+
+    def test_get_returns_copies(self):
+        cache = module_cache.SharedModuleCache()
+        module = _make_module("Foo")
+        cache.put("source", module)
+        first = cache.get("source")
+        self.assertEqual(module, first)
+        first.type[0].name.name.text = "Bar"
+        self.assertEqual(module, cache.get("source"))
+        self.assertIsNone(cache.get("other source"))
+
+    def test_pickled_cache_keeps_entries(self):
+        cache = module_cache.SharedModuleCache()
+        cache.put("source", _make_module("Foo"))
+        unpickled_cache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(_make_module("Foo"), unpickled_cache.get("source"))
+
+    def test_backing_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            backing_cache = module_cache.ModuleCache(directory)
+            backing_cache.put("old source", _make_module("Old"))
+            cache = module_cache.SharedModuleCache(backing_cache)
+            self.assertEqual(_make_module("Old"), cache.get("old source"))
+            cache.put("new source", _make_module("New"))
+            self.assertEqual(_make_module("New"), backing_cache.get("new source"))
+
+
+def _compiler_imports(package, file):
+    """Returns the (package, file) of each compiler module imported by file."""
+    imports = set()
+    tree = ast.parse(resources.load(package, file))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module + "." + alias.name for alias in node.names]
+        elif isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        else:
+            continue
+        for name in names:
+            if name.startswith("compiler."):
+                imported_package, base_name = name.rsplit(".", 1)
+                imports.add((imported_package, base_name + ".py"))
+    return imports
+
+
+class CompilerVersionTest(unittest.TestCase):
+    """Tests for module_cache.compiler_version."""
+
+    def test_versioned_sources_include_all_imports(self):
+        # Every compiler module which module_ir or tokenizer (transitively)
+        # imports can change the module IRs in the cache, so all of them must
+        # be part of the compiler version.
+        versioned_sources = set(module_cache._versioned_sources())
+        pending = [
+            ("compiler.front_end", "module_ir.py"),
+            ("compiler.front_end", "tokenizer.py"),
+        ]
+        seen = set()
+        while pending:
+            source = pending.pop()
+            if source in seen:
+                continue
+            seen.add(source)
+            self.assertIn(source, versioned_sources)
+            pending.extend(_compiler_imports(*source))
+        for source in (
+            ("compiler.util", "ir_data_utils.py"),
+            ("compiler.util", "name_conversion.py"),
+            ("compiler.util", "parser_util.py"),
+        ):
+            self.assertIn(source, versioned_sources)
+
+    def test_compiler_version_is_stable(self):
+        self.assertEqual(
+            module_cache.compiler_version(), module_cache.compiler_version()
+        )
+        self.assertEqual(64, len(module_cache.compiler_version()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,7 @@ fed to lr1.Grammar in order to create a parser for the Emboss language.
 
 import re
 import sys
+import threading
 
 from compiler.util import ir_data
 from compiler.util import ir_data_utils
@@ -133,6 +134,10 @@ def build_ir(parse_tree, used_productions=None):
         constraints checked, fields synthesized, etc.; it will only be a
         representation of the syntactic elements of the source.
     """
+    # Anonymous fields are numbered from 1 in each module, so that a module's
+    # IR does not depend on which modules were built before it, or in which
+    # thread or process.
+    _anonymous_names.counter = 0
     handlers = {}
     for production, handler in _handlers.items():
         # An extra layer of indirection is required here so that the resulting
@@ -160,13 +165,13 @@ def build_ir(parse_tree, used_productions=None):
 # Map of productions to their handlers.
 _handlers = {}
 
-_anonymous_name_counter = 0
+# The number of anonymous fields named so far by build_ir in each thread.
+_anonymous_names = threading.local()
 
 
 def _get_anonymous_field_name():
-    global _anonymous_name_counter
-    _anonymous_name_counter += 1
-    return "emboss_reserved_anonymous_field_{}".format(_anonymous_name_counter)
+    _anonymous_names.counter += 1
+    return "emboss_reserved_anonymous_field_{}".format(_anonymous_names.counter)
 
 
 def _handles(production_text):
@@ -864,7 +869,7 @@ def _structure(struct, name, parameters, colon, comment, newline, struct_body):
     else:
         struct_body.name = ir_data_utils.copy(name)
     if parameters.list:
-        struct_body.runtime_parameter.extend(parameters.list[0].list)
+        struct_body.runtime_parameter.shallow_copy(parameters.list[0].list)
     return struct_body
 
 
@@ -1076,8 +1081,8 @@ def _field(
     )
     field = ir_data_utils.builder(field_ir)
     if field_body.list:
-        field.attribute.extend(field_body.list[0].attribute)
-        field.documentation.extend(field_body.list[0].documentation)
+        field.attribute.shallow_copy(field_body.list[0].attribute)
+        field.documentation.shallow_copy(field_body.list[0].documentation)
     if abbreviation.list:
         field.abbreviation.CopyFrom(abbreviation.list[0])
     field.source_location = parser_types.merge_source_locations(
@@ -1101,8 +1106,8 @@ def _virtual_field(let, name, equals, value, comment, newline, field_body):
     field_ir = ir_data.Field(read_transform=value, name=name)
     field = ir_data_utils.builder(field_ir)
     if field_body.list:
-        field.attribute.extend(field_body.list[0].attribute)
-        field.documentation.extend(field_body.list[0].documentation)
+        field.attribute.shallow_copy(field_body.list[0].attribute)
+        field.documentation.shallow_copy(field_body.list[0].documentation)
     field.source_location = parser_types.merge_source_locations(
         let, newline, field_body
     )
@@ -1461,7 +1466,7 @@ def _module_qualified_constant_reference(new_head, dot, reference):
     del dot  # Unused.
     new_source_name = list(new_head.source_name) + list(reference.source_name)
     del reference.source_name[:]
-    reference.source_name.extend(new_source_name)
+    reference.source_name.shallow_copy(new_source_name)
     return reference
 
 
@@ -1476,7 +1481,7 @@ def _qualified_reference(word, dot, reference):
     del dot  # Unused.
     new_source_name = [word] + list(reference.source_name)
     del reference.source_name[:]
-    reference.source_name.extend(new_source_name)
+    reference.source_name.shallow_copy(new_source_name)
     return reference
 
 
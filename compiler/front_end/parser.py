@@ -16,11 +16,12 @@
 
 import collections
 
-from compiler.front_end.generated import cached_parser
 from compiler.front_end import lr1
 from compiler.front_end import make_parser
 from compiler.front_end import module_ir
+from compiler.front_end import parser_tables
 from compiler.util import parser_types
+from compiler.util import resources
 from compiler.util import simple_memoizer
 
 ParserAndIsCached = collections.namedtuple(
@@ -32,8 +33,31 @@ ParserAndIsCached = collections.namedtuple(
 )
 
 
+@simple_memoizer.memoize
+def _load_parser_tables():
+    """Returns the binary parser tables, or None if they are missing or stale.
+
+    Checking the tables only requires hashing module_ir.PRODUCTIONS, which is
+    much cheaper than importing generated/cached_parser.py, so the binary tables
+    are preferred when they are up to date.
+    """
+    try:
+        tables = parser_tables.ParserTables(
+            resources.load_binary("compiler.front_end.generated", "cached_parser.bin")
+        )
+    except (IOError, parser_tables.FormatError):
+        return None
+    if tables.grammar_hash != make_parser.grammar_hash():
+        return None
+    return tables
+
+
 @simple_memoizer.memoize
 def _load_module_parser():
+    # The Python cached parser is only used if the binary tables are unusable,
+    # so it is imported lazily: importing it is expensive.
+    from compiler.front_end.generated import cached_parser
+
     module_parser = cached_parser.module_parser()
     module_ir_productions = set(module_ir.PRODUCTIONS) | {
         parser_types.Production(lr1.START_PRIME, (module_ir.START_SYMBOL,))
@@ -51,6 +75,8 @@ def _load_module_parser():
 
 @simple_memoizer.memoize
 def _load_expression_parser():
+    from compiler.front_end.generated import cached_parser
+
     expression_parser = cached_parser.expression_parser()
     module_ir_productions = set(module_ir.PRODUCTIONS) | {
         parser_types.Production(lr1.START_PRIME, (module_ir.EXPRESSION_START_SYMBOL,))
@@ -70,14 +96,38 @@ def _load_expression_parser():
 
 
 def module_parser_cache_mismatch():
+    if _load_parser_tables() is not None:
+        return (set(), set())
     return _load_module_parser().cache_mismatch
 
 
+@simple_memoizer.memoize
+def _load_compiled_module_parser():
+    tables = _load_parser_tables()
+    if tables is not None:
+        try:
+            return tables.parser("module")
+        except (KeyError, parser_tables.FormatError):
+            pass
+    return _load_module_parser().parser.compile()
+
+
+@simple_memoizer.memoize
+def _load_compiled_expression_parser():
+    tables = _load_parser_tables()
+    if tables is not None:
+        try:
+            return tables.parser("expression")
+        except (KeyError, parser_tables.FormatError):
+            pass
+    return _load_expression_parser().parser.compile()
+
+
 def parse_module(tokens):
     """Parses the provided Emboss token list into an Emboss module parse tree."""
-    return _load_module_parser().parser.parse(tokens)
+    return _load_compiled_module_parser().parse(tokens)
 
 
 def parse_expression(tokens):
     """Parses the provided Emboss token list into an expression parse tree."""
-    return _load_expression_parser().parser.parse(tokens)
+    return _load_compiled_expression_parser().parse(tokens)
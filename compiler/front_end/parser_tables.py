@@ -0,0 +1,276 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Binary serialization of lr1.CompiledParser tables.
+
+A parser table file holds one or more named CompiledParsers, along with a hash
+of the grammar they were generated from.  The file layout (all integers are
+little-endian) is:
+
+    header:     magic (4 bytes), format version (uint32), grammar hash
+                (32 bytes), section count (uint32)
+    directory:  for each section: name length (uint16), UTF-8 name, offset from
+                start of file (uint32), length (uint32)
+    sections:   zlib-compressed parser tables, one per section
+
+Each section is decompressed and turned into a CompiledParser only when it is
+first requested, so that clients only pay for the parsers they use.  The
+decompressed section layout is:
+
+    counts:     state count, terminal count, nonterminal count, production
+                count, string table length (bytes), error code count, default
+                error count (int32 each)
+    strings:    NUL-separated UTF-8 strings: all terminals, then all
+                nonterminals, then any other strings
+    productions: for each production: lhs string index, rhs length, rhs string
+                indexes (int32 each)
+    errors:     (state, terminal index, string index) triples (int32 each)
+    defaults:   (state, string index) pairs (int32 each)
+    action:     the CompiledParser action table (int32 each)
+    goto:       the CompiledParser goto table (int32 each)
+"""
+
+import array
+import hashlib
+import struct
+import sys
+import zlib
+
+from compiler.front_end import lr1
+from compiler.util import parser_types
+
+# FORMAT_VERSION must be incremented any time the file layout changes.
+FORMAT_VERSION = 1
+
+_MAGIC = b"EMBP"
+_HEADER = struct.Struct("<4sI32sI")
+_NAME_LENGTH = struct.Struct("<H")
+_SECTION_EXTENT = struct.Struct("<II")
+_COUNTS = struct.Struct("<7i")
+
+
+class FormatError(Exception):
+    """Parser table data is malformed or has an unsupported version."""
+
+    pass
+
+
+def grammar_hash(productions):
+    """Returns a hash which identifies a set of grammar productions.
+
+    Arguments:
+      productions: An iterable of parser_types.Production.  Order and duplicates
+        do not affect the result.
+
+    Returns:
+      A 32-byte SHA-256 digest.
+    """
+    lines = sorted(set(repr(tuple(production)) for production in productions))
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).digest()
+
+
+def _int_array_to_bytes(values):
+    ints = array.array("i", values)
+    if sys.byteorder != "little":
+        ints.byteswap()
+    return ints.tobytes()
+
+
+def _int_array_from_bytes(data, offset, count):
+    ints = array.array("i")
+    ints.frombytes(data[offset : offset + count * ints.itemsize])
+    if sys.byteorder != "little":
+        ints.byteswap()
+    return ints, offset + count * ints.itemsize
+
+
+def _serialize_parser(parser):
+    """Returns the uncompressed section bytes for a CompiledParser."""
+    strings = list(parser.terminals) + list(parser.nonterminals)
+    string_index = {s: i for i, s in enumerate(strings)}
+
+    def index(s):
+        if s not in string_index:
+            string_index[s] = len(strings)
+            strings.append(s)
+        return string_index[s]
+
+    production_ints = []
+    for production in parser.productions:
+        production_ints.append(index(production.lhs))
+        production_ints.append(len(production.rhs))
+        production_ints.extend(index(symbol) for symbol in production.rhs)
+    error_ints = []
+    for (state, terminal), code in sorted(parser.error_codes.items()):
+        error_ints.extend((state, terminal, index(code)))
+    default_error_ints = []
+    for state, code in sorted(parser.default_errors.items()):
+        default_error_ints.extend((state, index(code)))
+    string_bytes = "\0".join(strings).encode("utf-8")
+    return b"".join(
+        [
+            _COUNTS.pack(
+                len(parser.action) // (len(parser.terminals) + 1),
+                len(parser.terminals),
+                len(parser.nonterminals),
+                len(parser.productions),
+                len(string_bytes),
+                len(parser.error_codes),
+                len(parser.default_errors),
+            ),
+            string_bytes,
+            _int_array_to_bytes(production_ints),
+            _int_array_to_bytes(error_ints),
+            _int_array_to_bytes(default_error_ints),
+            _int_array_to_bytes(parser.action),
+            _int_array_to_bytes(parser.goto),
+        ]
+    )
+
+
+def _deserialize_parser(data):
+    """Returns a CompiledParser from uncompressed section bytes."""
+    (
+        state_count,
+        terminal_count,
+        nonterminal_count,
+        production_count,
+        string_bytes_length,
+        error_count,
+        default_error_count,
+    ) = _COUNTS.unpack_from(data)
+    offset = _COUNTS.size
+    strings = data[offset : offset + string_bytes_length].decode("utf-8").split("\0")
+    offset += string_bytes_length
+    productions = []
+    for _ in range(production_count):
+        (lhs, rhs_length), offset = _int_array_from_bytes(data, offset, 2)
+        rhs, offset = _int_array_from_bytes(data, offset, rhs_length)
+        productions.append(
+            parser_types.Production(strings[lhs], tuple(strings[i] for i in rhs))
+        )
+    error_ints, offset = _int_array_from_bytes(data, offset, error_count * 3)
+    error_codes = {
+        (error_ints[i], error_ints[i + 1]): strings[error_ints[i + 2]]
+        for i in range(0, len(error_ints), 3)
+    }
+    default_error_ints, offset = _int_array_from_bytes(
+        data, offset, default_error_count * 2
+    )
+    default_errors = {
+        default_error_ints[i]: strings[default_error_ints[i + 1]]
+        for i in range(0, len(default_error_ints), 2)
+    }
+    action, offset = _int_array_from_bytes(
+        data, offset, state_count * (terminal_count + 1)
+    )
+    goto, offset = _int_array_from_bytes(data, offset, state_count * nonterminal_count)
+    if offset != len(data):
+        raise FormatError("Parser table section has wrong length.")
+    return lr1.CompiledParser(
+        tuple(strings[:terminal_count]),
+        tuple(strings[terminal_count : terminal_count + nonterminal_count]),
+        tuple(productions),
+        action,
+        goto,
+        error_codes,
+        default_errors,
+    )
+
+
+def serialize(parsers, hash_of_grammar):
+    """Serializes CompiledParsers to parser table file contents.
+
+    Arguments:
+      parsers: A list of (name, CompiledParser) pairs.
+      hash_of_grammar: The result of grammar_hash() for the grammar from which
+        the parsers were generated.
+
+    Returns:
+      The bytes of a parser table file.
+    """
+    names = [name.encode("utf-8") for name, _ in parsers]
+    sections = [zlib.compress(_serialize_parser(parser), 9) for _, parser in parsers]
+    offset = (
+        _HEADER.size
+        + sum(_NAME_LENGTH.size + len(name) for name in names)
+        + len(names) * _SECTION_EXTENT.size
+    )
+    result = [_HEADER.pack(_MAGIC, FORMAT_VERSION, hash_of_grammar, len(names))]
+    for name, section in zip(names, sections):
+        result += [
+            _NAME_LENGTH.pack(len(name)),
+            name,
+            _SECTION_EXTENT.pack(offset, len(section)),
+        ]
+        offset += len(section)
+    return b"".join(result + sections)
+
+
+class ParserTables(object):
+    """ParserTables provides lazy access to the parsers in a parser table file.
+
+    Attributes:
+      grammar_hash: The grammar hash recorded in the file.
+      names: The names of the parsers in the file.
+    """
+
+    def __init__(self, data):
+        """Reads the header and directory of a parser table file.
+
+        Arguments:
+          data: The bytes of a parser table file.  Any object supporting the
+            buffer protocol, such as an mmap, may be used.
+
+        Raises:
+          FormatError: data is not a parser table file, or has the wrong version.
+        """
+        if len(data) < _HEADER.size:
+            raise FormatError("Parser table file is truncated.")
+        magic, version, hash_of_grammar, section_count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise FormatError("Not a parser table file.")
+        if version != FORMAT_VERSION:
+            raise FormatError(
+                "Unsupported parser table version {} (expected {}).".format(
+                    version, FORMAT_VERSION
+                )
+            )
+        self.grammar_hash = hash_of_grammar
+        self._data = data
+        self._sections = {}
+        self._parsers = {}
+        offset = _HEADER.size
+        try:
+            for _ in range(section_count):
+                (name_length,) = _NAME_LENGTH.unpack_from(data, offset)
+                offset += _NAME_LENGTH.size
+                name = bytes(data[offset : offset + name_length]).decode("utf-8")
+                offset += name_length
+                self._sections[name] = _SECTION_EXTENT.unpack_from(data, offset)
+                offset += _SECTION_EXTENT.size
+        except struct.error:
+            raise FormatError("Parser table file is truncated.")
+        self.names = tuple(self._sections)
+
+    def parser(self, name):
+        """Returns the CompiledParser named `name`, unpacking it if necessary."""
+        if name not in self._parsers:
+            offset, length = self._sections[name]
+            try:
+                section = zlib.decompress(self._data[offset : offset + length])
+                self._parsers[name] = _deserialize_parser(section)
+            except (zlib.error, struct.error, UnicodeDecodeError, IndexError):
+                raise FormatError("Parser table section {} is corrupt.".format(name))
+        return self._parsers[name]
@@ -0,0 +1,129 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for parser_tables."""
+
+import collections
+import unittest
+
+from compiler.front_end import lr1
+from compiler.front_end import parser_tables
+from compiler.util import parser_types
+
+Token = collections.namedtuple("Token", ["symbol", "source_location"])
+
+
+def _tokenize(text):
+    """ "Tokenizes" text by making each character into a token."""
+    return [
+        Token(text[i], parser_types.SourceLocation((1, i + 1), (1, i + 2)))
+        for i in range(len(text))
+    ]
+
+
+def _parse_productions(text):
+    """Parses text into a grammar by calling Production.parse on each line."""
+    return [parser_types.Production.parse(line) for line in text.splitlines()]
+
+
+_PRODUCTIONS = _parse_productions(
+    """S -> C C
+       C -> c C
+       C -> d"""
+)
+
+
+def _make_parser():
+    parser = lr1.Grammar("S", _PRODUCTIONS).parser()
+    assert parser.mark_error(_tokenize("cccdc"), None, "missing last d") is None
+    assert parser.mark_error([lr1.ANY_TOKEN], lr1.ANY_TOKEN, "default error") is None
+    return parser
+
+
+class ParserTablesTest(unittest.TestCase):
+    """Tests for parser_tables serialization."""
+
+    def test_round_trip(self):
+        parser = _make_parser()
+        compiled_parser = parser.compile()
+        tables = parser_tables.ParserTables(
+            parser_tables.serialize(
+                [("main", compiled_parser)], parser_tables.grammar_hash(_PRODUCTIONS)
+            )
+        )
+        self.assertEqual(("main",), tables.names)
+        loaded_parser = tables.parser("main")
+        self.assertEqual(compiled_parser.terminals, loaded_parser.terminals)
+        self.assertEqual(compiled_parser.nonterminals, loaded_parser.nonterminals)
+        self.assertEqual(compiled_parser.productions, loaded_parser.productions)
+        self.assertEqual(compiled_parser.action, loaded_parser.action)
+        self.assertEqual(compiled_parser.goto, loaded_parser.goto)
+        self.assertEqual(compiled_parser.error_codes, loaded_parser.error_codes)
+        self.assertEqual(compiled_parser.default_errors, loaded_parser.default_errors)
+        for text in ("cccdcd", "dd", "d", "cccdc", "z", ""):
+            self.assertEqual(
+                parser.parse(_tokenize(text)), loaded_parser.parse(_tokenize(text))
+            )
+
+    def test_multiple_sections_are_loaded_lazily(self):
+        compiled_parser = _make_parser().compile()
+        tables = parser_tables.ParserTables(
+            parser_tables.serialize(
+                [("a", compiled_parser), ("b", compiled_parser)],
+                parser_tables.grammar_hash(_PRODUCTIONS),
+            )
+        )
+        self.assertEqual(("a", "b"), tables.names)
+        self.assertEqual({}, tables._parsers)
+        self.assertIs(tables.parser("b"), tables.parser("b"))
+        self.assertEqual(["b"], list(tables._parsers))
+
+    def test_grammar_hash(self):
+        self.assertEqual(
+            parser_tables.grammar_hash(_PRODUCTIONS),
+            parser_tables.grammar_hash(list(reversed(_PRODUCTIONS)) + _PRODUCTIONS),
+        )
+        self.assertNotEqual(
+            parser_tables.grammar_hash(_PRODUCTIONS),
+            parser_tables.grammar_hash(_PRODUCTIONS[1:]),
+        )
+        tables = parser_tables.ParserTables(
+            parser_tables.serialize([], parser_tables.grammar_hash(_PRODUCTIONS))
+        )
+        self.assertEqual(parser_tables.grammar_hash(_PRODUCTIONS), tables.grammar_hash)
+
+    def test_bad_magic(self):
+        data = parser_tables.serialize([], parser_tables.grammar_hash(_PRODUCTIONS))
+        with self.assertRaises(parser_tables.FormatError):
+            parser_tables.ParserTables(b"XXXX" + data[4:])
+
+    def test_bad_version(self):
+        data = parser_tables.serialize([], parser_tables.grammar_hash(_PRODUCTIONS))
+        with self.assertRaises(parser_tables.FormatError):
+            parser_tables.ParserTables(data[:4] + b"\xff\xff\xff\xff" + data[8:])
+
+    def test_truncated_file(self):
+        data = parser_tables.serialize(
+            [("main", _make_parser().compile())],
+            parser_tables.grammar_hash(_PRODUCTIONS),
+        )
+        with self.assertRaises(parser_tables.FormatError):
+            parser_tables.ParserTables(data[:10])
+        tables = parser_tables.ParserTables(data[:-10])
+        with self.assertRaises(parser_tables.FormatError):
+            tables.parser("main")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -255,35 +255,34 @@ def _construct_symbol_tables(ir):
         # collision for `$size_in_bytes`, since there are two `Foo.$size_in_bytes`.
         return symbol_tables, errors
 
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.EnumValue],
-        _add_enum_value_to_scope,
-        incidental_actions={
-            ir_data.Module: _set_scope_for_module,
-            ir_data.TypeDefinition: _set_scope_for_type_definition,
-        },
-        parameters={"errors": errors, "scope": symbol_tables},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Field],
-        _add_struct_field_to_scope,
-        incidental_actions={
-            ir_data.Module: _set_scope_for_module,
-            ir_data.TypeDefinition: _set_scope_for_type_definition,
-        },
-        parameters={"errors": errors, "scope": symbol_tables},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
+    # Enum values, fields, and runtime parameters are added to each type's scope
+    # in the same order as if they were added in three separate traversals.
+    incidental_actions = {
+        ir_data.Module: _set_scope_for_module,
+        ir_data.TypeDefinition: _set_scope_for_type_definition,
+    }
+    errors += traverse_ir.fast_traverse_ir_top_down_collecting_errors(
         ir,
-        [ir_data.RuntimeParameter],
-        _add_parameter_name_to_scope,
-        incidental_actions={
-            ir_data.Module: _set_scope_for_module,
-            ir_data.TypeDefinition: _set_scope_for_type_definition,
-        },
-        parameters={"errors": errors, "scope": symbol_tables},
+        [
+            traverse_ir.Visitor(
+                [ir_data.EnumValue],
+                _add_enum_value_to_scope,
+                incidental_actions=incidental_actions,
+                parameters={"scope": symbol_tables},
+            ),
+            traverse_ir.Visitor(
+                [ir_data.Field],
+                _add_struct_field_to_scope,
+                incidental_actions=incidental_actions,
+                parameters={"scope": symbol_tables},
+            ),
+            traverse_ir.Visitor(
+                [ir_data.RuntimeParameter],
+                _add_parameter_name_to_scope,
+                incidental_actions=incidental_actions,
+                parameters={"scope": symbol_tables},
+            ),
+        ],
     )
     return symbol_tables, errors
 
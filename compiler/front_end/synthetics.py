@@ -156,7 +156,7 @@ def _add_anonymous_aliases(structure, type_definition):
             if subfield.has_field("abbreviation"):
                 _mark_as_synthetic(subfield.abbreviation)
     del structure.field[:]
-    structure.field.extend(new_fields)
+    structure.field.shallow_copy(new_fields)
 
 
 _SIZE_BOUNDS = {
@@ -217,7 +217,7 @@ def _add_size_virtuals(structure, type_definition):
         size_clause.function.args[1].function.args[1].CopyFrom(field.location.size)
         size_clauses.append(size_clause_ir)
     size_expression = ir_data_utils.copy(_SIZE_SKELETON)
-    size_expression.function.args.extend(size_clauses)
+    size_expression.function.args.shallow_copy(size_clauses)
     _mark_as_synthetic(size_expression)
     size_field = ir_data.Field(
         read_transform=size_expression,
@@ -227,7 +227,7 @@ def _add_size_virtuals(structure, type_definition):
         ),
         attribute=[_skip_text_output_attribute()],
     )
-    structure.field.extend([size_field])
+    structure.field.shallow_copy([size_field])
 
 
 # The replacement for the "$next" keyword is a simple "start + size" expression.
@@ -366,4 +366,5 @@ def desugar(ir):
     traverse_ir.fast_traverse_ir_top_down(
         ir, [ir_data.Structure], _add_virtuals_to_structure
     )
+    ir_util.invalidate_object_index(ir)
     return []
@@ -204,6 +204,44 @@ REGEX_TOKEN_PATTERNS = [
 del _T
 
 
+def _build_token_matcher():
+    """Builds a single regex which matches every token pattern at once.
+
+    Each alternative in LITERAL_TOKEN_PATTERNS and REGEX_TOKEN_PATTERNS is
+    wrapped in an optional lookahead group, so that one call to `match` reports
+    the extent of every pattern at a given offset.  All literals share a single
+    group: they are tried longest-first, so the group always holds the longest
+    matching literal.
+
+    Returns:
+      A tuple of:
+        The compiled master regex.
+        A list mapping each group index in the master regex to the symbol for
+          tokens matched by that group.  Literal tokens map to "", since their
+          symbol depends on the matched text.
+    """
+    literals = sorted(LITERAL_TOKEN_PATTERNS, key=len, reverse=True)
+    parts = ["(?=({}))?".format("|".join(re.escape(l) for l in literals))]
+    group_symbols = [None, ""]
+    for pattern in REGEX_TOKEN_PATTERNS:
+        # _tokenize_line relies on every group of the master regex being one of
+        # the wrapping groups, which all start at the same offset.  A capturing
+        # group inside of a pattern could start later, and would then win max().
+        assert (
+            pattern.regex.groups == 0
+        ), "Token pattern {!r} must not have capturing groups.".format(
+            pattern.regex.pattern
+        )
+        parts.append("(?=({}))?".format(pattern.regex.pattern))
+        group_symbols.append(pattern.symbol)
+    return re.compile("".join(parts)), group_symbols
+
+
+# _TOKEN_MATCHER is built once, at import time, so that _tokenize_line only has
+# to make a single regex call per token.
+_TOKEN_MATCHER, _GROUP_SYMBOLS = _build_token_matcher()
+
+
 def _tokenize_line(line, line_number, file_name):
     """Tokenizes a single line of input.
 
@@ -219,33 +257,22 @@ def _tokenize_line(line, line_number, file_name):
     """
     tokens = []
     offset = 0
+    match = _TOKEN_MATCHER.match
     while offset < len(line):
-        best_candidate = ""
-        best_candidate_symbol = None
         # Find the longest match.  Ties go to the first match.  This way, keywords
         # ("struct") are matched as themselves, but words that only happen to start
         # with keywords ("structure") are matched as words.
         #
-        # There is never a reason to try to match a literal after a regex that
-        # could also match that literal, so check literals first.
-        for literal in LITERAL_TOKEN_PATTERNS:
-            if line[offset:].startswith(literal) and len(literal) > len(best_candidate):
-                best_candidate = literal
-                # For Emboss, the name of a literal token is just the literal in quotes,
-                # so that the grammar can read a little more naturally, e.g.:
-                #
-                #     expression -> expression "+" expression
-                #
-                # instead of
-                #
-                #     expression -> expression Plus expression
-                best_candidate_symbol = '"' + literal + '"'
-        for pattern in REGEX_TOKEN_PATTERNS:
-            match_result = pattern.regex.match(line[offset:])
-            if match_result and len(match_result.group(0)) > len(best_candidate):
-                best_candidate = match_result.group(0)
-                best_candidate_symbol = pattern.symbol
-        if not best_candidate:
+        # Each group in regs after regs[0] wraps one lookahead pattern, so it
+        # either starts at offset or is (-1, -1) if its pattern did not match.
+        # (_build_token_matcher rejects patterns with their own groups.)  Since
+        # all start offsets are equal, max() finds the longest match, and index()
+        # finds the first group with that match.  regs[0] is the (empty) overall
+        # match, so if no pattern matched, best_span will be (offset, offset).
+        regs = match(line, offset).regs
+        best_span = max(regs)
+        end = best_span[1]
+        if end == offset:
             return None, [
                 [
                     error.error(
@@ -257,16 +284,28 @@ def _tokenize_line(line, line_number, file_name):
                     )
                 ]
             ]
-        if best_candidate_symbol:
+        symbol = _GROUP_SYMBOLS[regs.index(best_span)]
+        if symbol is not None:
+            text = line[offset:end]
+            if not symbol:
+                # For Emboss, the name of a literal token is just the literal in
+                # quotes, so that the grammar can read a little more naturally,
+                # e.g.:
+                #
+                #     expression -> expression "+" expression
+                #
+                # instead of
+                #
+                #     expression -> expression Plus expression
+                symbol = '"' + text + '"'
             tokens.append(
                 parser_types.Token(
-                    best_candidate_symbol,
-                    best_candidate,
+                    symbol,
+                    text,
                     parser_types.SourceLocation(
-                        (line_number, offset + 1),
-                        (line_number, offset + len(best_candidate) + 1),
+                        (line_number, offset + 1), (line_number, end + 1)
                     ),
                 )
             )
-        offset += len(best_candidate)
+        offset = end
     return tokens, None
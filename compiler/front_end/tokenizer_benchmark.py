@@ -0,0 +1,168 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks tokenizer.tokenize against the original per-offset tokenizer.
+
+Usage:
+
+    python3 -m compiler.front_end.tokenizer_benchmark [--repeat N] [file.emb...]
+
+If no files are given, every .emb file under testdata/ is used.  Each file is
+tokenized by both implementations, the results are checked for equality, and
+the total time taken by each implementation is printed.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+from compiler.front_end import tokenizer
+from compiler.util import error
+from compiler.util import parser_types
+
+
+def _reference_tokenize_line(line, line_number, file_name):
+    """Tokenizes a line by trying every pattern at every offset.
+
+    This is the original implementation of tokenizer._tokenize_line, which is
+    kept here as a baseline for benchmarks and cross-checks.
+    """
+    tokens = []
+    offset = 0
+    while offset < len(line):
+        best_candidate = ""
+        best_candidate_symbol = None
+        for literal in tokenizer.LITERAL_TOKEN_PATTERNS:
+            if line[offset:].startswith(literal) and len(literal) > len(best_candidate):
+                best_candidate = literal
+                best_candidate_symbol = '"' + literal + '"'
+        for pattern in tokenizer.REGEX_TOKEN_PATTERNS:
+            match_result = pattern.regex.match(line[offset:])
+            if match_result and len(match_result.group(0)) > len(best_candidate):
+                best_candidate = match_result.group(0)
+                best_candidate_symbol = pattern.symbol
+        if not best_candidate:
+            return None, [
+                [
+                    error.error(
+                        file_name,
+                        parser_types.SourceLocation(
+                            (line_number, offset + 1), (line_number, offset + 2)
+                        ),
+                        "Unrecognized token",
+                    )
+                ]
+            ]
+        if best_candidate_symbol:
+            tokens.append(
+                parser_types.Token(
+                    best_candidate_symbol,
+                    best_candidate,
+                    parser_types.SourceLocation(
+                        (line_number, offset + 1),
+                        (line_number, offset + len(best_candidate) + 1),
+                    ),
+                )
+            )
+        offset += len(best_candidate)
+    return tokens, None
+
+
+def _tokenize_lines(tokenize_line, lines, file_name):
+    """Runs tokenize_line over every line in lines."""
+    return [
+        tokenize_line(line, line_number + 1, file_name)
+        for line_number, line in enumerate(lines)
+    ]
+
+
+def _find_default_inputs():
+    """Returns the paths of all .emb files under testdata/."""
+    testdata = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "..", "testdata"
+    )
+    result = []
+    for root, _, files in os.walk(testdata):
+        for name in sorted(files):
+            if name.endswith(".emb"):
+                result.append(os.path.normpath(os.path.join(root, name)))
+    return sorted(result)
+
+
+def _parse_command_line(argv):
+    """Parses the given command-line arguments."""
+    argparser = argparse.ArgumentParser(
+        description="Emboss tokenizer benchmark.", prog=argv[0]
+    )
+    argparser.add_argument(
+        "input_file", type=str, nargs="*", help=".emb files to tokenize."
+    )
+    argparser.add_argument(
+        "--repeat",
+        type=int,
+        default=20,
+        help="Number of times to tokenize each input with each implementation.",
+    )
+    return argparser.parse_args(argv[1:])
+
+
+def main(argv):
+    flags = _parse_command_line(argv)
+    inputs = flags.input_file or _find_default_inputs()
+    sources = {}
+    for file_name in inputs:
+        with open(file_name) as f:
+            sources[file_name] = f.read().splitlines()
+
+    total_lines = sum(len(lines) for lines in sources.values())
+    for file_name, lines in sources.items():
+        expected = _tokenize_lines(_reference_tokenize_line, lines, file_name)
+        actual = _tokenize_lines(tokenizer._tokenize_line, lines, file_name)
+        if expected != actual:
+            print("Token mismatch in {}".format(file_name), file=sys.stderr)
+            return 1
+
+    timings = {}
+    for name, tokenize_line in (
+        ("reference", _reference_tokenize_line),
+        ("tokenizer", tokenizer._tokenize_line),
+    ):
+        timings[name] = timeit.timeit(
+            lambda: [
+                _tokenize_lines(tokenize_line, lines, file_name)
+                for file_name, lines in sources.items()
+            ],
+            number=flags.repeat,
+        )
+
+    print(
+        "Tokenized {} lines from {} files, {} times each.".format(
+            total_lines, len(sources), flags.repeat
+        )
+    )
+    for name, seconds in timings.items():
+        print(
+            "{:10} {:8.3f}s  {:10.0f} lines/s".format(
+                name, seconds, total_lines * flags.repeat / seconds
+            )
+        )
+    print("speedup    {:8.2f}x".format(timings["reference"] / timings["tokenizer"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -622,36 +622,17 @@ def check_types(ir):
     Returns:
         A (possibly empty) list of errors.
     """
-    errors = []
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.FieldLocation],
-        _type_check_field_location,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
+    return traverse_ir.fast_traverse_ir_top_down_collecting_errors(
         ir,
-        [ir_data.ArrayType, ir_data.Expression],
-        _type_check_array_size,
-        skip_descendants_of={ir_data.AtomicType},
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.Field],
-        _type_check_field_existence_condition,
-        parameters={"errors": errors},
+        [
+            traverse_ir.Visitor([ir_data.FieldLocation], _type_check_field_location),
+            traverse_ir.Visitor(
+                [ir_data.ArrayType, ir_data.Expression],
+                _type_check_array_size,
+                skip_descendants_of={ir_data.AtomicType},
+            ),
+            traverse_ir.Visitor([ir_data.Field], _type_check_field_existence_condition),
+            traverse_ir.Visitor([ir_data.RuntimeParameter], _type_check_parameter),
+            traverse_ir.Visitor([ir_data.AtomicType], _type_check_passed_parameters),
+        ],
     )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.RuntimeParameter],
-        _type_check_parameter,
-        parameters={"errors": errors},
-    )
-    traverse_ir.fast_traverse_ir_top_down(
-        ir,
-        [ir_data.AtomicType],
-        _type_check_passed_parameters,
-        parameters={"errors": errors},
-    )
-    return errors
@@ -0,0 +1,206 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A server which runs compiles in a long-lived process.
+
+Starting the compiler has a significant fixed cost: importing the compiler,
+loading the parser tables, parsing the prelude, and so on.  A compile server
+pays that cost once, and then runs compile requests sent by clients over a
+Unix domain socket.
+
+A request is a command line, a working directory, and whether the client's
+stderr is a terminal; the response is the exit status and the text written to
+stdout and stderr while handling the request.  Each message is a JSON object,
+preceded by its length as a 4-byte big-endian integer.
+
+Requests are handled one at a time, in the server's main thread, because the
+compiler's caches are not thread-safe.
+
+This module only depends on the standard library, so that clients can import
+it without paying for importing the rest of the compiler.
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import struct
+import sys
+import traceback
+
+_LENGTH = struct.Struct(">I")
+
+
+class _CapturedStream(io.StringIO):
+    """A StringIO which reports whether the client's stream is a terminal."""
+
+    def __init__(self, is_a_tty):
+        super().__init__()
+        self._is_a_tty = is_a_tty
+
+    def isatty(self):
+        return self._is_a_tty
+
+
+def _send_message(connection, message):
+    data = json.dumps(message).encode("utf-8")
+    connection.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def _receive_exactly(connection, size):
+    chunks = []
+    while size:
+        chunk = connection.recv(size)
+        if not chunk:
+            raise EOFError("Connection closed.")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _receive_message(connection):
+    (size,) = _LENGTH.unpack(_receive_exactly(connection, _LENGTH.size))
+    return json.loads(_receive_exactly(connection, size).decode("utf-8"))
+
+
+def handle_request(request, compile_function):
+    """Runs compile_function for a single request.
+
+    Arguments:
+      request: A dict with "argv", "cwd", and "stderr_isatty" keys.
+      compile_function: A callable taking an argv list, and returning an exit
+        status.
+
+    Returns:
+      A response dict with "status", "stdout", and "stderr" keys.
+    """
+    stdout = _CapturedStream(False)
+    stderr = _CapturedStream(request["stderr_isatty"])
+    original_cwd = os.getcwd()
+    try:
+        os.chdir(request["cwd"])
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                status = compile_function(request["argv"])
+            except SystemExit as e:
+                # argparse exits on bad command lines.
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception:  # pylint:disable=broad-except
+                traceback.print_exc()
+                status = 1
+    except OSError as e:
+        print(e, file=stderr)
+        status = 1
+    finally:
+        os.chdir(original_cwd)
+    return {"status": status, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def _bind(socket_path):
+    """Returns a listening socket bound to socket_path."""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(socket_path)
+    except OSError:
+        # A socket file left behind by a server which has exited can be
+        # replaced; a live server's socket cannot.
+        with contextlib.closing(socket.socket(socket.AF_UNIX)) as probe:
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.remove(socket_path)
+                server.bind(socket_path)
+            else:
+                server.close()
+                raise
+    server.listen()
+    return server
+
+
+def serve(socket_path, compile_function, max_requests=None):
+    """Serves compile requests on socket_path.
+
+    Arguments:
+      socket_path: The path of the Unix domain socket to listen on.
+      compile_function: A callable taking an argv list, and returning an exit
+        status.  It may print to stdout and stderr, which are returned to the
+        client.
+      max_requests: If set, the number of requests to handle before returning.
+        If not set, serve runs until it is interrupted.
+    """
+    server = _bind(socket_path)
+    try:
+        handled = 0
+        while max_requests is None or handled < max_requests:
+            connection, _ = server.accept()
+            with connection:
+                try:
+                    request = _receive_message(connection)
+                except (EOFError, ValueError, OSError):
+                    continue
+                response = handle_request(request, compile_function)
+                try:
+                    _send_message(connection, response)
+                except OSError:
+                    pass
+            handled += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+
+
+def run_remotely(socket_path, argv):
+    """Sends a compile request to the server on socket_path.
+
+    The server's stdout and stderr output is written to sys.stdout and
+    sys.stderr.
+
+    Arguments:
+      socket_path: The path of the server's Unix domain socket.
+      argv: The command line to run.
+
+    Returns:
+      The exit status of the compile, or None if no server could be reached,
+      in which case the caller should compile locally.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return None
+        # The server may exit or drop the connection at any point (e.g., a
+        # BrokenPipeError or ConnectionResetError); the compile is then run
+        # locally instead.
+        try:
+            _send_message(
+                client,
+                {
+                    "argv": list(argv),
+                    "cwd": os.getcwd(),
+                    "stderr_isatty": sys.stderr.isatty(),
+                },
+            )
+            response = _receive_message(client)
+        except (EOFError, OSError):
+            return None
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["status"]
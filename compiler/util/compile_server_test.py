@@ -0,0 +1,150 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for compile_server."""
+
+import contextlib
+import io
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from compiler.util import compile_server
+
+
+def _fake_compile(argv):
+    print("stdout:" + " ".join(argv))
+    print("stderr:{}:{}".format(os.getcwd(), sys.stderr.isatty()), file=sys.stderr)
+    if argv[-1] == "raise":
+        raise RuntimeError("compiler bug")
+    return len(argv)
+
+
+class CompileServerTest(unittest.TestCase):
+    """Tests for compile_server."""
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.socket_path = os.path.join(self._directory.name, "socket")
+
+    def _start_server(self, max_requests):
+        thread = threading.Thread(
+            target=compile_server.serve,
+            args=(self.socket_path, _fake_compile, max_requests),
+        )
+        thread.start()
+        self.addCleanup(thread.join)
+        # Wait for the server to start listening.  Connections which close
+        # without sending a request are ignored by the server.
+        while True:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(self.socket_path)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+
+    def _run_remotely(self, argv):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            status = compile_server.run_remotely(self.socket_path, argv)
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_no_server(self):
+        self.assertEqual((None, "", ""), self._run_remotely(["embossc", "x.emb"]))
+
+    def _start_closing_server(self, connections):
+        """Starts a server which closes connections without responding."""
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(server.close)
+        server.bind(self.socket_path)
+        server.listen(connections)
+        # If a client fails before connecting, the server thread must not wait
+        # forever.
+        server.settimeout(10)
+
+        def close_connections():
+            for _ in range(connections):
+                try:
+                    connection, _ = server.accept()
+                except socket.timeout:
+                    return
+                connection.close()
+
+        thread = threading.Thread(target=close_connections)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def test_server_closes_connection(self):
+        self._start_closing_server(1)
+        self.assertEqual((None, "", ""), self._run_remotely(["embossc", "x.emb"]))
+
+    def test_connection_errors(self):
+        self._start_closing_server(3)
+        for function, error in (
+            ("_send_message", BrokenPipeError),
+            ("_send_message", ConnectionResetError),
+            ("_receive_message", ConnectionResetError),
+        ):
+            with mock.patch.object(compile_server, function, side_effect=error):
+                self.assertEqual(
+                    (None, "", ""), self._run_remotely(["embossc", "x.emb"])
+                )
+
+    def test_requests(self):
+        self._start_server(2)
+        status, stdout, stderr = self._run_remotely(["embossc", "x.emb"])
+        self.assertEqual(2, status)
+        self.assertEqual("stdout:embossc x.emb\n", stdout)
+        self.assertEqual("stderr:{}:False\n".format(os.getcwd()), stderr)
+        status, stdout, stderr = self._run_remotely(["embossc", "raise"])
+        self.assertEqual(1, status)
+        self.assertIn("RuntimeError: compiler bug", stderr)
+        # The server removes its socket when it exits.
+        self.doCleanups()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_handle_request_changes_directory(self):
+        response = compile_server.handle_request(
+            {"argv": ["a"], "cwd": self._directory.name, "stderr_isatty": True},
+            _fake_compile,
+        )
+        self.assertEqual(
+            {
+                "status": 1,
+                "stdout": "stdout:a\n",
+                "stderr": "stderr:{}:True\n".format(
+                    os.path.realpath(self._directory.name)
+                ),
+            },
+            response,
+        )
+
+    def test_stale_socket_is_replaced(self):
+        stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale_socket.bind(self.socket_path)
+        stale_socket.close()
+        self._start_server(1)
+        self.assertEqual(2, self._run_remotely(["embossc", "x.emb"])[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memoization of facts derived from an IR, such as the sizes of types.
+
+Facts like "the fixed size of this type" are derived from many IR nodes, and
+can change whenever any of those nodes change, so they cannot be memoized in
+general.  Code which does not modify an IR (a read-only check, or a back end)
+can open a `scope` on the IR, during which functions decorated with `memoize`
+remember their results:
+
+    with fact_cache.scope(ir):
+      for field in fields:
+        size = ir_util.fixed_size_of_type_in_bits(field.type, ir)
+
+Nothing reachable from the IR may be modified while a scope is open, unless
+`invalidate` is called afterwards.  When the outermost scope on an IR closes,
+its memoized facts are discarded, and its hit and miss counts are added to the
+active profiling stage, if any.
+"""
+
+import collections
+import contextlib
+import functools
+import weakref
+
+from compiler.util import ir_data
+from compiler.util import profiling
+
+
+class FactCache(object):
+    """Memoized facts about one IR.
+
+    Attributes:
+      hits: A Counter of cache hits, by function name.
+      misses: A Counter of cache misses, by function name.
+    """
+
+    def __init__(self, ir):
+        # The IR is weakly referenced, so that an open scope does not keep an
+        # otherwise-unused IR alive.
+        self._ir_reference = weakref.ref(ir)
+        self._values = {}
+        # IR nodes used in keys are kept alive, so that their id()s cannot be
+        # reused by new nodes while their entries exist.
+        self._key_nodes = []
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+
+    def ir(self):
+        """Returns the IR this cache is for, or None if it has been deleted."""
+        return self._ir_reference()
+
+    def clear(self):
+        """Discards all memoized facts."""
+        self._values.clear()
+        del self._key_nodes[:]
+
+
+# The FactCaches of the open scopes, innermost last.  A FactCache appears once
+# for each open scope on its IR.
+_open_caches = []
+
+
+def _cache_for_ir(ir):
+    for cache in reversed(_open_caches):
+        if cache.ir() is ir:
+            return cache
+    return None
+
+
+@contextlib.contextmanager
+def scope(ir):
+    """Memoizes facts about ir while the context is open.
+
+    Scopes on the same IR may be nested; they share one FactCache.
+
+    Arguments:
+      ir: An ir_data.EmbossIr, which must not be modified while the scope is
+        open.
+
+    Yields:
+      The FactCache for ir.
+    """
+    cache = _cache_for_ir(ir)
+    outermost = cache is None
+    if outermost:
+        cache = FactCache(ir)
+    # The generator's frame must not keep ir alive.
+    del ir
+    _open_caches.append(cache)
+    try:
+        yield cache
+    finally:
+        _open_caches.pop()
+        if outermost:
+            cache.clear()
+            profiling.add_counters(
+                {"fact_cache.{}.hits".format(k): v for k, v in cache.hits.items()}
+            )
+            profiling.add_counters(
+                {"fact_cache.{}.misses".format(k): v for k, v in cache.misses.items()}
+            )
+
+
+def invalidate(ir):
+    """Discards the memoized facts about ir, after ir has been modified."""
+    cache = _cache_for_ir(ir)
+    if cache is not None:
+        cache.clear()
+
+
+def memoize(function):
+    """Decorator which memoizes function while a scope is open.
+
+    The decorated function must take only positional arguments, the first of
+    which should be an IR node; calls where it is not are not memoized.  IR
+    nodes are compared by identity; other arguments must be hashable.  If one
+    of the arguments is an ir_data.EmbossIr, the scope for that IR is used;
+    otherwise, the innermost scope is used.  Outside of any scope, the function
+    is just called.
+
+    Arguments:
+      function: The function to memoize.
+
+    Returns:
+      The memoized function.
+    """
+    name = function.__name__
+
+    @functools.wraps(function)
+    def memoized(*args):
+        if not _open_caches or not isinstance(args[0], ir_data.Message):
+            return function(*args)
+        cache = None
+        key = [name]
+        nodes = []
+        for arg in args:
+            if isinstance(arg, ir_data.Message):
+                if cache is None and type(arg) is ir_data.EmbossIr:
+                    cache = _cache_for_ir(arg)
+                    if cache is None:
+                        return function(*args)
+                key.append(id(arg))
+                nodes.append(arg)
+            else:
+                key.append(arg)
+        key = tuple(key)
+        if cache is None:
+            cache = _open_caches[-1]
+        try:
+            value = cache._values[key]  # pylint:disable=protected-access
+        except KeyError:
+            cache.misses[name] += 1
+            value = function(*args)
+            cache._values[key] = value  # pylint:disable=protected-access
+            cache._key_nodes.extend(nodes)  # pylint:disable=protected-access
+        else:
+            cache.hits[name] += 1
+        return value
+
+    return memoized
@@ -0,0 +1,129 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for fact_cache."""
+
+import gc
+import unittest
+
+from compiler.util import fact_cache
+from compiler.util import ir_data
+from compiler.util import profiling
+
+_calls = []
+
+
+@fact_cache.memoize
+def _word_length(word, ir):
+    _calls.append(word.text)
+    return len(word.text) + len(ir.module)
+
+
+@fact_cache.memoize
+def _word_length_times(word, factor):
+    _calls.append(word.text)
+    return len(word.text) * factor
+
+
+class FactCacheTest(unittest.TestCase):
+    """Tests for fact_cache.scope and fact_cache.memoize."""
+
+    def setUp(self):
+        del _calls[:]
+
+    def test_no_memoization_outside_scope(self):
+        ir = ir_data.EmbossIr(module=[ir_data.Module()])
+        word = ir_data.Word(text="abc")
+        self.assertEqual(4, _word_length(word, ir))
+        self.assertEqual(4, _word_length(word, ir))
+        self.assertEqual(["abc", "abc"], _calls)
+
+    def test_memoization_in_scope(self):
+        ir = ir_data.EmbossIr(module=[ir_data.Module()])
+        word = ir_data.Word(text="abc")
+        other_word = ir_data.Word(text="abc")
+        with fact_cache.scope(ir) as cache:
+            self.assertEqual(4, _word_length(word, ir))
+            self.assertEqual(4, _word_length(word, ir))
+            self.assertEqual(4, _word_length(other_word, ir))
+            self.assertEqual(6, _word_length_times(word, 2))
+            self.assertEqual(6, _word_length_times(word, 2))
+            self.assertEqual(9, _word_length_times(word, 3))
+        self.assertEqual(["abc", "abc", "abc", "abc"], _calls)
+        self.assertEqual({"_word_length": 1, "_word_length_times": 1}, cache.hits)
+        self.assertEqual({"_word_length": 2, "_word_length_times": 2}, cache.misses)
+        # Memoized values do not outlive the scope.
+        self.assertEqual(4, _word_length(word, ir))
+        self.assertEqual(5, len(_calls))
+
+    def test_other_ir_is_not_memoized(self):
+        ir = ir_data.EmbossIr(module=[ir_data.Module()])
+        other_ir = ir_data.EmbossIr(module=[ir_data.Module()])
+        word = ir_data.Word(text="abc")
+        with fact_cache.scope(ir):
+            _word_length(word, other_ir)
+            _word_length(word, other_ir)
+        self.assertEqual(["abc", "abc"], _calls)
+
+    def test_nested_scopes_share_cache(self):
+        ir = ir_data.EmbossIr(module=[ir_data.Module()])
+        other_ir = ir_data.EmbossIr(module=[ir_data.Module(), ir_data.Module()])
+        word = ir_data.Word(text="abc")
+        with fact_cache.scope(ir) as outer_cache:
+            self.assertEqual(4, _word_length(word, ir))
+            with fact_cache.scope(other_ir):
+                with fact_cache.scope(ir) as inner_cache:
+                    self.assertIs(outer_cache, inner_cache)
+                    self.assertEqual(4, _word_length(word, ir))
+                self.assertEqual(5, _word_length(word, other_ir))
+            self.assertEqual(4, _word_length(word, ir))
+        self.assertEqual(["abc", "abc"], _calls)
+        self.assertEqual({"_word_length": 2}, outer_cache.hits)
+
+    def test_invalidate(self):
+        ir = ir_data.EmbossIr(module=[ir_data.Module()])
+        word = ir_data.Word(text="abc")
+        with fact_cache.scope(ir):
+            self.assertEqual(4, _word_length(word, ir))
+            ir.module.append(ir_data.Module())
+            fact_cache.invalidate(ir)
+            self.assertEqual(5, _word_length(word, ir))
+        self.assertEqual(["abc", "abc"], _calls)
+
+    def test_scope_does_not_keep_ir_alive(self):
+        ir = ir_data.EmbossIr(module=[ir_data.Module()])
+        with fact_cache.scope(ir) as cache:
+            del ir
+            gc.collect()
+            self.assertIsNone(cache.ir())
+
+    def test_profiling_counters(self):
+        ir = ir_data.EmbossIr(module=[ir_data.Module()])
+        word = ir_data.Word(text="abc")
+        profiler = profiling.Profiler(trace_memory=False)
+        with profiler.activate():
+            with profiling.stage("stage"):
+                with fact_cache.scope(ir):
+                    _word_length(word, ir)
+                    _word_length(word, ir)
+                    _word_length(word, ir)
+        (record,) = profiler.records
+        self.assertEqual(
+            {"fact_cache._word_length.hits": 2, "fact_cache._word_length.misses": 1},
+            record.counters,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,426 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compact binary serialization of IR data objects.
+
+The binary form holds the same information as `IrDataSerializer.to_json`, but
+is smaller and faster to read and write: every string and every
+SourceLocation is stored once, and the tree of IR nodes is a flat array of
+integers.
+
+A binary IR file is a header followed by a zlib-compressed body.  The header
+(all integers are little-endian) is:
+
+    magic (4 bytes), format version (uint32)
+
+The body is a sequence of int32s, except for the string data:
+
+    counts:     class count, string count, string data length (bytes),
+                location count, node token count
+    schema:     for each class: class name string index, field count, field
+                name string indexes
+    strings:    the length of each string, in code points, followed by the
+                UTF-8 string data
+    locations:  for each SourceLocation: start line, start column, end line,
+                end column, flags (1 = is_disjoint_from_parent, 2 =
+                is_synthetic)
+    nodes:      the root node
+
+A node is encoded as its count of set fields, followed by a (field, value)
+pair for each set field, where `field` indexes the field names of the node's
+class in the schema (the node's class is implied by its parent field).  Values
+are encoded as:
+
+    IR node:            the node
+    str:                string index
+    int, bool, enum:    the value
+    SourceLocation:     location index
+    list:               element count, followed by the elements
+
+The first class in the schema is the class of the root node.  Because fields
+are identified by name through the schema, an IR written by one version of
+the compiler can be read by another, as long as every field it uses still
+exists.
+"""
+
+import array
+import io
+import struct
+import sys
+import zlib
+
+from compiler.util import ir_data_fields
+from compiler.util import ir_data_utils
+from compiler.util import parser_types
+
+# FORMAT_VERSION must be incremented any time the file layout changes.
+FORMAT_VERSION = 1
+
+_MAGIC = b"EMBI"
+_HEADER = struct.Struct("<4sI")
+_COUNTS = struct.Struct("<5i")
+
+_DISJOINT_FROM_PARENT = 1
+_SYNTHETIC = 2
+
+# Kinds of field value.
+_NODE = 0
+_NODE_LIST = 1
+_STRING = 2
+_STRING_LIST = 3
+_SCALAR = 4
+_SCALAR_LIST = 5
+_LOCATION = 6
+_ENUM = 7
+
+
+class FormatError(Exception):
+    """Binary IR data is malformed or has an unsupported version."""
+
+    pass
+
+
+def is_binary_ir(data):
+    """Returns True if data (bytes) starts like a binary IR file."""
+    return data[: len(_MAGIC)] == _MAGIC
+
+
+def _field_kind(spec):
+    """Returns the kind of value stored in the field described by spec."""
+    if spec.is_dataclass:
+        return _NODE_LIST if spec.is_sequence else _NODE
+    if spec.data_type is str:
+        return _STRING_LIST if spec.is_sequence else _STRING
+    if spec.data_type is parser_types.SourceLocation and not spec.is_sequence:
+        return _LOCATION
+    if spec.is_enum and not spec.is_sequence:
+        return _ENUM
+    if spec.data_type in (int, bool):
+        return _SCALAR_LIST if spec.is_sequence else _SCALAR
+    raise TypeError(
+        "Field {} of type {} cannot be serialized.".format(spec.name, spec.data_type)
+    )
+
+
+def _int_array_to_bytes(values):
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _int_array_from_bytes(data, offset, count):
+    ints = array.array("i")
+    end = offset + count * ints.itemsize
+    if end > len(data):
+        raise FormatError("Binary IR is truncated.")
+    ints.frombytes(data[offset:end])
+    if sys.byteorder != "little":
+        ints.byteswap()
+    return ints, end
+
+
+class _Writer(object):
+    """Accumulates the body of a binary IR file."""
+
+    def __init__(self, omit_fields):
+        self.omit_fields = omit_fields
+        self.strings = []
+        self.string_indexes = {}
+        self.location_ints = []
+        self.location_indexes = {}
+        self.nodes = array.array("i")
+        # The (field index, name, kind) of each field of each class, in schema
+        # order.
+        self.classes = {}
+
+    def string(self, value):
+        index = self.string_indexes.get(value)
+        if index is None:
+            index = self.string_indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def location(self, value):
+        index = self.location_indexes.get(value)
+        if index is None:
+            index = self.location_indexes[value] = len(self.location_indexes)
+            self.location_ints.extend(
+                (
+                    value.start.line,
+                    value.start.column,
+                    value.end.line,
+                    value.end.column,
+                    (_DISJOINT_FROM_PARENT if value.is_disjoint_from_parent else 0)
+                    | (_SYNTHETIC if value.is_synthetic else 0),
+                )
+            )
+        return index
+
+    def class_fields(self, cls):
+        fields = self.classes.get(cls)
+        if fields is None:
+            specs = [
+                spec
+                for spec in ir_data_fields.field_specs(cls).values()
+                if spec.name not in self.omit_fields
+            ]
+            fields = self.classes[cls] = tuple(
+                (index, spec.name, _field_kind(spec))
+                for index, spec in enumerate(specs)
+            )
+        return fields
+
+    def node(self, node):
+        nodes = self.nodes
+        count_position = len(nodes)
+        nodes.append(0)
+        count = 0
+        for index, name, kind in self.class_fields(type(node)):
+            value = getattr(node, name)
+            if value is None:
+                continue
+            if kind == _NODE:
+                nodes.append(index)
+                self.node(value)
+            elif kind == _STRING:
+                nodes.append(index)
+                nodes.append(self.string(value))
+            elif kind == _LOCATION:
+                nodes.append(index)
+                nodes.append(self.location(value))
+            elif kind == _SCALAR or kind == _ENUM:
+                nodes.append(index)
+                nodes.append(value)
+            else:
+                if not value:
+                    continue
+                nodes.append(index)
+                nodes.append(len(value))
+                if kind == _NODE_LIST:
+                    for element in value:
+                        self.node(element)
+                elif kind == _STRING_LIST:
+                    nodes.extend([self.string(element) for element in value])
+                else:
+                    nodes.extend(value)
+            count += 1
+        nodes[count_position] = count
+
+    def schema(self):
+        schema = array.array("i")
+        for cls, fields in self.classes.items():
+            schema.append(self.string(cls.__name__))
+            schema.append(len(fields))
+            schema.extend(self.string(name) for _, name, _ in fields)
+        return schema
+
+
+def write(ir, stream, compression_level=1, omit_fields=()):
+    """Writes an IR data object to stream as a binary IR file.
+
+    The sections of the file are compressed and written one at a time, rather
+    than being joined into a single buffer first.
+
+    Arguments:
+      ir: The IR data object (usually an ir_data.EmbossIr) to serialize.
+      stream: A binary file-like object.
+      compression_level: The zlib compression level of the body.
+      omit_fields: The names of fields to leave out, at every level of the IR.
+        Readers treat omitted fields as unset.
+    """
+    writer = _Writer(frozenset(omit_fields))
+    # The root class must be first in the schema.
+    writer.class_fields(type(ir))
+    writer.node(ir)
+    schema = writer.schema()
+    string_data = "".join(writer.strings).encode("utf-8")
+    compressor = zlib.compressobj(compression_level)
+    stream.write(_HEADER.pack(_MAGIC, FORMAT_VERSION))
+    for section in (
+        _COUNTS.pack(
+            len(writer.classes),
+            len(writer.strings),
+            len(string_data),
+            len(writer.location_indexes),
+            len(writer.nodes),
+        ),
+        _int_array_to_bytes(schema),
+        _int_array_to_bytes(array.array("i", map(len, writer.strings))),
+        string_data,
+        _int_array_to_bytes(array.array("i", writer.location_ints)),
+        _int_array_to_bytes(writer.nodes),
+    ):
+        stream.write(compressor.compress(section))
+    stream.write(compressor.flush())
+
+
+def serialize(ir, compression_level=1, omit_fields=()):
+    """Serializes an IR data object to binary IR file contents.
+
+    Arguments:
+      ir: The IR data object (usually an ir_data.EmbossIr) to serialize.
+      compression_level: The zlib compression level of the body.
+      omit_fields: The names of fields to leave out, at every level of the IR.
+
+    Returns:
+      The bytes of a binary IR file.
+    """
+    stream = io.BytesIO()
+    write(ir, stream, compression_level, omit_fields)
+    return stream.getvalue()
+
+
+def _reader_fields(cls, field_names):
+    """Returns (name, kind, class) for each of field_names in cls."""
+    specs = ir_data_fields.field_specs(cls)
+    fields = []
+    for name in field_names:
+        spec = specs.get(name)
+        if spec is None:
+            raise FormatError("{} has no field {}.".format(cls.__name__, name))
+        fields.append((name, _field_kind(spec), spec.data_type))
+    return fields
+
+
+def deserialize(data_cls, data):
+    """Constructs an IR data object from binary IR file contents.
+
+    Arguments:
+      data_cls: The class of the root IR data object (usually
+        ir_data.EmbossIr).
+      data: The bytes of a binary IR file.
+
+    Returns:
+      An instance of data_cls.
+
+    Raises:
+      FormatError: data is not a binary IR file, has the wrong version, or
+        does not match the IR data classes.
+    """
+    if len(data) < _HEADER.size:
+        raise FormatError("Binary IR is truncated.")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise FormatError("Not a binary IR file.")
+    if version != FORMAT_VERSION:
+        raise FormatError(
+            "Binary IR version {} is not supported (expected {}).".format(
+                version, FORMAT_VERSION
+            )
+        )
+    try:
+        body = zlib.decompress(data[_HEADER.size :])
+    except zlib.error as e:
+        raise FormatError("Binary IR is corrupt: {}".format(e)) from None
+    if len(body) < _COUNTS.size:
+        raise FormatError("Binary IR is truncated.")
+    (
+        class_count,
+        string_count,
+        string_data_length,
+        location_count,
+        node_token_count,
+    ) = _COUNTS.unpack_from(body)
+    offset = _COUNTS.size
+    schema = []
+    for _ in range(class_count):
+        (name, field_count), offset = _int_array_from_bytes(body, offset, 2)
+        field_names, offset = _int_array_from_bytes(body, offset, field_count)
+        schema.append((name, field_names))
+    string_lengths, offset = _int_array_from_bytes(body, offset, string_count)
+    string_data = body[offset : offset + string_data_length].decode("utf-8")
+    offset += string_data_length
+    strings = []
+    position = 0
+    for length in string_lengths:
+        strings.append(string_data[position : position + length])
+        position += length
+    location_ints, offset = _int_array_from_bytes(body, offset, location_count * 5)
+    locations = []
+    for i in range(0, len(location_ints), 5):
+        start_line, start_column, end_line, end_column, flags = location_ints[i : i + 5]
+        locations.append(
+            parser_types.SourceLocation(
+                parser_types.SourcePosition(start_line, start_column),
+                parser_types.SourcePosition(end_line, end_column),
+                is_disjoint_from_parent=bool(flags & _DISJOINT_FROM_PARENT),
+                is_synthetic=bool(flags & _SYNTHETIC),
+            )
+        )
+    nodes, offset = _int_array_from_bytes(body, offset, node_token_count)
+    if offset != len(body):
+        raise FormatError("Binary IR body has wrong length.")
+
+    # Classes are matched to schema entries by name, when they are first seen.
+    schema_by_name = {
+        strings[name]: [strings[i] for i in field_names] for name, field_names in schema
+    }
+    if not schema or strings[schema[0][0]] != data_cls.__name__:
+        raise FormatError("Binary IR root is not a {}.".format(data_cls.__name__))
+    class_fields = {}
+
+    def fields_of(cls):
+        fields = class_fields.get(cls)
+        if fields is None:
+            if cls.__name__ not in schema_by_name:
+                raise FormatError(
+                    "Binary IR has no schema for {}.".format(cls.__name__)
+                )
+            fields = class_fields[cls] = (
+                _reader_fields(cls, schema_by_name[cls.__name__]),
+                ir_data_utils.constructor(cls),
+            )
+        return fields
+
+    position = 0
+
+    def read_node(cls):
+        nonlocal position
+        fields, construct = fields_of(cls)
+        values = {}
+        count = nodes[position]
+        position += 1
+        for _ in range(count):
+            name, kind, value_type = fields[nodes[position]]
+            value = nodes[position + 1]
+            position += 2
+            if kind == _NODE:
+                position -= 1
+                value = read_node(value_type)
+            elif kind == _STRING:
+                value = strings[value]
+            elif kind == _LOCATION:
+                value = locations[value]
+            elif kind == _SCALAR or kind == _ENUM:
+                value = value_type(value)
+            else:
+                end = position + value
+                if kind == _NODE_LIST:
+                    value = [read_node(value_type) for _ in range(value)]
+                elif kind == _STRING_LIST:
+                    value = [strings[i] for i in nodes[position:end]]
+                    position = end
+                else:
+                    value = [value_type(i) for i in nodes[position:end]]
+                    position = end
+            values[name] = value
+        return construct(values)
+
+    try:
+        result = read_node(data_cls)
+    except (IndexError, KeyError) as e:
+        raise FormatError("Binary IR is corrupt: {!r}".format(e)) from None
+    if position != len(nodes):
+        raise FormatError("Binary IR has trailing data.")
+    return result
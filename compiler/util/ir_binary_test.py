@@ -0,0 +1,166 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ir_binary."""
+
+import io
+import struct
+import unittest
+import zlib
+
+from compiler.util import expression_parser
+from compiler.util import ir_binary
+from compiler.util import ir_data
+from compiler.util import ir_data_utils
+from compiler.util import parser_types
+
+
+def _make_ir():
+    location = parser_types.SourceLocation((1, 2), (3, 4), is_synthetic=True)
+    return ir_data.EmbossIr(
+        module=[
+            ir_data.Module(
+                source_file_name="m.emb",
+                source_text="struct Føø:\n  0 [+1]  UInt  x\n",
+                source_location=parser_types.SourceLocation(
+                    (1, 1), (3, 1), is_disjoint_from_parent=True
+                ),
+                type=[
+                    ir_data.TypeDefinition(
+                        name=ir_data.NameDefinition(
+                            name=ir_data.Word(text="Föö", source_location=location),
+                            canonical_name=ir_data.CanonicalName(
+                                module_file="m.emb", object_path=["Föö"]
+                            ),
+                            is_anonymous=False,
+                        ),
+                        addressable_unit=ir_data.AddressableUnit.BYTE,
+                        structure=ir_data.Structure(
+                            field=[
+                                ir_data.Field(
+                                    name=ir_data.NameDefinition(
+                                        name=ir_data.Word(text="x")
+                                    ),
+                                    location=ir_data.FieldLocation(
+                                        start=expression_parser.parse("0"),
+                                        size=expression_parser.parse("1 + 2 * 3"),
+                                    ),
+                                    source_location=location,
+                                ),
+                            ],
+                            fields_in_dependency_order=[0],
+                        ),
+                        source_location=location,
+                    ),
+                    ir_data.TypeDefinition(
+                        name=ir_data.NameDefinition(name=ir_data.Word(text="")),
+                        enumeration=ir_data.Enum(),
+                    ),
+                ],
+            )
+        ]
+    )
+
+
+class IrBinaryTest(unittest.TestCase):
+    """Tests for ir_binary.serialize and ir_binary.deserialize."""
+
+    def test_round_trip(self):
+        ir = _make_ir()
+        data = ir_binary.serialize(ir)
+        self.assertTrue(ir_binary.is_binary_ir(data))
+        result = ir_binary.deserialize(ir_data.EmbossIr, data)
+        self.assertEqual(ir, result)
+        self.assertEqual(
+            ir_data_utils.IrDataSerializer(ir).to_json(),
+            ir_data_utils.IrDataSerializer(result).to_json(),
+        )
+        structure = result.module[0].type[0].structure
+        self.assertEqual(
+            ir_data.FunctionMapping.ADDITION,
+            structure.field[0].location.size.function.function,
+        )
+        self.assertIsInstance(
+            structure.field[0].location.size.function.function,
+            ir_data.FunctionMapping,
+        )
+        self.assertEqual("enumeration", result.module[0].type[1].which_type)
+
+    def test_matches_json_round_trip(self):
+        ir = _make_ir()
+        from_json = ir_data_utils.IrDataSerializer.from_json(
+            ir_data.EmbossIr, ir_data_utils.IrDataSerializer(ir).to_json()
+        )
+        from_binary = ir_binary.deserialize(ir_data.EmbossIr, ir_binary.serialize(ir))
+        self.assertEqual(from_json, from_binary)
+
+    def test_strings_are_interned(self):
+        ir = _make_ir()
+        ir.module[0].type.extend([ir.module[0].type[0]] * 10)
+        body = zlib.decompress(ir_binary.serialize(ir)[8:])
+        # "Föö" is used as a Word and in a CanonicalName in each TypeDefinition.
+        self.assertEqual(1, body.count("Föö".encode("utf-8")))
+
+    def test_omit_fields(self):
+        ir = _make_ir()
+        data = ir_binary.serialize(ir, omit_fields=["source_text", "source_location"])
+        result = ir_binary.deserialize(ir_data.EmbossIr, data)
+        self.assertIsNone(result.module[0].source_text)
+        self.assertIsNone(result.module[0].source_location)
+        self.assertIsNone(result.module[0].type[0].name.name.source_location)
+        self.assertEqual("Föö", result.module[0].type[0].name.name.text)
+
+    def test_write(self):
+        ir = _make_ir()
+        stream = io.BytesIO()
+        ir_binary.write(ir, stream)
+        self.assertEqual(ir_binary.serialize(ir), stream.getvalue())
+
+    def test_json_is_not_binary(self):
+        self.assertFalse(
+            ir_binary.is_binary_ir(
+                ir_data_utils.IrDataSerializer(_make_ir()).to_json().encode("utf-8")
+            )
+        )
+
+    def test_wrong_root_class(self):
+        data = ir_binary.serialize(ir_data.Module())
+        with self.assertRaisesRegex(ir_binary.FormatError, "not a EmbossIr"):
+            ir_binary.deserialize(ir_data.EmbossIr, data)
+
+    def test_bad_magic(self):
+        with self.assertRaisesRegex(ir_binary.FormatError, "Not a binary IR"):
+            ir_binary.deserialize(ir_data.EmbossIr, b"{}" * 10)
+
+    def test_wrong_version(self):
+        data = ir_binary.serialize(_make_ir())
+        data = data[:4] + struct.pack("<I", ir_binary.FORMAT_VERSION + 1) + data[8:]
+        with self.assertRaisesRegex(ir_binary.FormatError, "version"):
+            ir_binary.deserialize(ir_data.EmbossIr, data)
+
+    def test_truncated(self):
+        data = ir_binary.serialize(_make_ir())
+        for length in (0, 6, 8, len(data) - 1):
+            with self.assertRaises(ir_binary.FormatError):
+                ir_binary.deserialize(ir_data.EmbossIr, data[:length])
+
+    def test_truncated_body(self):
+        data = ir_binary.serialize(_make_ir())
+        body = zlib.decompress(data[8:])
+        with self.assertRaises(ir_binary.FormatError):
+            ir_binary.deserialize(ir_data.EmbossIr, data[:8] + zlib.compress(body[:-4]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,12 +20,18 @@ This is limited to purely data and type annotations.
 import collections
 import dataclasses
 import enum
+import os
 import sys
 from typing import ClassVar, Optional
 
 from compiler.util import ir_data_fields
 from compiler.util import parser_types
 
+# Field assignments are type checked in debug mode, unless the EMBOSS_FAST_IR
+# environment variable is set to a non-empty value.  The check has to be decided
+# when this module is imported, so EMBOSS_FAST_IR must be set before then.
+_CHECK_FIELD_TYPES = __debug__ and not os.environ.get("EMBOSS_FAST_IR")
+
 
 @dataclasses.dataclass
 class Message:
@@ -41,6 +47,11 @@ class Message:
     definition such as support for "oneof" and optional fields.
     """
 
+    # Subclasses are defined with `ir_data_fields.ir_dataclass`, which gives
+    # them `__slots__` for their fields; the base class only needs a slot for
+    # weak references.
+    __slots__ = ("__weakref__",)
+
     IR_DATACLASS: ClassVar[object] = object()
     field_specs: ClassVar[ir_data_fields.FilteredIrFieldSpecs]
 
@@ -62,8 +73,9 @@ class Message:
 
     # This hook adds a 15% overhead to end-to-end code generation in some cases
     # so we guard it in a `__debug__` block. Users can opt-out of this check by
-    # running python with the `-O` flag, ie: `python3 -O ./embossc`.
-    if __debug__:
+    # running python with the `-O` flag, ie: `python3 -O ./embossc`, or by
+    # setting the EMBOSS_FAST_IR environment variable; see _CHECK_FIELD_TYPES.
+    if _CHECK_FIELD_TYPES:
 
         def __setattr__(self, name: str, value) -> None:
             """Debug-only hook that adds basic type checking for ir_data fields."""
@@ -112,7 +124,7 @@ class Message:
 # From here to the end of the file are actual structure definitions.
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Word(Message):
     """IR for a bare word in the source file.
 
@@ -123,7 +135,7 @@ class Word(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class String(Message):
     """IR for a string in the source file."""
 
@@ -131,13 +143,13 @@ class String(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Documentation(Message):
     text: Optional[str] = None
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class BooleanConstant(Message):
     """IR for a boolean constant."""
 
@@ -145,14 +157,14 @@ class BooleanConstant(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Empty(Message):
     """Placeholder message for automatic element counts for arrays."""
 
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class NumericConstant(Message):
     """IR for any numeric constant."""
 
@@ -203,7 +215,7 @@ class FunctionMapping(int, enum.Enum):
     """`$lower_bound()`"""
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Function(Message):
     """IR for a single function (+, -, *, ==, $max, etc.) in an expression."""
 
@@ -213,7 +225,7 @@ class Function(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class CanonicalName(Message):
     """CanonicalName is the unique, absolute name for some object.
 
@@ -252,7 +264,7 @@ class CanonicalName(Message):
   """
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class NameDefinition(Message):
     """NameDefinition is IR for the name of an object, within the object.
 
@@ -284,7 +296,7 @@ class NameDefinition(Message):
     """The location of this NameDefinition in source code."""
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Reference(Message):
     """A Reference holds the canonical name of something defined elsewhere.
 
@@ -332,7 +344,7 @@ class Reference(Message):
   """
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class FieldReference(Message):
     """IR for a "field" or "field.sub.subsub" reference in an expression.
 
@@ -379,12 +391,12 @@ class FieldReference(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class OpaqueType(Message):
     pass
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class IntegerType(Message):
     """Type of an integer expression."""
 
@@ -441,18 +453,18 @@ class IntegerType(Message):
     maximum_value: Optional[str] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class BooleanType(Message):
     value: Optional[bool] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class EnumType(Message):
     name: Optional[Reference] = None
     value: Optional[str] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class ExpressionType(Message):
     opaque: Optional[OpaqueType] = ir_data_fields.oneof_field("type")
     integer: Optional[IntegerType] = ir_data_fields.oneof_field("type")
@@ -460,7 +472,7 @@ class ExpressionType(Message):
     enumeration: Optional[EnumType] = ir_data_fields.oneof_field("type")
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Expression(Message):
     """IR for an expression.
 
@@ -482,7 +494,7 @@ class Expression(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class ArrayType(Message):
     """IR for an array type ("Int:8[12]" or "Message[2]" or "UInt[3][2]")."""
 
@@ -494,7 +506,7 @@ class ArrayType(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class AtomicType(Message):
     """IR for a non-array type ("UInt" or "Foo(Version.SIX)")."""
 
@@ -503,7 +515,7 @@ class AtomicType(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Type(Message):
     """IR for a type reference ("UInt", "Int:8[12]", etc.)."""
 
@@ -514,7 +526,7 @@ class Type(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class AttributeValue(Message):
     """IR for a attribute value."""
 
@@ -526,7 +538,7 @@ class AttributeValue(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Attribute(Message):
     """IR for a [name = value] attribute."""
 
@@ -537,7 +549,7 @@ class Attribute(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class WriteTransform(Message):
     """IR which defines an expression-based virtual field write scheme.
 
@@ -555,7 +567,7 @@ class WriteTransform(Message):
     destination: Optional[FieldReference] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class WriteMethod(Message):
     """IR which defines the method used for writing to a virtual field."""
 
@@ -582,7 +594,7 @@ class WriteMethod(Message):
   """
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class FieldLocation(Message):
     """IR for a field location."""
 
@@ -591,7 +603,7 @@ class FieldLocation(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Field(Message):  # pylint:disable=too-many-instance-attributes
     """IR for a field in a struct definition.
 
@@ -662,7 +674,7 @@ class Field(Message):  # pylint:disable=too-many-instance-attributes
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Structure(Message):
     """IR for a bits or struct definition."""
 
@@ -706,7 +718,7 @@ class Structure(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class External(Message):
     """IR for an external type declaration."""
 
@@ -716,7 +728,7 @@ class External(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class EnumValue(Message):
     """IR for a single value within an enumerated type."""
 
@@ -732,7 +744,7 @@ class EnumValue(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Enum(Message):
     """IR for an enumerated type definition."""
 
@@ -740,7 +752,7 @@ class Enum(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Import(Message):
     """IR for an import statement in a module."""
 
@@ -751,7 +763,7 @@ class Import(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class RuntimeParameter(Message):
     """IR for a runtime parameter definition."""
 
@@ -795,7 +807,7 @@ class AddressableUnit(int, enum.Enum):
     BYTE = 8
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class TypeDefinition(Message):
     """Container IR for a type definition (struct, union, etc.)"""
 
@@ -825,7 +837,7 @@ class TypeDefinition(Message):
     source_location: Optional[parser_types.SourceLocation] = None
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class Module(Message):
     """The IR for an individual Emboss module (file)."""
 
@@ -845,7 +857,7 @@ class Module(Message):
     """Name of the source file."""
 
 
-@dataclasses.dataclass
+@ir_data_fields.ir_dataclass
 class EmbossIr(Message):
     """The top-level IR for an Emboss module and all of its dependencies."""
 
@@ -29,7 +29,7 @@ Various utilities are provided for working with `dataclasses.Field`s:
   - Functions for copying and updating IR data classes
     - `copy`, `update`
   - Functions to help defining IR data fields
-    - `oneof_field`, `list_field`, `str_field`
+    - `ir_dataclass`, `oneof_field`, `list_field`, `str_field`
 """
 
 import dataclasses
@@ -78,6 +78,8 @@ def _is_ir_dataclass(obj):
 class CopyValuesList(list[CopyValuesListT]):
     """A list that makes copies of any value that is inserted."""
 
+    __slots__ = ("value_type",)
+
     def __init__(
         self, value_type: CopyValuesListT, iterable: Optional[Iterable[Any]] = None
     ):
@@ -96,7 +98,13 @@ class CopyValuesList(list[CopyValuesListT]):
         return super().extend([self._copy(i) for i in iterable])
 
     def shallow_copy(self, iterable: Iterable) -> None:
-        """Explicitly performs a shallow copy of the provided list."""
+        """Explicitly performs a shallow copy of the provided list.
+
+        The elements are appended without being copied, which transfers
+        ownership of them to this list: the caller must not modify or reuse them
+        afterwards.  This is intended for freshly-built IR nodes, where the copy
+        made by `extend` would be wasted.
+        """
         return super().extend(iterable)
 
     def append(self, obj: Any) -> None:
@@ -105,6 +113,11 @@ class CopyValuesList(list[CopyValuesListT]):
     def insert(self, index: SupportsIndex, obj: Any) -> None:
         return super().insert(index, self._copy(obj))
 
+    def __reduce__(self):
+        # The default list pickling restores elements through `extend`, which
+        # would copy every element again.
+        return (CopyValuesList, (self.value_type, list(self)))
+
 
 class TemporaryCopyValuesList(NamedTuple):
     """Holder for a CopyValuesList while copying/constructing an IR dataclass."""
@@ -388,7 +401,8 @@ class OneOfField:
     Tracks when the field is set and will unset othe fields in the associated
     oneof group.
 
-    Note: Decorators only work if dataclass slots aren't used.
+    When used in an `ir_dataclass`, the proxy fields are slots; otherwise,
+    they are class attributes with a default of None.
     """
 
     def __init__(self, oneof: str) -> None:
@@ -402,6 +416,8 @@ class OneOfField:
     def __set_name__(self, owner, name):
         self.name = name
         self.owner_type = owner
+        if self.proxy_name in owner.__dict__.get("__slots__", ()):
+            return
         # Add the empty proxy fields to the class.  This may re-initialize
         # these if another field in this oneof got there first.
         setattr(owner, self.proxy_name, None)
@@ -420,7 +436,10 @@ class OneOfField:
             value = None
 
         if value is None:
-            if getattr(obj, self.proxy_choice_name) == self.name:
+            # Slotted proxy fields start out unset, so they are initialized to
+            # None here; the dataclass __init__ sets every field, so this always
+            # happens during construction.
+            if getattr(obj, self.proxy_choice_name, None) in (self.name, None):
                 setattr(obj, self.proxy_name, None)
                 setattr(obj, self.proxy_choice_name, None)
         else:
@@ -428,6 +447,40 @@ class OneOfField:
             setattr(obj, self.proxy_choice_name, self.name)
 
 
+def ir_dataclass(cls):
+    """Decorator which makes `cls` an IR dataclass with `__slots__`.
+
+    This is `dataclasses.dataclass`, followed by a rebuild of the class with
+    one slot for each ordinary field and for the proxy fields of each oneof, so
+    that instances do not need a per-instance `__dict__`.  (The `slots`
+    argument of `dataclasses.dataclass` cannot be used, because it removes the
+    `OneOfField` descriptors.)
+
+    `cls`'s base classes must also have `__slots__`.
+    """
+    cls = dataclasses.dataclass(cls)
+    cls_dict = dict(cls.__dict__)
+    slots = []
+    for class_field in dataclasses.fields(cls):
+        oneof = class_field.metadata.get("oneof")
+        if oneof:
+            names = (f"_value_{oneof}", f"which_{oneof}")
+        else:
+            names = (class_field.name,)
+        for name in names:
+            if name not in slots:
+                slots.append(name)
+                # Remove the default values and proxy defaults, which would
+                # otherwise conflict with the slot descriptors.
+                cls_dict.pop(name, None)
+    cls_dict["__slots__"] = tuple(slots)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
 def oneof_field(name: str):
     """Alternative for `datclasses.field` that sets up a oneof variable."""
     return dataclasses.field(  # pylint:disable=invalid-field-call
@@ -459,7 +512,11 @@ def list_field(cls_or_fn):
     """
 
     def list_factory(c):
-        return CopyValuesList(c if isinstance(c, type) else c())
+        # The new list is wrapped in a TemporaryCopyValuesList so that
+        # `Message.__post_init__` uses it directly instead of copying it.
+        return TemporaryCopyValuesList(
+            CopyValuesList(c if isinstance(c, type) else c())
+        )
 
     return dataclasses.field(  # pylint:disable=invalid-field-call
         default_factory=lambda: list_factory(cls_or_fn)
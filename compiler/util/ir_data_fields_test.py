@@ -16,9 +16,11 @@
 
 import dataclasses
 import enum
+import pickle
 import sys
 from typing import Optional
 import unittest
+import weakref
 
 from compiler.util import ir_data
 from compiler.util import ir_data_fields
@@ -86,6 +88,16 @@ class OneofFieldTest(ir_data.Message):
     normal_field: bool = True
 
 
+@ir_data_fields.ir_dataclass
+class SlottedTestClass(ir_data.Message):
+    """Test class for `ir_dataclass`."""
+
+    int_field: Optional[int] = ir_data_fields.oneof_field("type_1")
+    str_field: Optional[str] = ir_data_fields.oneof_field("type_1")
+    normal_field: bool = True
+    seq_field: list[int] = ir_data_fields.list_field(int)
+
+
 class OneOfTest(unittest.TestCase):
     """Tests for the various oneof field helpers."""
 
@@ -205,6 +217,19 @@ class IrDataFieldsTest(unittest.TestCase):
         for i in data_list:
             self.assertEqual(i, list_test)
 
+    def test_copy_values_list_shallow_copy(self):
+        """Tests that CopyValuesList.shallow_copy does not copy values."""
+        data_list = ir_data_fields.CopyValuesList(ListCopyTestClass)
+        list_tests = [
+            ListCopyTestClass(non_union_field=i, seq_field=[i]) for i in range(3)
+        ]
+        data_list.shallow_copy(list_tests)
+        self.assertLen(data_list, 3)
+        for copied, original in zip(data_list, list_tests):
+            self.assertIs(copied, original)
+        data_list.extend(list_tests[:1])
+        self.assertIsNot(data_list[3], list_tests[0])
+
     def test_list_param_is_copied(self):
         """Test that lists passed to constructors are converted to CopyValuesList."""
         seq_field = [5, 6, 7]
@@ -235,6 +260,44 @@ class IrDataFieldsTest(unittest.TestCase):
         self.assertEqual(oneof_test.normal_field, False)
 
 
+class IrDataclassTest(unittest.TestCase):
+    """Tests for `ir_dataclass`."""
+
+    def test_has_no_instance_dict(self):
+        slotted = SlottedTestClass()
+        self.assertFalse(hasattr(slotted, "__dict__"))
+        with self.assertRaises(AttributeError):
+            slotted.not_a_field = 1
+        self.assertIsNotNone(weakref.ref(slotted)())
+
+    def test_fields(self):
+        slotted = SlottedTestClass(int_field=3, seq_field=[1, 2])
+        self.assertEqual(3, slotted.int_field)
+        self.assertIsNone(slotted.str_field)
+        self.assertEqual("int_field", slotted.which_type_1)
+        self.assertTrue(slotted.normal_field)
+        self.assertEqual([1, 2], slotted.seq_field)
+        self.assertIsInstance(slotted.seq_field, ir_data_fields.CopyValuesList)
+        slotted.str_field = "x"
+        self.assertIsNone(slotted.int_field)
+        self.assertEqual("str_field", slotted.which_type_1)
+        self.assertIsNone(SlottedTestClass().which_type_1)
+
+    def test_default_lists_are_not_shared(self):
+        first = SlottedTestClass()
+        second = SlottedTestClass()
+        first.seq_field.append(1)
+        self.assertEqual([], second.seq_field)
+
+    def test_copy_and_pickle(self):
+        slotted = SlottedTestClass(str_field="x", normal_field=False, seq_field=[4])
+        self.assertEqual(slotted, ir_data_fields.copy(slotted))
+        self.assertEqual(slotted, pickle.loads(pickle.dumps(slotted)))
+        self.assertEqual(
+            SlottedTestClass(), pickle.loads(pickle.dumps(SlottedTestClass()))
+        )
+
+
 ir_data_fields.cache_message_specs(
     sys.modules[OneofFieldTest.__module__], ir_data.Message
 )
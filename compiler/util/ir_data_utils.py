@@ -62,6 +62,7 @@ IrDataSerializer
 ----------------
 Provides methods for serializing and deserializing an IR data object.
 """
+import dataclasses
 import enum
 import json
 from typing import (
@@ -80,6 +81,7 @@ from typing import (
 from compiler.util import ir_data
 from compiler.util import ir_data_fields
 from compiler.util import parser_types
+from compiler.util import simple_memoizer
 
 
 MessageT = TypeVar("MessageT", bound=ir_data.Message)
@@ -98,45 +100,42 @@ class IrDataSerializer:
         assert ir is not None
         self.ir = ir
 
-    def _to_dict(
-        self,
-        ir: MessageT,
-        field_func: Callable[[MessageT], list[Tuple[ir_data_fields.FieldSpec, Any]]],
-    ) -> MutableMapping[str, Any]:
-        """Translates the IR to a standard Python `dict`."""
-        assert ir is not None
-        values: MutableMapping[str, Any] = {}
-        for spec, value in field_func(ir):
-            if value is not None:
-                if spec.is_dataclass:
-                    if spec.is_sequence:
-                        value = [self._to_dict(v, field_func) for v in value]
-                    else:
-                        value = self._to_dict(value, field_func)
-                elif spec.data_type == parser_types.SourceLocation:
-                    value = str(value)
-            values[spec.name] = value
-        return values
-
-    def to_dict(self, exclude_none: bool = False):
-        """Converts the IR data class to a dictionary."""
-
-        def non_empty(ir):
-            return _fields_and_values(
-                ir, lambda v: v is not None and (not isinstance(v, list) or len(v))
-            )
-
-        def all_fields(ir):
-            return _fields_and_values(ir)
+    def to_dict(self, exclude_none: bool = False, omit_fields=()):
+        """Converts the IR data class to a dictionary.
 
+        Fields named in omit_fields are left out, at every level of the IR.
+        """
         # It's tempting to use `dataclasses.asdict` here, but that does a deep
         # copy which is overkill for the current usage; mainly as an intermediary
         # for `to_json` and `repr`.
-        return self._to_dict(self.ir, non_empty if exclude_none else all_fields)
+        ir = _extract_ir(self.ir)
+        if ir is None:
+            return {}
+        return _dict_encoder(type(ir), exclude_none, frozenset(omit_fields))(ir)
 
-    def to_json(self, *args, **kwargs):
+    def to_json(self, *args, omit_fields=(), **kwargs):
         """Converts the IR data class to a JSON string."""
-        return json.dumps(self.to_dict(exclude_none=True), *args, **kwargs)
+        return json.dumps(
+            self.to_dict(exclude_none=True, omit_fields=omit_fields), *args, **kwargs
+        )
+
+    def write_json(self, stream, omit_fields=()):
+        """Writes the IR data class to stream as JSON.
+
+        The written text is the same as `to_json(omit_fields=omit_fields)`, but
+        is written in pieces, so that neither the full JSON text nor the full
+        dict form of the IR is held in memory at once.
+
+        Arguments:
+            stream: A text file-like object.
+            omit_fields: The names of fields to leave out, at every level of
+                the IR.
+        """
+        ir = _extract_ir(self.ir)
+        if ir is None:
+            stream.write("{}")
+            return
+        _write_json(ir, stream.write, frozenset(omit_fields), 0)
 
     @staticmethod
     def from_json(data_cls, data):
@@ -162,43 +161,338 @@ class IrDataSerializer:
     def _enum_type_hook(enum_cls: type[enum.Enum]):
         return lambda val: IrDataSerializer._enum_type_converter(enum_cls, val)
 
-    @staticmethod
-    def _from_dict(data_cls: type[MessageT], data):
-        """Translates the given `data` dict to an instance of `data_cls`."""
-        class_fields: MutableMapping[str, Any] = {}
-        for name, spec in ir_data_fields.field_specs(data_cls).items():
-            if (value := data.get(name)) is not None:
-                if spec.is_dataclass:
-                    if spec.is_sequence:
-                        class_fields[name] = [
-                            IrDataSerializer._from_dict(spec.data_type, v)
-                            for v in value
-                        ]
-                    else:
-                        class_fields[name] = IrDataSerializer._from_dict(
-                            spec.data_type, value
-                        )
-                else:
-                    if spec.data_type in (
-                        ir_data.FunctionMapping,
-                        ir_data.AddressableUnit,
-                    ):
-                        class_fields[name] = IrDataSerializer._enum_type_converter(
-                            spec.data_type, value
-                        )
-                    elif spec.data_type == parser_types.SourceLocation:
-                        class_fields[name] = parser_types.SourceLocation.from_str(value)
-                    else:
-                        if spec.is_sequence:
-                            class_fields[name] = value
-                        else:
-                            class_fields[name] = spec.data_type(value)
-        return data_cls(**class_fields)
-
     @staticmethod
     def from_dict(data_cls: type[MessageT], data):
         """Creates a new IR data instance from a serialized dict."""
-        return IrDataSerializer._from_dict(data_cls, data)
+        return _dict_decoder(data_cls)(data)
+
+
+# The compiled dict encoders and decoders of each IR dataclass.  Encoders are
+# keyed by (class, exclude_none, omit_fields); decoders by class.
+_dict_encoders: MutableMapping[Tuple[type, bool, frozenset], Callable[[Any], dict]] = {}
+_dict_decoders: MutableMapping[type, Callable[[Any], Any]] = {}
+_constructors: MutableMapping[type, Callable[[dict], Any]] = {}
+
+# The global namespace of the compiled encoders and decoders, which refer to
+# each other, and to the classes they decode, by generated names.
+_codec_namespace: MutableMapping[str, Any] = {
+    "_enum_type_converter": IrDataSerializer._enum_type_converter,
+    "_source_location_from_str": simple_memoizer.memoize(
+        parser_types.SourceLocation.from_str, maxsize=4096
+    ),
+    "_new_object": object.__new__,
+    "_set": object.__setattr__,
+    "_CopyValuesList": ir_data_fields.CopyValuesList,
+}
+
+
+def _codec_name(kind: str, value: Any) -> str:
+    """Returns a new name in _codec_namespace, bound to value if it is set."""
+    name = "_{}_{}".format(kind, len(_codec_namespace))
+    _codec_namespace[name] = value
+    return name
+
+
+def _reachable_dataclasses(data_cls: type) -> list[type]:
+    """Returns data_cls and every IR dataclass reachable from its fields."""
+    result = [data_cls]
+    seen = {data_cls}
+    for cls in result:
+        for spec in ir_data_fields.field_specs(cls).values():
+            if spec.is_dataclass and spec.data_type not in seen:
+                seen.add(spec.data_type)
+                result.append(spec.data_type)
+    return result
+
+
+def _dict_encoder_source(
+    cls: type, exclude_none: bool, omit_fields: frozenset, names
+) -> list[str]:
+    """Returns the source lines of the dict encoder for cls.
+
+    The generated encoder produces the same dict as a generic walk over the
+    fields of cls: fields are visited in field spec order; unless exclude_none
+    is set, unset fields are included with the value None; if exclude_none is
+    set, empty lists are also excluded.  Fields in omit_fields are skipped.
+    """
+    lines = ["def {}(ir):".format(names[cls]), "    result = {}"]
+    for spec in ir_data_fields.field_specs(cls).values():
+        if spec.name in omit_fields:
+            continue
+        if spec.is_dataclass:
+            if spec.is_sequence:
+                conversion = "[{}(v) for v in value]".format(names[spec.data_type])
+            else:
+                conversion = "{}(value)".format(names[spec.data_type])
+        elif spec.data_type == parser_types.SourceLocation:
+            conversion = "str(value)"
+        else:
+            conversion = "value"
+        lines.append("    value = ir.{}".format(spec.name))
+        if exclude_none:
+            lines += [
+                "    if value{}:".format("" if spec.is_sequence else " is not None"),
+                "        result[{!r}] = {}".format(spec.name, conversion),
+            ]
+        elif conversion == "value":
+            lines.append("    result[{!r}] = value".format(spec.name))
+        else:
+            lines.append(
+                "    result[{!r}] = None if value is None else {}".format(
+                    spec.name, conversion
+                )
+            )
+    lines.append("    return result")
+    return lines
+
+
+def _can_construct_directly(cls: type) -> bool:
+    """Returns True if decoders may build instances of cls without __init__.
+
+    This is true for classes defined with `ir_data_fields.ir_dataclass`, whose
+    instances are fully described by their slots.
+    """
+    slots = cls.__dict__.get("__slots__", ())
+    specs = ir_data_fields.field_specs(cls)
+    return getattr(cls, "__post_init__", None) is ir_data.Message.__post_init__ and all(
+        class_field.name in specs
+        and (class_field.metadata.get("oneof") or class_field.name in slots)
+        for class_field in dataclasses.fields(cls)
+    )
+
+
+def _dict_decoder_conversion(spec: ir_data_fields.FieldSpec, names) -> str:
+    """Returns an expression which converts `value` for the field spec."""
+    if spec.is_dataclass:
+        if spec.is_sequence:
+            return "[{}(v) for v in value]".format(names[spec.data_type])
+        return "{}(value)".format(names[spec.data_type])
+    if spec.data_type in (ir_data.FunctionMapping, ir_data.AddressableUnit):
+        return "_enum_type_converter({}, value)".format(
+            _codec_name("type", spec.data_type)
+        )
+    if spec.data_type == parser_types.SourceLocation:
+        return "_source_location_from_str(value)"
+    if spec.is_sequence:
+        return "value"
+    return "{}(value)".format(_codec_name("type", spec.data_type))
+
+
+def _dict_decoder_source(cls: type, names) -> list[str]:
+    """Returns the source lines of the dict decoder for cls.
+
+    Values are converted the same way `IrDataSerializer.from_dict` always has:
+    nested dicts become IR dataclasses, FunctionMapping and AddressableUnit
+    values may be given by name or number, SourceLocations are parsed from
+    strings, and other non-list values are passed through their field type.
+
+    When possible, the decoder fills in the slots of a new instance directly,
+    with the same values that the dataclass `__init__` and
+    `Message.__post_init__` would have set; otherwise, it calls the class.
+    """
+    lines = ["def {}(data):".format(names[cls]), "    get = data.get"]
+    specs = ir_data_fields.field_specs(cls)
+    if not _can_construct_directly(cls):
+        lines.append("    fields = {}")
+        for spec in specs.values():
+            lines += [
+                "    value = get({!r})".format(spec.name),
+                "    if value is not None:",
+                "        fields[{!r}] = {}".format(
+                    spec.name, _dict_decoder_conversion(spec, names)
+                ),
+            ]
+        lines.append("    return {}(**fields)".format(_codec_name("class", cls)))
+        return lines
+    return lines + _direct_construction_lines(
+        cls, lambda spec: _dict_decoder_conversion(spec, names)
+    )
+
+
+def _direct_construction_lines(cls: type, conversion_of) -> list[str]:
+    """Returns source lines which build a cls from the field values in `get`.
+
+    The lines fill in the slots of a new instance directly, with the same
+    values that the dataclass `__init__` and `Message.__post_init__` would
+    have set.  `_can_construct_directly(cls)` must be True.
+
+    Arguments:
+        cls: The class to build.
+        conversion_of: A function from a field spec to an expression which
+            converts `value`, the value of the field from `get`.
+
+    Returns:
+        Lines of a function body, ending with a `return` statement.
+    """
+    specs = ir_data_fields.field_specs(cls)
+    lines = ["    obj = _new_object({})".format(_codec_name("class", cls))]
+    initialized_oneofs = set()
+    for class_field in dataclasses.fields(cls):
+        spec = specs[class_field.name]
+        conversion = conversion_of(spec)
+        lines.append("    value = get({!r})".format(spec.name))
+        if spec.is_oneof:
+            proxy_name = "_value_" + spec.oneof
+            choice_name = "which_" + spec.oneof
+            if spec.oneof not in initialized_oneofs:
+                initialized_oneofs.add(spec.oneof)
+                lines += [
+                    "    _set(obj, {!r}, None)".format(proxy_name),
+                    "    _set(obj, {!r}, None)".format(choice_name),
+                ]
+            lines += [
+                "    if value is not None:",
+                "        _set(obj, {!r}, {})".format(proxy_name, conversion),
+                "        _set(obj, {!r}, {!r})".format(choice_name, spec.name),
+            ]
+        elif spec.is_sequence:
+            lines.append(
+                "    _set(obj, {!r}, _CopyValuesList({}, None if value is None "
+                "else {}))".format(
+                    spec.name, _codec_name("type", spec.data_type), conversion
+                )
+            )
+        else:
+            if class_field.default_factory is not dataclasses.MISSING:
+                default = "{}()".format(
+                    _codec_name("factory", class_field.default_factory)
+                )
+            else:
+                default = _codec_name("default", class_field.default)
+            lines.append(
+                "    _set(obj, {!r}, {} if value is None else {})".format(
+                    spec.name, default, conversion
+                )
+            )
+    lines.append("    return obj")
+    return lines
+
+
+def _compile_codecs(data_cls: type, codecs: MutableMapping, key, source) -> None:
+    """Compiles codecs for data_cls and any classes reachable from it.
+
+    Arguments:
+        data_cls: The root IR dataclass.
+        codecs: The cache of compiled codecs (_dict_encoders or
+            _dict_decoders).
+        key: A function from a class to its key in codecs.
+        source: A function from a class and a dict of codec names to the
+            source lines of its codec.
+    """
+    classes = [
+        cls for cls in _reachable_dataclasses(data_cls) if key(cls) not in codecs
+    ]
+    names = {cls: _codec_name("codec", None) for cls in classes}
+    # Classes which already have codecs are referred to by their existing
+    # codecs.
+    for cls in _reachable_dataclasses(data_cls):
+        if cls not in names:
+            names[cls] = _codec_name("codec", codecs[key(cls)])
+    lines = []
+    for cls in classes:
+        lines += source(cls, names)
+        lines.append("")
+    exec(compile("\n".join(lines), "<ir_data_utils codecs>", "exec"), _codec_namespace)
+    for cls in classes:
+        codecs[key(cls)] = _codec_namespace[names[cls]]
+
+
+def _dict_encoder(
+    data_cls: type, exclude_none: bool, omit_fields: frozenset = frozenset()
+) -> Callable[[Any], dict]:
+    """Returns the compiled dict encoder for data_cls."""
+    key = (data_cls, exclude_none, omit_fields)
+    encoder = _dict_encoders.get(key)
+    if encoder is None:
+        _compile_codecs(
+            data_cls,
+            _dict_encoders,
+            lambda cls: (cls, exclude_none, omit_fields),
+            lambda cls, names: _dict_encoder_source(
+                cls, exclude_none, omit_fields, names
+            ),
+        )
+        encoder = _dict_encoders[key]
+    return encoder
+
+
+# write_json writes the nodes this close to the root field by field; deeper
+# nodes (individual struct fields, for a typical IR) are small enough to be
+# converted to JSON whole, which is much faster.
+_JSON_STREAMING_DEPTH = 4
+
+
+def _write_json(ir, write, omit_fields: frozenset, depth: int) -> None:
+    """Writes the JSON for ir, as IrDataSerializer.to_json would, to write."""
+    if depth >= _JSON_STREAMING_DEPTH:
+        write(json.dumps(_dict_encoder(type(ir), True, omit_fields)(ir)))
+        return
+    separator = "{"
+    for spec in ir_data_fields.field_specs(type(ir)).values():
+        if spec.name in omit_fields:
+            continue
+        value = getattr(ir, spec.name)
+        if not value if spec.is_sequence else value is None:
+            continue
+        write(separator)
+        separator = ", "
+        write(json.dumps(spec.name))
+        write(": ")
+        if not spec.is_dataclass:
+            if spec.data_type == parser_types.SourceLocation:
+                value = str(value)
+            write(json.dumps(value))
+        elif not spec.is_sequence:
+            _write_json(value, write, omit_fields, depth + 1)
+        else:
+            element_separator = "["
+            for element in value:
+                write(element_separator)
+                element_separator = ", "
+                _write_json(element, write, omit_fields, depth + 1)
+            write("]")
+    write("}" if separator == ", " else "{}")
+
+
+def constructor(data_cls: type[MessageT]) -> Callable[[dict], MessageT]:
+    """Returns a function which builds a data_cls from a dict of field values.
+
+    The returned function is equivalent to `lambda fields: data_cls(**fields)`,
+    but for classes defined with `ir_data_fields.ir_dataclass` it is compiled
+    to fill in the new instance's slots directly, which is considerably faster.
+    The field values must already have the right types, and unknown fields are
+    ignored.
+
+    Arguments:
+        data_cls: An IR dataclass.
+
+    Returns:
+        A function from a dict of field names to values, to a new data_cls.
+    """
+    result = _constructors.get(data_cls)
+    if result is None:
+        if _can_construct_directly(data_cls):
+            name = _codec_name("constructor", None)
+            lines = ["def {}(fields):".format(name), "    get = fields.get"]
+            lines += _direct_construction_lines(data_cls, lambda spec: "value")
+            exec(
+                compile("\n".join(lines), "<ir_data_utils codecs>", "exec"),
+                _codec_namespace,
+            )
+            result = _codec_namespace[name]
+        else:
+            result = lambda fields: data_cls(**fields)
+        _constructors[data_cls] = result
+    return result
+
+
+def _dict_decoder(data_cls: type) -> Callable[[Any], Any]:
+    """Returns the compiled dict decoder for data_cls."""
+    decoder = _dict_decoders.get(data_cls)
+    if decoder is None:
+        _compile_codecs(data_cls, _dict_decoders, lambda cls: cls, _dict_decoder_source)
+        decoder = _dict_decoders[data_cls]
+    return decoder
 
 
 class _IrDataSequenceBuilder(MutableSequence[MessageT]):
@@ -243,6 +537,9 @@ class _IrDataSequenceBuilder(MutableSequence[MessageT]):
     def extend(self, values):
         self._target.extend(values)
 
+    def shallow_copy(self, values):
+        self._target.shallow_copy(values)
+
 
 class _IrDataBuilder(Generic[MessageT]):
     """Wrapper for an IR element."""
@@ -16,6 +16,7 @@
 
 import dataclasses
 import enum
+import io
 import sys
 from typing import Optional
 import unittest
@@ -548,6 +549,94 @@ class IrDataSerializerTest(unittest.TestCase):
         func = ir_data_utils.IrDataSerializer.from_dict(ir_data.Function, function_data)
         self.assertIsNotNone(func)
 
+    def test_from_dict_defaults_match_constructor(self):
+        """Tests that unset fields get the same defaults as the constructor."""
+        canonical_name = ir_data_utils.IrDataSerializer.from_dict(
+            ir_data.CanonicalName, {}
+        )
+        self.assertEqual(ir_data.CanonicalName(), canonical_name)
+        self.assertEqual("", canonical_name.module_file)
+        self.assertIsInstance(canonical_name.object_path, ir_data_fields.CopyValuesList)
+        self.assertIsNone(
+            ir_data_utils.IrDataSerializer.from_dict(
+                ir_data.Expression, {}
+            ).which_expression
+        )
+
+    def test_from_dict_oneof(self):
+        """Tests that deserialized oneof fields select the right choice."""
+        expression = ir_data_utils.IrDataSerializer.from_dict(
+            ir_data.Expression, {"boolean_constant": {"value": True}}
+        )
+        self.assertEqual("boolean_constant", expression.which_expression)
+        self.assertTrue(expression.boolean_constant.value)
+        self.assertIsNone(expression.constant)
+        expression.constant = ir_data.NumericConstant(value="1")
+        self.assertEqual("constant", expression.which_expression)
+        self.assertIsNone(expression.boolean_constant)
+
+    def test_from_dict_non_slotted_class(self):
+        """Tests deserializing a plain dataclass subclass of Message."""
+        value = ir_data_utils.IrDataSerializer.from_dict(
+            ClassWithUnion, {"integer": 3, "non_union_field": 4}
+        )
+        self.assertEqual(ClassWithUnion(integer=3, non_union_field=4), value)
+        self.assertEqual("integer", value.which_type)
+
+    def test_constructor(self):
+        """Tests that constructor builds the same object as the class."""
+        fields = {
+            "name": ir_data.Word(text="x"),
+            "canonical_name": ir_data.CanonicalName(module_file="m.emb"),
+        }
+        construct = ir_data_utils.constructor(ir_data.NameDefinition)
+        self.assertEqual(ir_data.NameDefinition(**fields), construct(fields))
+        self.assertIsNone(construct({}).is_anonymous)
+        value = ir_data_utils.constructor(ClassWithUnion)({"integer": 3})
+        self.assertEqual(ClassWithUnion(integer=3), value)
+
+    def test_to_json_round_trip(self):
+        """Tests that to_json and from_json round trip a parsed expression."""
+        expression = expression_parser.parse("(1 + x) * $max(2, -3) == 4 ? y : z")
+        serialized = ir_data_utils.IrDataSerializer(expression).to_json()
+        round_tripped = ir_data_utils.IrDataSerializer.from_json(
+            ir_data.Expression, serialized
+        )
+        self.assertEqual(expression, round_tripped)
+        self.assertEqual(
+            serialized, ir_data_utils.IrDataSerializer(round_tripped).to_json()
+        )
+
+    def test_write_json(self):
+        """Tests that write_json writes the same JSON as to_json."""
+        expression = expression_parser.parse("(1 + x) * $max(2, -3) == 4 ? y : z")
+        serializer = ir_data_utils.IrDataSerializer(expression)
+        for omit_fields in ((), ("source_location",)):
+            stream = io.StringIO()
+            serializer.write_json(stream, omit_fields)
+            self.assertEqual(
+                serializer.to_json(omit_fields=omit_fields), stream.getvalue()
+            )
+        stream = io.StringIO()
+        ir_data_utils.IrDataSerializer(ir_data.Expression()).write_json(stream)
+        self.assertEqual("{}", stream.getvalue())
+
+    def test_omit_fields(self):
+        """Tests that omitted fields are left out at every level."""
+        expression = expression_parser.parse("1 + x")
+        serialized = ir_data_utils.IrDataSerializer(expression).to_json(
+            omit_fields=["source_location"]
+        )
+        self.assertNotIn("source_location", serialized)
+        round_tripped = ir_data_utils.IrDataSerializer.from_json(
+            ir_data.Expression, serialized
+        )
+        self.assertIsNone(round_tripped.function.args[1].source_location)
+        self.assertEqual(
+            "x",
+            round_tripped.function.args[1].field_reference.path[0].source_name[0].text,
+        )
+
     def test_ir_data_serializer_copy_from_dict(self):
         """Tests that updating an IR data struct from a dict works properly."""
         attribute = ir_data.Attribute(
@@ -0,0 +1,203 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Side tables of the debug info which can be left out of a serialized IR.
+
+Back ends only need the source text of each module and the source locations of
+IR nodes to format error messages.  The front end can write a "stripped" IR,
+without those fields (see `FIELDS`), along with a side table holding them:
+
+    ir_data_utils.IrDataSerializer(ir).write_json(
+        ir_file, omit_fields=ir_debug_info.FIELDS
+    )
+    ir_debug_info.write(ir_debug_info.extract(ir), debug_info_file)
+
+A back end which reads the stripped IR can put the debug info back, once it
+needs it:
+
+    ir_debug_info.restore(ir, ir_debug_info.read(debug_info_file))
+
+In the side table, every distinct source location is stored once, and each IR
+node which can have a location refers to it by index.  Nodes are identified by
+their position in a preorder walk of the IR, so a side table can only be
+restored into the IR it was extracted from, or a copy of it.
+"""
+
+import json
+
+from compiler.util import ir_data_fields
+from compiler.util import parser_types
+
+# The IR fields which are stored in the side table instead of the IR.
+FIELDS = ("source_text", "source_location")
+
+# FORMAT_VERSION must be incremented any time the side table layout changes.
+FORMAT_VERSION = 1
+
+_FORMAT_NAME = "emboss-ir-debug-info"
+
+
+class FormatError(Exception):
+    """A debug info side table is malformed or does not match its IR."""
+
+    pass
+
+
+class DebugInfo(object):
+    """The source text and source locations of an IR.
+
+    Attributes:
+      source_texts: The source_text of each module of the IR, in order.
+      locations: The distinct source locations of the IR.
+      location_ids: For each IR node which can have a source_location, in
+        preorder, the index of its location in `locations`, or -1 if it does
+        not have one.
+    """
+
+    def __init__(self, source_texts, locations, location_ids):
+        self.source_texts = source_texts
+        self.locations = locations
+        self.location_ids = location_ids
+
+
+# The child node fields of each IR class, and whether the class has a
+# source_location field.
+_class_info = {}
+
+
+def _info(cls):
+    info = _class_info.get(cls)
+    if info is None:
+        specs = ir_data_fields.field_specs(cls)
+        info = _class_info[cls] = (
+            "source_location" in specs,
+            tuple(
+                (spec.name, spec.is_sequence)
+                for spec in specs.values()
+                if spec.is_dataclass
+            ),
+        )
+    return info
+
+
+def _nodes_with_locations(ir):
+    """Yields each node of ir which has a source_location field, in preorder."""
+    stack = [ir]
+    while stack:
+        node = stack.pop()
+        has_location, child_fields = _info(type(node))
+        if has_location:
+            yield node
+        children = []
+        for name, is_sequence in child_fields:
+            value = getattr(node, name)
+            if value is None:
+                continue
+            if is_sequence:
+                children.extend(value)
+            else:
+                children.append(value)
+        children.reverse()
+        stack.extend(children)
+
+
+def extract(ir):
+    """Returns the DebugInfo of ir, an ir_data.EmbossIr."""
+    locations = []
+    location_indexes = {}
+    location_ids = []
+    for node in _nodes_with_locations(ir):
+        location = node.source_location
+        if location is None:
+            location_ids.append(-1)
+            continue
+        index = location_indexes.get(location)
+        if index is None:
+            index = location_indexes[location] = len(locations)
+            locations.append(location)
+        location_ids.append(index)
+    return DebugInfo(
+        [module.source_text for module in ir.module], locations, location_ids
+    )
+
+
+def restore(ir, debug_info):
+    """Sets the source text and source locations of ir from debug_info.
+
+    Arguments:
+      ir: The ir_data.EmbossIr (usually read from a stripped IR file) that
+        debug_info was extracted from.
+      debug_info: A DebugInfo.
+
+    Raises:
+      FormatError: debug_info does not match the shape of ir.
+    """
+    if len(debug_info.source_texts) != len(ir.module):
+        raise FormatError("Debug info does not match the IR.")
+    location_ids = debug_info.location_ids
+    locations = debug_info.locations
+    position = 0
+    try:
+        for node in _nodes_with_locations(ir):
+            index = location_ids[position]
+            position += 1
+            node.source_location = None if index < 0 else locations[index]
+    except IndexError:
+        raise FormatError("Debug info does not match the IR.") from None
+    if position != len(location_ids):
+        raise FormatError("Debug info does not match the IR.")
+    for module, source_text in zip(ir.module, debug_info.source_texts):
+        module.source_text = source_text
+
+
+def write(debug_info, stream):
+    """Writes debug_info to the text stream as JSON."""
+    json.dump(
+        {
+            "format": _FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "source_texts": debug_info.source_texts,
+            "locations": [str(location) for location in debug_info.locations],
+            "location_ids": debug_info.location_ids,
+        },
+        stream,
+    )
+
+
+def read(stream):
+    """Reads a DebugInfo written by `write` from the text stream.
+
+    Raises:
+      FormatError: The stream does not hold a supported debug info table.
+    """
+    try:
+        data = json.load(stream)
+        if data.get("format") != _FORMAT_NAME:
+            raise FormatError("Not an IR debug info file.")
+        if data.get("version") != FORMAT_VERSION:
+            raise FormatError(
+                "IR debug info version {} is not supported (expected {}).".format(
+                    data.get("version"), FORMAT_VERSION
+                )
+            )
+        return DebugInfo(
+            data["source_texts"],
+            [
+                parser_types.SourceLocation.from_str(location)
+                for location in data["locations"]
+            ],
+            data["location_ids"],
+        )
+    except (ValueError, KeyError, AttributeError) as e:
+        raise FormatError("IR debug info is corrupt: {!r}".format(e)) from None
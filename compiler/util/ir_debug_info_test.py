@@ -0,0 +1,115 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ir_debug_info."""
+
+import io
+import unittest
+
+from compiler.util import expression_parser
+from compiler.util import ir_data
+from compiler.util import ir_data_utils
+from compiler.util import ir_debug_info
+from compiler.util import parser_types
+
+
+def _make_ir():
+    location = parser_types.SourceLocation((1, 2), (1, 5), is_synthetic=True)
+    return ir_data.EmbossIr(
+        module=[
+            ir_data.Module(
+                source_file_name="m.emb",
+                source_text="struct Foo:\n  0 [+1]  UInt  x\n",
+                source_location=parser_types.SourceLocation((1, 1), (3, 1)),
+                type=[
+                    ir_data.TypeDefinition(
+                        name=ir_data.NameDefinition(
+                            name=ir_data.Word(text="Foo", source_location=location)
+                        ),
+                        structure=ir_data.Structure(
+                            field=[
+                                ir_data.Field(
+                                    name=ir_data.NameDefinition(
+                                        name=ir_data.Word(text="x")
+                                    ),
+                                    location=ir_data.FieldLocation(
+                                        start=expression_parser.parse("0"),
+                                        size=expression_parser.parse("1 + 2"),
+                                    ),
+                                    source_location=location,
+                                ),
+                            ]
+                        ),
+                        source_location=parser_types.SourceLocation(
+                            (1, 1), (2, 20), is_disjoint_from_parent=True
+                        ),
+                    )
+                ],
+            ),
+            ir_data.Module(source_file_name=""),
+        ]
+    )
+
+
+def _strip(ir):
+    return ir_data_utils.IrDataSerializer.from_json(
+        ir_data.EmbossIr,
+        ir_data_utils.IrDataSerializer(ir).to_json(omit_fields=ir_debug_info.FIELDS),
+    )
+
+
+class IrDebugInfoTest(unittest.TestCase):
+    """Tests for ir_debug_info."""
+
+    def test_restore(self):
+        ir = _make_ir()
+        stripped = _strip(ir)
+        self.assertNotEqual(ir, stripped)
+        ir_debug_info.restore(stripped, ir_debug_info.extract(ir))
+        self.assertEqual(ir, stripped)
+
+    def test_locations_are_shared(self):
+        debug_info = ir_debug_info.extract(_make_ir())
+        self.assertEqual(len(set(debug_info.locations)), len(debug_info.locations))
+        self.assertIn(-1, debug_info.location_ids)
+        self.assertEqual(
+            ["struct Foo:\n  0 [+1]  UInt  x\n", None], debug_info.source_texts
+        )
+
+    def test_write_and_read(self):
+        ir = _make_ir()
+        stream = io.StringIO()
+        ir_debug_info.write(ir_debug_info.extract(ir), stream)
+        stream.seek(0)
+        stripped = _strip(ir)
+        ir_debug_info.restore(stripped, ir_debug_info.read(stream))
+        self.assertEqual(ir, stripped)
+
+    def test_mismatched_ir(self):
+        debug_info = ir_debug_info.extract(_make_ir())
+        other_ir = _strip(_make_ir())
+        other_ir.module[0].type[0].structure.field.append(ir_data.Field())
+        with self.assertRaises(ir_debug_info.FormatError):
+            ir_debug_info.restore(other_ir, debug_info)
+        with self.assertRaises(ir_debug_info.FormatError):
+            ir_debug_info.restore(ir_data.EmbossIr(module=[]), debug_info)
+
+    def test_read_bad_file(self):
+        for text in ("", "{}", "[]", '{"format": "emboss-ir-debug-info"}'):
+            with self.assertRaises(ir_debug_info.FormatError):
+                ir_debug_info.read(io.StringIO(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
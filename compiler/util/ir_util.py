@@ -15,7 +15,9 @@
 """Utility functions for reading and manipulating Emboss IR."""
 
 import operator
+import weakref
 
+from compiler.util import fact_cache
 from compiler.util import ir_data
 from compiler.util import ir_data_utils
 
@@ -97,6 +99,17 @@ def constant_value(expression, bindings=None):
     """Evaluates expression with the given bindings."""
     if expression is None:
         return None
+    if bindings is None:
+        return _unbound_constant_value(expression)
+    return _constant_value(expression, bindings)
+
+
+@fact_cache.memoize
+def _unbound_constant_value(expression):
+    return _constant_value(expression, None)
+
+
+def _constant_value(expression, bindings):
     expression = ir_data_utils.reader(expression)
     if expression.which_expression == "constant":
         return int(expression.constant.value or 0)
@@ -303,6 +316,93 @@ def _find_path_in_module(path, module_ir):
     return _find_path_in_type_list(path, module_ir.type)
 
 
+def _add_type_definitions_to_index(index, path, type_list):
+    """Adds type_list and everything inside it to index."""
+    type_paths = set()
+    for type_definition in type_list:
+        type_path = path + (type_definition.name.name.text,)
+        # Like _find_path_in_type_list, only the first type with a given name
+        # can be found.
+        if type_path in type_paths:
+            continue
+        type_paths.add(type_path)
+        # Parameters, fields, and enum values take precedence over subtypes with
+        # the same name, as in _find_path_in_type_definition.
+        index.setdefault(type_path, type_definition)
+        for parameter in type_definition.runtime_parameter:
+            parameter_name = ir_data_utils.reader(parameter).name.name.text
+            index.setdefault(type_path + (parameter_name,), parameter)
+        if type_definition.has_field("structure"):
+            for field in type_definition.structure.field:
+                index.setdefault(type_path + (field.name.name.text,), field)
+        elif type_definition.has_field("enumeration"):
+            for value in type_definition.enumeration.value:
+                index.setdefault(type_path + (value.name.name.text,), value)
+        _add_type_definitions_to_index(index, type_path, type_definition.subtype)
+
+
+def _build_object_index(ir):
+    """Returns a dict from object paths to the objects in ir."""
+    index = {}
+    for module in ir.module:
+        path = (module.source_file_name,)
+        if path not in index:
+            index[path] = module
+            _add_type_definitions_to_index(index, path, module.type)
+    return index
+
+
+# Indexes built by _object_index, keyed by the id() of the ir_data.EmbossIr
+# they index.  Each value is a (weak reference to the EmbossIr, index) pair.
+_object_indexes = {}
+
+
+def _discard_object_index(key, ir_reference):
+    entry = _object_indexes.get(key)
+    if entry is not None and entry[0] is ir_reference:
+        del _object_indexes[key]
+
+
+def _object_index(ir):
+    """Returns the object index of ir, building it if necessary."""
+    key = id(ir)
+    entry = _object_indexes.get(key)
+    if entry is not None and entry[0]() is ir:
+        return entry[1]
+    index = _build_object_index(ir)
+    ir_reference = weakref.ref(ir, lambda r: _discard_object_index(key, r))
+    _object_indexes[key] = (ir_reference, index)
+    return index
+
+
+def invalidate_object_index(ir):
+    """Discards the index used by find_object for ir.
+
+    Passes which add, remove, or rename types, fields, enum values, or runtime
+    parameters should call this when they are done.  (find_object also detects
+    most changes on its own, but cannot detect objects which have been removed
+    from the IR.)
+    """
+    _object_indexes.pop(id(ir), None)
+
+
+def _find_object_by_path_without_index(path, ir):
+    for module in ir.module:
+        if module.source_file_name == path[0]:
+            return _find_path_in_module(path[1:], module)
+    return None
+
+
+def _object_has_path(obj, path):
+    """Returns True if the last element of path is still obj's name."""
+    if len(path) == 1:
+        return obj.source_file_name == path[0]
+    try:
+        return obj.name.name.text == path[-1]
+    except AttributeError:
+        return False
+
+
 def find_object_or_none(name, ir):
     """Finds the object with the given canonical name, if it exists.."""
     if isinstance(name, ir_data.Reference) or isinstance(name, ir_data.NameDefinition):
@@ -310,13 +410,23 @@ def find_object_or_none(name, ir):
     elif isinstance(name, ir_data.CanonicalName):
         path = _hashable_form_of_name(name)
     else:
-        path = name
-
-    for module in ir.module:
-        if module.source_file_name == path[0]:
-            return _find_path_in_module(path[1:], module)
-
-    return None
+        path = tuple(name)
+
+    if type(ir) is not ir_data.EmbossIr:  # pylint: disable=unidiomatic-typecheck
+        return _find_object_by_path_without_index(path, ir)
+
+    # Lookups use an index of all named objects in ir, which is built on first
+    # use.  Entries are checked before they are used, and a missing entry is
+    # double-checked by a full search, so that an out-of-date index is detected
+    # and rebuilt.
+    result = _object_index(ir).get(path)
+    if result is not None and _object_has_path(result, path):
+        return result
+    index_is_stale = result is not None
+    result = _find_object_by_path_without_index(path, ir)
+    if index_is_stale or result is not None:
+        invalidate_object_index(ir)
+    return result
 
 
 def find_object(name, ir):
@@ -354,6 +464,7 @@ def get_base_type(type_ir):
     return type_ir
 
 
+@fact_cache.memoize
 def fixed_size_of_type_in_bits(type_ir, ir):
     """Returns the fixed, known size for the given type, in bits, or None.
 
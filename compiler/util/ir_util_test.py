@@ -748,6 +748,60 @@ class IrUtilTest(unittest.TestCase):
             ir_util.find_parent_object(("test.emb", "Bar", "QUX"), ir),
         )
 
+    def test_find_object_after_ir_changes(self):
+        ir = ir_data_utils.IrDataSerializer.from_json(
+            ir_data.EmbossIr,
+            """{
+          "module": [
+            {
+              "type": [
+                {
+                  "structure": {
+                    "field": [ { "name": { "name": { "text": "field" } } } ]
+                  },
+                  "name": { "name": { "text": "Foo" } }
+                },
+                {
+                  "structure": {
+                    "field": [ { "name": { "name": { "text": "other" } } } ]
+                  },
+                  "name": { "name": { "text": "Foo" } }
+                }
+              ],
+              "source_file_name": "test.emb"
+            }
+          ]
+        }""",
+        )
+        foo = ir.module[0].type[0]
+        self.assertIs(foo, ir_util.find_object(("test.emb", "Foo"), ir))
+        # Only the first of several types with the same name can be found.
+        self.assertIsNone(ir_util.find_object_or_none(("test.emb", "Foo", "other"), ir))
+
+        # Added objects are found.
+        foo.structure.field.extend(
+            [ir_data.Field(name=ir_data.NameDefinition(name=ir_data.Word(text="new")))]
+        )
+        self.assertIs(
+            foo.structure.field[1],
+            ir_util.find_object(("test.emb", "Foo", "new"), ir),
+        )
+
+        # Renamed objects are found under their new names only.
+        foo.structure.field[0].name.name.text = "renamed"
+        self.assertIsNone(ir_util.find_object_or_none(("test.emb", "Foo", "field"), ir))
+        self.assertIs(
+            foo.structure.field[0],
+            ir_util.find_object(("test.emb", "Foo", "renamed"), ir),
+        )
+
+        # Removed objects are not found once the index is invalidated.
+        del foo.structure.field[0]
+        ir_util.invalidate_object_index(ir)
+        self.assertIsNone(
+            ir_util.find_object_or_none(("test.emb", "Foo", "renamed"), ir)
+        )
+
     def test_hashable_form_of_reference(self):
         self.assertEqual(
             ("t.emb", "Foo", "Bar"),
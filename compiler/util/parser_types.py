@@ -123,6 +123,17 @@ class SourceLocation(LocationTuple):
             cls, start, end, is_disjoint_from_parent, is_synthetic
         )
 
+    def __getnewargs_ex__(self):
+        # The default namedtuple pickling passes all fields positionally, which
+        # does not work with the keyword-only arguments of __new__.
+        return (
+            (self.start, self.end),
+            {
+                "is_disjoint_from_parent": self.is_disjoint_from_parent,
+                "is_synthetic": self.is_synthetic,
+            },
+        )
+
     def __str__(self):
         suffix = ""
         if self.is_disjoint_from_parent:
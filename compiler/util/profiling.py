@@ -0,0 +1,223 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Built-in profiling of compiler stages.
+
+Compiler code marks interesting stages (tokenizing a module, running a
+front-end pass, etc.) with `stage`:
+
+    with profiling.stage("tokenize", module=file_name):
+      tokens, errors = tokenizer.tokenize(source_code, file_name)
+
+`stage` does nothing unless a Profiler is active:
+
+    profiler = profiling.Profiler()
+    with profiler.activate():
+      glue.parse_emboss_file(...)
+    print(profiler.to_json())
+
+For each stage, the Profiler records the wall time, the number of IR nodes
+visited by traverse_ir, and the peak memory allocated while the stage was
+running (as measured by tracemalloc).  Stages may be nested; the records form a
+tree.  Code running inside a stage may also attach named counters to it with
+`add_counters`.
+"""
+
+import collections
+import contextlib
+import json
+import time
+import tracemalloc
+
+from compiler.util import traverse_ir
+
+# FORMAT_VERSION must be incremented any time the JSON output format changes
+# incompatibly.
+FORMAT_VERSION = 1
+
+# The active Profiler, if any.
+_active_profiler = None
+
+
+class StageRecord(object):
+    """Statistics for one run of a stage.
+
+    Attributes:
+      name: The name of the stage.
+      module: The source file name of the module the stage ran on, or None if
+        the stage was not specific to one module.
+      wall_time_seconds: Elapsed wall-clock time.
+      node_visits: The number of IR nodes visited by traverse_ir.
+      peak_memory_bytes: The peak size of memory allocated by the stage, over
+        the memory in use when the stage started, or None if memory was not
+        traced.
+      counters: A Counter of named statistics added with `add_counters` while
+        this stage was the innermost running stage.
+      children: StageRecords for stages which ran inside this stage.
+    """
+
+    __slots__ = (
+        "name",
+        "module",
+        "wall_time_seconds",
+        "node_visits",
+        "peak_memory_bytes",
+        "counters",
+        "children",
+    )
+
+    def __init__(self, name, module):
+        self.name = name
+        self.module = module
+        self.wall_time_seconds = 0.0
+        self.node_visits = 0
+        self.peak_memory_bytes = None
+        self.counters = collections.Counter()
+        self.children = []
+
+    def to_dict(self):
+        """Returns a JSON-compatible dict of this record and its children."""
+        result = {
+            "name": self.name,
+            "wall_time_seconds": self.wall_time_seconds,
+            "node_visits": self.node_visits,
+        }
+        if self.module is not None:
+            result["module"] = self.module
+        if self.peak_memory_bytes is not None:
+            result["peak_memory_bytes"] = self.peak_memory_bytes
+        if self.counters:
+            result["counters"] = dict(sorted(self.counters.items()))
+        if self.children:
+            result["children"] = [child.to_dict() for child in self.children]
+        return result
+
+
+class Profiler(object):
+    """Collects StageRecords for the stages run while it is active.
+
+    Attributes:
+      records: The StageRecords of the outermost stages, in the order in which
+        they started.
+      trace_memory: If true, memory allocations are traced with tracemalloc.
+        This is considerably slower than running without tracing.
+      callback: If set, a callable which is passed each StageRecord as soon as
+        its stage finishes.
+    """
+
+    def __init__(self, trace_memory=True, callback=None):
+        self.records = []
+        self.trace_memory = trace_memory
+        self.callback = callback
+        # The StageRecords of the currently-running stages, outermost first,
+        # and for each, the highest memory peak seen so far.
+        self._stack = []
+        self._peaks = []
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this Profiler the active profiler while the context is open."""
+        global _active_profiler
+        assert _active_profiler is None, "Only one Profiler may be active."
+        traverse_ir.enable_node_visit_counting(True)
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        _active_profiler = self
+        try:
+            yield self
+        finally:
+            _active_profiler = None
+            if started_tracing:
+                tracemalloc.stop()
+            traverse_ir.enable_node_visit_counting(False)
+
+    @contextlib.contextmanager
+    def stage(self, name, module=None):
+        """Records statistics for the code run while the context is open."""
+        record = StageRecord(name, module)
+        (self._stack[-1].children if self._stack else self.records).append(record)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current_memory, peak_memory = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak_memory)
+            tracemalloc.reset_peak()
+            start_memory = current_memory
+        self._stack.append(record)
+        self._peaks.append(0)
+        start_visits = traverse_ir.node_visit_count()
+        start_time = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_time_seconds = time.perf_counter() - start_time
+            record.node_visits = traverse_ir.node_visit_count() - start_visits
+            self._stack.pop()
+            peak_memory = self._peaks.pop()
+            if tracing:
+                peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+                record.peak_memory_bytes = max(0, peak_memory - start_memory)
+                # The enclosing stage's peak includes this stage's peak.
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak_memory)
+            if self.callback is not None:
+                self.callback(record)
+
+    def add_counters(self, counters):
+        """Adds counters to the innermost running stage, if any."""
+        if self._stack:
+            self._stack[-1].counters.update(counters)
+
+    def to_dict(self):
+        """Returns a JSON-compatible dict of all records."""
+        return {
+            "format_version": FORMAT_VERSION,
+            "stages": [record.to_dict() for record in self.records],
+        }
+
+    def to_json(self, indent=None):
+        """Returns all records, as JSON."""
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+def active_profiler():
+    """Returns the active Profiler, or None."""
+    return _active_profiler
+
+
+def stage(name, module=None):
+    """Returns a context manager which profiles a stage, if profiling is active.
+
+    Arguments:
+      name: The name of the stage.
+      module: The source file name of the module the stage is working on, if
+        any.
+
+    Returns:
+      A context manager.
+    """
+    if _active_profiler is None:
+        return contextlib.nullcontext()
+    return _active_profiler.stage(name, module)
+
+
+def add_counters(counters):
+    """Adds named counts to the innermost running stage, if profiling is active.
+
+    Arguments:
+      counters: A dict (or Counter) of counter names to counts.
+    """
+    if _active_profiler is not None:
+        _active_profiler.add_counters(counters)
@@ -0,0 +1,147 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for profiling."""
+
+import json
+import tracemalloc
+import unittest
+
+from compiler.util import ir_data
+from compiler.util import profiling
+from compiler.util import traverse_ir
+
+
+def _do_nothing(unused_node):
+    pass
+
+
+def _make_ir():
+    return ir_data.EmbossIr(
+        module=[
+            ir_data.Module(
+                type=[
+                    ir_data.TypeDefinition(
+                        name=ir_data.NameDefinition(name=ir_data.Word(text="Foo"))
+                    )
+                ]
+            )
+        ]
+    )
+
+
+class ProfilingTest(unittest.TestCase):
+    """Tests for profiling.Profiler and profiling.stage."""
+
+    def test_stage_without_profiler(self):
+        self.assertIsNone(profiling.active_profiler())
+        with profiling.stage("stage") as record:
+            self.assertIsNone(record)
+
+    def test_nested_stages(self):
+        profiler = profiling.Profiler(trace_memory=False)
+        with profiler.activate():
+            self.assertIs(profiler, profiling.active_profiler())
+            with profiling.stage("outer"):
+                with profiling.stage("inner", "m.emb"):
+                    pass
+                with profiling.stage("inner2"):
+                    pass
+            with profiling.stage("second"):
+                pass
+        self.assertIsNone(profiling.active_profiler())
+        self.assertEqual(["outer", "second"], [r.name for r in profiler.records])
+        outer = profiler.records[0]
+        self.assertEqual(["inner", "inner2"], [r.name for r in outer.children])
+        self.assertEqual("m.emb", outer.children[0].module)
+        self.assertGreaterEqual(
+            outer.wall_time_seconds,
+            outer.children[0].wall_time_seconds + outer.children[1].wall_time_seconds,
+        )
+        self.assertIsNone(outer.peak_memory_bytes)
+
+    def test_node_visits(self):
+        profiler = profiling.Profiler(trace_memory=False)
+        ir = _make_ir()
+        with profiler.activate():
+            with profiling.stage("outer"):
+                with profiling.stage("traverse"):
+                    traverse_ir.fast_traverse_ir_top_down(
+                        ir, [ir_data.Word], _do_nothing
+                    )
+        (outer,) = profiler.records
+        # EmbossIr, Module, TypeDefinition, NameDefinition, Word.
+        self.assertEqual(5, outer.children[0].node_visits)
+        self.assertEqual(5, outer.node_visits)
+        self.assertEqual(0, traverse_ir.node_visit_count())
+
+    def test_peak_memory(self):
+        profiler = profiling.Profiler()
+        with profiler.activate():
+            with profiling.stage("outer"):
+                with profiling.stage("inner"):
+                    garbage = bytearray(1000000)
+                    del garbage
+        self.assertFalse(tracemalloc.is_tracing())
+        (outer,) = profiler.records
+        self.assertGreaterEqual(outer.children[0].peak_memory_bytes, 1000000)
+        self.assertGreaterEqual(outer.peak_memory_bytes, 1000000)
+
+    def test_callback(self):
+        finished = []
+        profiler = profiling.Profiler(
+            trace_memory=False, callback=lambda r: finished.append(r.name)
+        )
+        with profiler.activate():
+            with profiling.stage("outer"):
+                with profiling.stage("inner"):
+                    pass
+        self.assertEqual(["inner", "outer"], finished)
+
+    def test_counters(self):
+        profiler = profiling.Profiler(trace_memory=False)
+        profiling.add_counters({"ignored": 1})
+        with profiler.activate():
+            profiling.add_counters({"ignored": 1})
+            with profiling.stage("outer"):
+                profiling.add_counters({"a": 1, "b": 2})
+                with profiling.stage("inner"):
+                    profiling.add_counters({"a": 4})
+                profiling.add_counters({"a": 1})
+        (outer,) = profiler.records
+        self.assertEqual({"a": 2, "b": 2}, outer.counters)
+        self.assertEqual({"a": 4}, outer.children[0].counters)
+        result = json.loads(profiler.to_json())
+        self.assertEqual({"a": 2, "b": 2}, result["stages"][0]["counters"])
+
+    def test_to_json(self):
+        profiler = profiling.Profiler(trace_memory=False)
+        with profiler.activate():
+            with profiling.stage("outer", "m.emb"):
+                with profiling.stage("inner"):
+                    pass
+        result = json.loads(profiler.to_json())
+        self.assertEqual(profiling.FORMAT_VERSION, result["format_version"])
+        (outer,) = result["stages"]
+        self.assertEqual("outer", outer["name"])
+        self.assertEqual("m.emb", outer["module"])
+        self.assertEqual(0, outer["node_visits"])
+        self.assertIn("wall_time_seconds", outer)
+        self.assertNotIn("peak_memory_bytes", outer)
+        self.assertNotIn("counters", outer)
+        self.assertEqual(["inner"], [child["name"] for child in outer["children"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
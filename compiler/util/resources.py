@@ -23,3 +23,8 @@ def load(package, file, encoding="utf-8"):
         "r", encoding=encoding
     ) as f:
         return f.read()
+
+
+def load_binary(package, file):
+    """Returns the contents of `file` as bytes from the Python package loader."""
+    return importlib.resources.files(package).joinpath(file).read_bytes()
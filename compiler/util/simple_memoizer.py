@@ -12,10 +12,40 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Provides a simple memoizing decorator."""
+"""Provides a simple memoizing decorator.
 
+Every memoized function belongs to a scope, which determines when its cache
+may be discarded wholesale by `clear_all`:
 
-def memoize(f):
+*   PROCESS caches hold values which stay valid for the life of the process,
+    such as loaded parser tables.
+*   COMPILATION caches hold values which are only useful during a single
+    compilation; long-running processes (such as a compile server) should
+    call `clear_all(COMPILATION)` after each compilation.
+
+Each memoized function also has `cache_info()` and `cache_clear()` methods,
+which work like those of `functools.lru_cache`.
+"""
+
+import collections
+import functools
+import weakref
+
+PROCESS = "process"
+COMPILATION = "compilation"
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "maxsize", "currsize"]
+)
+
+# The live memoized functions of each scope.
+_memoized_functions = {
+    PROCESS: weakref.WeakSet(),
+    COMPILATION: weakref.WeakSet(),
+}
+
+
+def memoize(f=None, *, maxsize=None, scope=PROCESS):
     """Memoizes f.
 
     The @memoize decorator returns a function which caches the results of f, and
@@ -34,11 +64,13 @@ def memoize(f):
     This memoizer only works for hashable arguments -- tuples, ints, etc.  It does
     not work on most iterables.
 
-    This memoizer returns a function whose __name__ and argument list may differ
-    from the memoized function under reflection.
+    This memoizer returns a function whose argument list may differ from the
+    memoized function under reflection.
 
-    This memoizer never evicts anything from its cache, so its memory usage can
-    grow indefinitely.
+    If maxsize is None, this memoizer never evicts anything from its cache, so
+    its memory usage can grow until the cache is cleared.  Otherwise, the least
+    recently used result is evicted when the cache grows beyond maxsize
+    entries, which makes each call slightly slower.
 
     Depending on the workload and speed of `f`, the memoized `f` can be slower
     than unadorned `f`; it is important to use profiling before and after
@@ -49,21 +81,109 @@ def memoize(f):
         def function(arg, arg2, arg3):
            ...
 
+        @memoize(maxsize=128, scope=COMPILATION)
+        def function(arg, arg2, arg3):
+           ...
+
     Arguments:
         f: The function to memoize.
+        maxsize: The maximum number of cached results, or None for no limit.
+        scope: PROCESS or COMPILATION; see the module documentation.
 
     Returns:
         A function which acts like f, but faster when called repeatedly with the
-        same arguments.
+        same arguments.  If f is not given, returns a decorator.
+    """
+    if f is None:
+        return lambda f: memoize(f, maxsize=maxsize, scope=scope)
+    assert maxsize is None or maxsize > 0, "maxsize must be positive."
+    assert scope in _memoized_functions, "Unknown scope {!r}.".format(scope)
+    # Hits and misses are stored in a list to avoid `nonlocal` declarations in
+    # both closures.
+    stats = [0, 0]
+
+    def _unhashable_error(args):
+        return TypeError(
+            "Arguments to memoized function {} must be hashable: {!r}".format(
+                f.__name__, args
+            )
+        )
+
+    if maxsize is None:
+        cache = {}
+
+        def _memoized(*args):
+            try:
+                result = cache[args]
+            except KeyError:
+                stats[1] += 1
+                result = cache[args] = f(*args)
+                return result
+            except TypeError:
+                raise _unhashable_error(args) from None
+            stats[0] += 1
+            return result
+
+    else:
+        cache = collections.OrderedDict()
+
+        def _memoized(*args):
+            try:
+                result = cache[args]
+            except KeyError:
+                stats[1] += 1
+                result = cache[args] = f(*args)
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+                return result
+            except TypeError:
+                raise _unhashable_error(args) from None
+            cache.move_to_end(args)
+            stats[0] += 1
+            return result
+
+    def cache_info():
+        """Returns a CacheInfo with statistics for this function's cache."""
+        return CacheInfo(stats[0], stats[1], maxsize, len(cache))
+
+    def cache_clear():
+        """Clears this function's cache and statistics."""
+        cache.clear()
+        stats[:] = [0, 0]
+
+    functools.update_wrapper(_memoized, f)
+    _memoized.cache_info = cache_info
+    _memoized.cache_clear = cache_clear
+    _memoized_functions[scope].add(_memoized)
+    return _memoized
+
+
+def clear_all(scope=None):
+    """Clears the caches of all memoized functions in scope.
+
+    Arguments:
+        scope: PROCESS or COMPILATION, or None to clear every cache.
     """
-    cache = {}
+    scopes = _memoized_functions if scope is None else (scope,)
+    for memoized_scope in scopes:
+        for function in list(_memoized_functions[memoized_scope]):
+            function.cache_clear()
 
-    def _memoized(*args):
-        assert all(
-            arg.__hash__ for arg in args
-        ), "Arguments to memoized function {} must be hashable.".format(f.__name__)
-        if args not in cache:
-            cache[args] = f(*args)
-        return cache[args]
 
-    return _memoized
+def cache_info_all(scope=None):
+    """Returns a dict of the CacheInfos of all memoized functions in scope.
+
+    Arguments:
+        scope: PROCESS or COMPILATION, or None for all memoized functions.
+
+    Returns:
+        A dict mapping "module.function" names to CacheInfos.
+    """
+    scopes = _memoized_functions if scope is None else (scope,)
+    return {
+        "{}.{}".format(function.__module__, function.__qualname__): (
+            function.cache_info()
+        )
+        for memoized_scope in scopes
+        for function in list(_memoized_functions[memoized_scope])
+    }
@@ -69,6 +69,82 @@ class SimpleMemoizerTest(unittest.TestCase):
         self.assertEqual(1, return_one_and_add_empty_tuple_to_list())
         self.assertEqual([()], arguments)
 
+    def test_unhashable_arguments(self):
+        @simple_memoizer.memoize
+        def length(sequence):
+            return len(sequence)
+
+        with self.assertRaisesRegex(TypeError, "length must be hashable"):
+            length([1, 2])
+
+    def test_cache_info(self):
+        @simple_memoizer.memoize
+        def add_one(n):
+            return n + 1
+
+        self.assertEqual(simple_memoizer.CacheInfo(0, 0, None, 0), add_one.cache_info())
+        add_one(1)
+        add_one(1)
+        add_one(2)
+        self.assertEqual(simple_memoizer.CacheInfo(1, 2, None, 2), add_one.cache_info())
+        add_one.cache_clear()
+        self.assertEqual(simple_memoizer.CacheInfo(0, 0, None, 0), add_one.cache_info())
+
+    def test_maxsize_evicts_least_recently_used(self):
+        arguments = []
+
+        @simple_memoizer.memoize(maxsize=2)
+        def add_one_and_add_argument_to_list(n):
+            arguments.append(n)
+            return n + 1
+
+        for n in (0, 1, 0, 2, 0, 1):
+            self.assertEqual(n + 1, add_one_and_add_argument_to_list(n))
+        # 1 was evicted when 2 was added, because 0 was used more recently.
+        self.assertEqual([0, 1, 2, 1], arguments)
+        self.assertEqual(
+            simple_memoizer.CacheInfo(2, 4, 2, 2),
+            add_one_and_add_argument_to_list.cache_info(),
+        )
+
+    def test_clear_all(self):
+        arguments = []
+
+        @simple_memoizer.memoize
+        def process_function(n):
+            arguments.append(("process", n))
+            return n
+
+        @simple_memoizer.memoize(scope=simple_memoizer.COMPILATION)
+        def compilation_function(n):
+            arguments.append(("compilation", n))
+            return n
+
+        process_function(0)
+        compilation_function(0)
+        simple_memoizer.clear_all(simple_memoizer.COMPILATION)
+        process_function(0)
+        compilation_function(0)
+        self.assertEqual(
+            [("process", 0), ("compilation", 0), ("compilation", 0)], arguments
+        )
+        simple_memoizer.clear_all()
+        self.assertEqual(0, process_function.cache_info().currsize)
+        self.assertEqual(0, compilation_function.cache_info().currsize)
+
+    def test_cache_info_all(self):
+        @simple_memoizer.memoize(scope=simple_memoizer.COMPILATION)
+        def compilation_function(n):
+            return n
+
+        compilation_function(0)
+        name = __name__ + "." + compilation_function.__qualname__
+        self.assertEqual(
+            simple_memoizer.CacheInfo(0, 1, None, 1),
+            simple_memoizer.cache_info_all(simple_memoizer.COMPILATION)[name],
+        )
+        self.assertNotIn(name, simple_memoizer.cache_info_all(simple_memoizer.PROCESS))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -100,7 +100,9 @@ class _FunctionCaller:
         return self.function(positional_arg, **keyword_args)
 
 
-@simple_memoizer.memoize
+# Bounded, because actions may be nested functions, which are recreated on each
+# call of their enclosing function.
+@simple_memoizer.memoize(maxsize=1024)
 def _memoized_caller(function):
     default_lambda_name = (lambda: None).__name__
     assert (
@@ -115,10 +117,32 @@ def _call_with_optional_args(function, positional_arg, keyword_args):
     return caller.invoke(positional_arg, keyword_args)
 
 
+# When node visit counting is enabled, a one-element list holding the number of
+# nodes visited by traversals; otherwise None.
+_node_visit_counter = None
+
+
+def enable_node_visit_counting(enabled):
+    """Starts or stops counting the nodes visited by IR traversals.
+
+    Counting is off by default, since it slows down traversal slightly.
+    Starting counting resets the count to 0.
+    """
+    global _node_visit_counter
+    _node_visit_counter = [0] if enabled else None
+
+
+def node_visit_count():
+    """Returns the number of nodes visited since counting was enabled, or 0."""
+    return _node_visit_counter[0] if _node_visit_counter is not None else 0
+
+
 def _fast_traverse_proto_top_down(
     proto, incidental_actions, pattern, skip_descendants_of, action, parameters
 ):
     """Traverses an IR, calling `action` on some nodes."""
+    if _node_visit_counter is not None:
+        _node_visit_counter[0] += 1
 
     # Parameters are scoped to the branch of the tree, so make a copy here, before
     # any action or incidental_action can update them.
@@ -274,6 +298,369 @@ def _fields_to_scan_by_current_and_target():
 _FIELDS_TO_SCAN_BY_CURRENT_AND_TARGET = _fields_to_scan_by_current_and_target()
 
 
+class Visitor:
+    """One (pattern, action) pair for a fused traversal.
+
+    The arguments have the same meanings as the corresponding arguments of
+    fast_traverse_node_top_down.  `parameters` are private to this visitor: the
+    parameters returned by this visitor's actions and incidental actions are not
+    visible to any other visitor.
+    """
+
+    def __init__(
+        self,
+        pattern,
+        action,
+        incidental_actions=None,
+        skip_descendants_of=(),
+        parameters=None,
+    ):
+        self.pattern = tuple(pattern)
+        self.action = action
+        self.incidental_actions = {}
+        for key, incidental_action in (incidental_actions or {}).items():
+            if not isinstance(incidental_action, (list, tuple)):
+                incidental_action = [incidental_action]
+            self.incidental_actions[key] = list(incidental_action)
+        self.skip_descendants_of = frozenset(skip_descendants_of or ())
+        self.parameters = parameters or {}
+
+
+def _function_key(function):
+    # Functions are keyed by their code, rather than their identity, so that
+    # traversals using closures (which are different objects on each call of
+    # the enclosing function) are only compiled once.
+    return getattr(function, "__code__", function)
+
+
+def _visitor_key(visitor):
+    return (
+        visitor.pattern,
+        _function_key(visitor.action),
+        tuple(
+            (node_type, tuple(_function_key(f) for f in functions))
+            for node_type, functions in visitor.incidental_actions.items()
+        ),
+        visitor.skip_descendants_of,
+    )
+
+
+def _fused_plan(visitors, node_type, states):
+    """Returns the plan for visiting a node of node_type in a fused traversal.
+
+    Each element of `states` is the index into the corresponding visitor's
+    pattern of the visitor's current target, or None if the visitor is not
+    active in this branch of the IR.
+
+    The plan is a tuple of:
+
+      steps: A list of (visitor index, run incidental actions, run action)
+          tuples, in visitor order.
+      children: A list of (field name, is repeated, child states) tuples, for
+          the fields which must be scanned by at least one active visitor.
+          Singular fields come before repeated fields, and each group is in
+          field declaration order, so that each visitor sees nodes in the same
+          order as it would in its own traversal.
+    """
+    steps = []
+    next_states = []
+    for visitor, pattern_index in zip(visitors, states):
+        if pattern_index is None:
+            next_states.append(None)
+            continue
+        pattern = visitor.pattern
+        run_action = False
+        if pattern[pattern_index] is node_type:
+            if pattern_index == len(pattern) - 1:
+                run_action = True
+            else:
+                pattern_index += 1
+        run_incidental_actions = node_type in visitor.incidental_actions
+        if run_incidental_actions or run_action:
+            steps.append((len(next_states), run_incidental_actions, run_action))
+        if node_type in visitor.skip_descendants_of:
+            next_states.append(None)
+        else:
+            next_states.append(pattern_index)
+    scanned_fields = []
+    for visitor, pattern_index in zip(visitors, next_states):
+        if pattern_index is None:
+            scanned_fields.append(((), ()))
+        else:
+            scanned_fields.append(
+                _FIELDS_TO_SCAN_BY_CURRENT_AND_TARGET[
+                    node_type, visitor.pattern[pattern_index]
+                ]
+            )
+    children = []
+    for repeated in (False, True):
+        for field_name in ir_data_utils.field_specs(node_type):
+            child_states = tuple(
+                pattern_index if field_name in fields[repeated] else None
+                for pattern_index, fields in zip(next_states, scanned_fields)
+            )
+            if any(state is not None for state in child_states):
+                children.append((field_name, repeated, child_states))
+    return steps, children
+
+
+def _fused_traverse(node, visitors, plans, states, parameters):
+    """Visits node in a fused traversal, without compiling it."""
+    if _node_visit_counter is not None:
+        _node_visit_counter[0] += 1
+    node_type = type(node)
+    plan = plans.get((node_type, states))
+    if plan is None:
+        plan = _fused_plan(visitors, node_type, states)
+        plans[node_type, states] = plan
+    steps, children = plan
+    copied = False
+    for index, run_incidental_actions, run_action in steps:
+        visitor = visitors[index]
+        functions = []
+        if run_incidental_actions:
+            functions.extend(visitor.incidental_actions[node_type])
+        if run_action:
+            functions.append(visitor.action)
+        for function in functions:
+            result = _call_with_optional_args(function, node, parameters[index])
+            if result:
+                # Parameters are scoped to the branch of the tree, so they are
+                # copied before they are updated.
+                if not copied:
+                    parameters = list(parameters)
+                    copied = True
+                parameters[index] = {**parameters[index], **result}
+    for field_name, repeated, child_states in children:
+        if repeated:
+            for element in getattr(node, field_name) or ():
+                _fused_traverse(element, visitors, plans, child_states, parameters)
+        elif node.has_field(field_name):
+            _fused_traverse(
+                getattr(node, field_name), visitors, plans, child_states, parameters
+            )
+
+
+def _argument_binding_source(function, function_name, parameters_name):
+    """Returns Python source for calling function on `proto`.
+
+    The returned expression passes `proto` as the positional argument and
+    binds keyword arguments from the `parameters_name` dict the same way that
+    _FunctionCaller.invoke does, but with the argument names resolved ahead of
+    time.
+    """
+    default_lambda_name = (lambda: None).__name__
+    assert (
+        callable(function) and function.__name__ != default_lambda_name
+    ), "For performance reasons actions must be defined as static functions"
+    caller = _FunctionCaller(function)
+    if not caller.needs_filtering:
+        return "{}(proto, **{})".format(function_name, parameters_name)
+    arguments = [
+        "{0}={1}[{0!r}]".format(name, parameters_name)
+        for name in sorted(caller.required_arg_names)
+    ]
+    optional_names = tuple(sorted(caller.valid_arg_names - caller.required_arg_names))
+    if optional_names:
+        arguments.append(
+            "**{{n: {0}[n] for n in {1!r} if n in {0}}}".format(
+                parameters_name, optional_names
+            )
+        )
+    return "{}({})".format(function_name, ", ".join(["proto"] + arguments))
+
+
+def _traversal_function_arguments(visitors):
+    """Returns the functions of visitors, in _make_traversal argument order."""
+    functions = []
+    for visitor in visitors:
+        functions.append(visitor.action)
+        for incidental_functions in visitor.incidental_actions.values():
+            functions.extend(incidental_functions)
+    return functions
+
+
+def _traversal_source(root_type, visitors, counting):
+    """Returns the source of a factory for a specialized traversal function.
+
+    The generated factory, `_make_traversal`, takes the functions returned by
+    _traversal_function_arguments(visitors), then the node visit counter, and
+    returns a function `(node, parameters_0, parameters_1, ...)` which traverses a node of type
+    `root_type`, given one parameters dict per visitor.
+
+    The traversal is specialized into one nested function per state (see
+    _fused_plan) reachable from `root_type`, with the fields to scan and the
+    action argument bindings inlined.  Each state function only takes the
+    parameters of the visitors which are active in that state.  Parameters
+    dicts are never modified in place, so they are only copied when an action
+    returns updates.
+    """
+    factory_arguments = []
+    action_names = []
+    incidental_action_names = []
+    for i, visitor in enumerate(visitors):
+        action_names.append("_action_{}".format(i))
+        factory_arguments.append(action_names[-1])
+        incidental_action_names.append({})
+        for node_type, functions in visitor.incidental_actions.items():
+            names = incidental_action_names[-1].setdefault(node_type, [])
+            for function in functions:
+                names.append(
+                    "_incidental_action_{}_{}".format(i, len(factory_arguments))
+                )
+                factory_arguments.append(names[-1])
+    factory_arguments.append("_counter")
+
+    state_names = {}
+    states_to_generate = []
+
+    def call_state(node_type, states, node_source):
+        state = node_type, states
+        if state not in state_names:
+            state_names[state] = "_visit_{}_{}".format(
+                node_type.__name__, len(state_names)
+            )
+            states_to_generate.append(state)
+        return "{}({})".format(
+            state_names[state],
+            ", ".join(
+                [node_source]
+                + [
+                    "parameters_{}".format(i)
+                    for i, pattern_index in enumerate(states)
+                    if pattern_index is not None
+                ]
+            ),
+        )
+
+    lines = ["def _make_traversal({}):".format(", ".join(factory_arguments))]
+    call_state(root_type, (0,) * len(visitors), "proto")
+    while states_to_generate:
+        node_type, states = states_to_generate.pop()
+        lines.append(
+            "    def {}(proto{}):".format(
+                state_names[node_type, states],
+                "".join(
+                    ", parameters_{}".format(i)
+                    for i, pattern_index in enumerate(states)
+                    if pattern_index is not None
+                ),
+            )
+        )
+        body = []
+        if counting:
+            body.append("_counter[0] += 1")
+        steps, children = _fused_plan(visitors, node_type, states)
+        for index, run_incidental_actions, run_action in steps:
+            visitor = visitors[index]
+            actions = []
+            if run_incidental_actions:
+                actions.extend(
+                    zip(
+                        incidental_action_names[index][node_type],
+                        visitor.incidental_actions[node_type],
+                    )
+                )
+            if run_action:
+                actions.append((action_names[index], visitor.action))
+            parameters_name = "parameters_{}".format(index)
+            for function_name, function in actions:
+                body.append(
+                    "result = "
+                    + _argument_binding_source(function, function_name, parameters_name)
+                )
+                body.append("if result:")
+                body.append("    {0} = {{**{0}, **result}}".format(parameters_name))
+        for field_name, repeated, child_states in children:
+            child_type = ir_data_utils.field_specs(node_type)[field_name].data_type
+            if repeated:
+                body.append(
+                    "for element in getattr(proto, {!r}) or ():".format(field_name)
+                )
+                body.append("    " + call_state(child_type, child_states, "element"))
+            else:
+                body.append("if proto.has_field({!r}):".format(field_name))
+                body.append(
+                    "    "
+                    + call_state(
+                        child_type,
+                        child_states,
+                        "getattr(proto, {!r})".format(field_name),
+                    )
+                )
+        lines.extend("        " + line for line in body or ["pass"])
+    lines.append("    return " + state_names[root_type, (0,) * len(visitors)])
+    return "\n".join(lines) + "\n"
+
+
+# Compiling a traversal costs about as much as running the generic traversal
+# a few times, so a traversal is only compiled once it has been used this many
+# times.
+_COMPILE_THRESHOLD = 2
+
+# Compiled traversal factories, keyed by the root node type, the visitor keys,
+# and whether node visits are counted.  A traversal which has not been compiled
+# yet maps to the number of times it has been used.
+_compiled_traversals = {}
+
+# Plans for uncompiled fused traversals, keyed in the same way as
+# _compiled_traversals; each value is a dict from (node type, states) to the
+# result of _fused_plan.
+_fused_plans = {}
+
+
+def _traverse(node, visitors):
+    """Traverses node with visitors.
+
+    Traversals which are used repeatedly are compiled into specialized
+    functions by _traversal_source; others use the generic
+    _fast_traverse_proto_top_down (for a single visitor) or _fused_traverse.
+    """
+    counting = _node_visit_counter is not None
+    key = (type(node), counting) + tuple(_visitor_key(v) for v in visitors)
+    factory = _compiled_traversals.get(key, 0)
+    if type(factory) is int:  # pylint: disable=unidiomatic-typecheck
+        if factory + 1 < _COMPILE_THRESHOLD:
+            _compiled_traversals[key] = factory + 1
+            if len(visitors) == 1:
+                (visitor,) = visitors
+                _fast_traverse_proto_top_down(
+                    node,
+                    visitor.incidental_actions,
+                    visitor.pattern,
+                    visitor.skip_descendants_of,
+                    visitor.action,
+                    visitor.parameters,
+                )
+            else:
+                _fused_traverse(
+                    node,
+                    visitors,
+                    _fused_plans.setdefault(key, {}),
+                    (0,) * len(visitors),
+                    [visitor.parameters for visitor in visitors],
+                )
+            return
+        _fused_plans.pop(key, None)
+        source = _traversal_source(type(node), visitors, counting)
+        namespace = {}
+        exec(  # pylint: disable=exec-used
+            compile(
+                source,
+                "<traverse_ir {}>".format(
+                    ", ".join(visitor.action.__name__ for visitor in visitors)
+                ),
+                "exec",
+            ),
+            namespace,
+        )
+        factory = namespace["_make_traversal"]
+        _compiled_traversals[key] = factory
+    factory(*_traversal_function_arguments(visitors), _node_visit_counter)(
+        node, *[visitor.parameters for visitor in visitors]
+    )
+
+
 def _emboss_ir_action(ir):
     return {"ir": ir}
 
@@ -393,13 +780,17 @@ def fast_traverse_ir_top_down(
             if not isinstance(incidental_action, (list, tuple)):
                 incidental_action = [incidental_action]
             all_incidental_actions.setdefault(key, []).extend(incidental_action)
-    _fast_traverse_proto_top_down(
+    _traverse(
         ir,
-        all_incidental_actions,
-        pattern,
-        skip_descendants_of,
-        action,
-        parameters or {},
+        [
+            Visitor(
+                pattern,
+                action,
+                all_incidental_actions,
+                skip_descendants_of,
+                parameters,
+            )
+        ],
     )
 
 
@@ -432,11 +823,119 @@ def fast_traverse_node_top_down(
     Returns:
       None
     """
-    _fast_traverse_proto_top_down(
+    _traverse(
         node,
-        incidental_actions or {},
-        pattern,
-        skip_descendants_of or {},
-        action,
-        parameters or {},
+        [
+            Visitor(
+                pattern,
+                action,
+                incidental_actions,
+                skip_descendants_of,
+                parameters,
+            )
+        ],
     )
+
+
+def fast_traverse_node_top_down_fused(node, visitors):
+    """Runs several visitors over a subtree of an IR in a single walk.
+
+    fast_traverse_node_top_down_fused(node, visitors) calls the same actions,
+    with the same arguments, as calling fast_traverse_node_top_down on node
+    once for each visitor, but only walks the IR once: branches are culled
+    only if none of the visitors could match anything inside them.
+
+    Each visitor's actions are called in the same order as they would be by
+    fast_traverse_node_top_down.  On any single node, visitors are run in the
+    order in which they appear in `visitors`.  Visitors should not depend on
+    changes to the IR made by other visitors.
+
+    Arguments:
+      node: An ir_data.Ir object to walk.
+      visitors: A list of Visitors.
+
+    Returns:
+      None
+    """
+    _traverse(node, list(visitors))
+
+
+def fast_traverse_ir_top_down_fused(ir, visitors):
+    """Runs several visitors over an IR in a single walk.
+
+    This is fast_traverse_node_top_down_fused with the built-in incidental
+    actions of fast_traverse_ir_top_down (`ir`, `source_file_name`,
+    `type_definition`, and `field`) added to each visitor.
+
+    Independent checks over the same IR can be combined into one walk:
+
+        errors = []
+        fast_traverse_ir_top_down_fused(ir, [
+            Visitor([ir_data.Structure], check_structure,
+                    parameters={"errors": errors}),
+            Visitor([ir_data.Enum], check_enum, parameters={"errors": errors}),
+        ])
+
+    If the order of the errors should not depend on fusion, use
+    fast_traverse_ir_top_down_collecting_errors.
+
+    Arguments:
+      ir: An ir_data.EmbossIr object to walk.
+      visitors: A list of Visitors.
+
+    Returns:
+      None
+    """
+    ir_visitors = []
+    for visitor in visitors:
+        incidental_actions = {
+            ir_data.EmbossIr: [_emboss_ir_action],
+            ir_data.Module: [_module_action],
+            ir_data.TypeDefinition: [_type_definition_action],
+            ir_data.Field: [_field_action],
+        }
+        for key, functions in visitor.incidental_actions.items():
+            incidental_actions.setdefault(key, []).extend(functions)
+        ir_visitors.append(
+            Visitor(
+                visitor.pattern,
+                visitor.action,
+                incidental_actions,
+                visitor.skip_descendants_of,
+                visitor.parameters,
+            )
+        )
+    fast_traverse_node_top_down_fused(ir, ir_visitors)
+
+
+def fast_traverse_ir_top_down_collecting_errors(ir, visitors):
+    """Runs several error-checking visitors over an IR in a single walk.
+
+    Each visitor is given its own `errors` parameter, so that the result is
+    exactly the list of errors that would be produced by running each visitor
+    with fast_traverse_ir_top_down in turn with a shared `errors` list.
+
+    Arguments:
+      ir: An ir_data.EmbossIr object to walk.
+      visitors: A list of Visitors, whose actions append errors to an `errors`
+          parameter.
+
+    Returns:
+      A list of errors, in visitor order.
+    """
+    error_lists = []
+    visitors_with_errors = []
+    for visitor in visitors:
+        errors = []
+        error_lists.append(errors)
+        visitors_with_errors.append(
+            Visitor(
+                visitor.pattern,
+                visitor.action,
+                visitor.incidental_actions,
+                visitor.skip_descendants_of,
+                {**visitor.parameters, "errors": errors},
+            )
+        )
+    fast_traverse_ir_top_down_fused(ir, visitors_with_errors)
+    return [error for errors in error_lists for error in errors]
@@ -424,5 +424,216 @@ class TraverseIrTest(unittest.TestCase):
         )
 
 
+class CompiledTraverseIrTest(TraverseIrTest):
+    """Runs the TraverseIrTest tests with traversals compiled on first use."""
+
+    def setUp(self):
+        original_threshold = traverse_ir._COMPILE_THRESHOLD
+        traverse_ir._COMPILE_THRESHOLD = 1
+
+        def restore_threshold():
+            traverse_ir._COMPILE_THRESHOLD = original_threshold
+
+        self.addCleanup(restore_threshold)
+
+    def test_repeated_traversals_match(self):
+        def record(constant, constant_list):
+            constant_list.append(int(constant.value))
+
+        traverse_ir._COMPILE_THRESHOLD = 3
+        results = []
+        for _ in range(4):
+            constants = []
+            traverse_ir.fast_traverse_ir_top_down(
+                _EXAMPLE_IR,
+                [ir_data.NumericConstant],
+                record,
+                skip_descendants_of={ir_data.AttributeValue},
+                parameters={"constant_list": constants},
+            )
+            results.append(constants)
+        self.assertEqual([results[0]] * 4, results)
+        self.assertTrue(results[0])
+
+    def test_closures_are_compiled_once(self):
+        def traverse():
+            constants = []
+
+            def record(constant):
+                constants.append(constant.value)
+
+            traverse_ir.fast_traverse_ir_top_down(
+                _EXAMPLE_IR, [ir_data.NumericConstant], record
+            )
+            return constants
+
+        first = traverse()
+        compiled_count = len(traverse_ir._compiled_traversals)
+        self.assertEqual(first, traverse())
+        self.assertEqual(compiled_count, len(traverse_ir._compiled_traversals))
+
+    def test_node_visit_counting(self):
+        def do_nothing(unused_word):
+            pass
+
+        counts = []
+        for threshold in (100, 1):
+            traverse_ir._COMPILE_THRESHOLD = threshold
+            traverse_ir.enable_node_visit_counting(True)
+            try:
+                traverse_ir.fast_traverse_ir_top_down(
+                    _EXAMPLE_IR, [ir_data.Word], do_nothing
+                )
+                counts.append(traverse_ir.node_visit_count())
+            finally:
+                traverse_ir.enable_node_visit_counting(False)
+        self.assertEqual(counts[0], counts[1])
+        self.assertGreater(counts[0], 0)
+
+
+def _pass_location_down(field):
+    return {
+        "location": (
+            int(field.location.start.constant.value),
+            int(field.location.size.constant.value),
+        )
+    }
+
+
+def _do_nothing(unused_node):
+    pass
+
+
+def _record_error(constant, errors):
+    errors.append(int(constant.value))
+
+
+class FusedTraverseIrTest(unittest.TestCase):
+    """Tests for the fused traversal functions."""
+
+    def _visitor_arguments(self):
+        # Each element is (pattern, action, incidental_actions,
+        # skip_descendants_of, extra parameters).
+        return [
+            ([ir_data.NumericConstant], _record_constant, None, (), {}),
+            (
+                [ir_data.Structure, ir_data.NumericConstant],
+                _record_field_name_and_constant,
+                None,
+                (),
+                {},
+            ),
+            (
+                [ir_data.NumericConstant],
+                _record_location_parameter_and_constant,
+                {ir_data.Field: _pass_location_down},
+                (),
+                {"location": None},
+            ),
+            (
+                [ir_data.NumericConstant],
+                _record_kind_and_constant,
+                None,
+                (ir_data.Structure,),
+                {},
+            ),
+        ]
+
+    def test_fused_matches_separate_traversals(self):
+        expected = []
+        for (
+            pattern,
+            action,
+            incidental_actions,
+            skip,
+            parameters,
+        ) in self._visitor_arguments():
+            constants = []
+            traverse_ir.fast_traverse_ir_top_down(
+                _EXAMPLE_IR,
+                pattern,
+                action,
+                incidental_actions=incidental_actions,
+                skip_descendants_of=skip,
+                parameters=dict(parameters, constant_list=constants),
+            )
+            expected.append(constants)
+        actual = [[] for _ in expected]
+        # Run twice, to check that the cached plans give the same results.
+        for _ in range(2):
+            for constants in actual:
+                del constants[:]
+            traverse_ir.fast_traverse_ir_top_down_fused(
+                _EXAMPLE_IR,
+                [
+                    traverse_ir.Visitor(
+                        pattern,
+                        action,
+                        incidental_actions=incidental_actions,
+                        skip_descendants_of=skip,
+                        parameters=dict(parameters, constant_list=constants),
+                    )
+                    for (pattern, action, incidental_actions, skip, parameters), (
+                        constants
+                    ) in zip(self._visitor_arguments(), actual)
+                ],
+            )
+            self.assertEqual(expected, actual)
+
+    def test_fused_visits_fewer_nodes(self):
+        def visit_count(function):
+            traverse_ir.enable_node_visit_counting(True)
+            try:
+                function()
+                return traverse_ir.node_visit_count()
+            finally:
+                traverse_ir.enable_node_visit_counting(False)
+
+        def separate():
+            for pattern in ([ir_data.NumericConstant], [ir_data.Word]):
+                traverse_ir.fast_traverse_ir_top_down(_EXAMPLE_IR, pattern, _do_nothing)
+
+        def fused():
+            traverse_ir.fast_traverse_ir_top_down_fused(
+                _EXAMPLE_IR,
+                [
+                    traverse_ir.Visitor(pattern, _do_nothing)
+                    for pattern in ([ir_data.NumericConstant], [ir_data.Word])
+                ],
+            )
+
+        self.assertLess(visit_count(fused), visit_count(separate))
+
+    def test_node_traversal_has_no_built_in_parameters(self):
+        constants = []
+        traverse_ir.fast_traverse_node_top_down_fused(
+            _EXAMPLE_IR.module[0],
+            [
+                traverse_ir.Visitor(
+                    [ir_data.Enum, ir_data.NumericConstant],
+                    _record_constant,
+                    parameters={"constant_list": constants},
+                )
+            ],
+        )
+        self.assertEqual([1, 1, 1], constants)
+
+    def test_collecting_errors_keeps_visitor_order(self):
+        errors = traverse_ir.fast_traverse_ir_top_down_collecting_errors(
+            _EXAMPLE_IR,
+            [
+                traverse_ir.Visitor(
+                    [ir_data.Enum, ir_data.NumericConstant], _record_error
+                ),
+                traverse_ir.Visitor(
+                    [ir_data.NumericConstant],
+                    _record_error,
+                    skip_descendants_of={ir_data.Structure},
+                ),
+            ],
+        )
+        self.assertEqual([1, 1, 1, 1, 1, 1, 64], errors)
+
+
 if __name__ == "__main__":
     unittest.main()